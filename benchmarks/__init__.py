@@ -0,0 +1 @@
+"""Benchmarks for predicate_bst; run the modules with ``python -m benchmarks.<name>`` from the repository root."""
@@ -0,0 +1,75 @@
+"""Benchmark compile_predicate against a naive recursive interpretation of the tree.
+
+Usage:
+    python -m benchmarks.bench_evaluator [--records N]
+"""
+
+import argparse
+import random
+import timeit
+
+from predicate_bst import NodeType, build_boolean_syntax_tree, compile_predicate
+from predicate_bst.evaluator import _OPERATORS
+from predicate_bst.parser import ComparisonOp, parse_condition
+
+PREDICATE = (
+    '@.category == "books" && (@.price < 20 || @.rating >= 4.5) '
+    '&& @.status != "archived" && (@.stock > 0 || @.backorder == true)'
+)
+
+
+def naive_evaluate(node, record):
+    """Walk the tree and re-parse each condition for every record."""
+    if node.type == NodeType.CONDITION:
+        condition = parse_condition(node.value)
+        actual = record.get(condition.field)
+        if condition.value is None:
+            return (actual is None) == (condition.op == ComparisonOp.EQ)
+        if actual is None:
+            return False
+        try:
+            return _OPERATORS[condition.op](actual, condition.value)
+        except TypeError:
+            return False
+    if node.type == NodeType.AND:
+        return all(naive_evaluate(child, record) for child in node.children)
+    return any(naive_evaluate(child, record) for child in node.children)
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "category": rng.choice(["books", "music", "games", "tools"]),
+            "price": round(rng.uniform(1, 100), 2),
+            "rating": round(rng.uniform(1, 5), 1),
+            "status": rng.choice(["active", "archived"]),
+            "stock": rng.randint(0, 5),
+            "backorder": rng.random() < 0.2,
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    tree = build_boolean_syntax_tree(PREDICATE)
+    predicate = compile_predicate(tree)
+    records = make_records(args.records)
+
+    assert [predicate(r) for r in records] == [naive_evaluate(tree, r) for r in records]
+
+    naive = min(timeit.repeat(lambda: [naive_evaluate(tree, r) for r in records], number=1, repeat=3))
+    compiled = min(timeit.repeat(lambda: [predicate(r) for r in records], number=1, repeat=3))
+
+    print(f"records:  {args.records}")
+    print(f"naive:    {naive * 1e9 / args.records:8.1f} ns/record")
+    print(f"compiled: {compiled * 1e9 / args.records:8.1f} ns/record")
+    print(f"speedup:  {naive / compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
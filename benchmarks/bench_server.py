@@ -0,0 +1,60 @@
+"""Measure PredicateServer throughput with many small concurrent requests.
+
+Usage:
+    python -m benchmarks.bench_server [--clients N] [--requests N] [--records N] [--latency SECONDS]
+
+Each client sends its requests concurrently; all use the same predicate, so the
+server can merge them into batches. Compare ``--latency 0`` (no waiting for
+batches to fill) with the default to see the effect of micro-batching.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.generators import mixed_rules, records
+
+from predicate_bst import PredicateCache, PredicateClient, PredicateServer
+
+
+async def run(args):
+    expression = mixed_rules(20)
+    data = records(args.records)
+    async with PredicateServer(max_batch_size=args.batch_size, max_latency=args.latency,
+                               cache=PredicateCache()) as server:
+        await server.start(port=0)
+        port = server.address[1]
+        clients = [await PredicateClient.connect(port=port) for _ in range(args.clients)]
+        try:
+            await clients[0].evaluate(expression, data)  # compile and warm up
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                client.evaluate(expression, data) for client in clients for _ in range(args.requests)
+            ))
+            elapsed = time.perf_counter() - start
+        finally:
+            for client in clients:
+                await client.close()
+        stats = server.stats
+
+    requests = args.clients * args.requests
+    print(f"workload:  {requests} x {args.records} records from {args.clients} clients")
+    print(f"elapsed:   {elapsed:8.3f} s")
+    print(f"requests:  {requests / elapsed:10.0f} /s")
+    print(f"records:   {requests * args.records / elapsed:10.0f} /s")
+    print(f"batches:   {stats.batches - 1} ({(requests / max(stats.batches - 1, 1)):.1f} requests/batch)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--records", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=0.001)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
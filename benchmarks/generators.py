@@ -0,0 +1,91 @@
+"""Synthetic predicate and data generators for the benchmark suite.
+
+Every generator is deterministic for a given size and seed, so timings from
+different runs (and different versions of the package) measure the same input.
+"""
+
+import random
+
+FIELDS = ["category", "price", "rating", "status", "stock", "region", "user", "score"]
+STRING_FIELDS = ["category", "status", "region", "user"]
+CATEGORIES = ["books", "music", "games", "tools", "garden"]
+STATUSES = ["active", "archived", "pending"]
+REGIONS = ["eu", "us", "apac"]
+
+
+def _condition(rng):
+    field = rng.choice(FIELDS)
+    if field in STRING_FIELDS:
+        values = {"category": CATEGORIES, "status": STATUSES, "region": REGIONS}.get(field, ["u1", "u2", "u3"])
+        return f'@.{field} {rng.choice(["==", "!="])} "{rng.choice(values)}"'
+    return f"@.{field} {rng.choice(['>', '>=', '<', '<=', '==', '!='])} {rng.randint(0, 100)}"
+
+
+def wide_chain(size, operator="&&", seed=0):
+    """A flat chain of ``size`` conditions joined by one operator."""
+    rng = random.Random(seed)
+    return f" {operator} ".join(_condition(rng) for _ in range(size))
+
+
+def deep_nesting(depth, seed=0):
+    """Parenthesized groups nested ``depth`` levels deep, alternating AND and OR."""
+    rng = random.Random(seed)
+    prefix = [f"{_condition(rng)} {'&&' if level % 2 else '||'} (" for level in range(depth)]
+    return "".join(prefix) + _condition(rng) + ")" * depth
+
+
+def long_literals(size, length=1_000, seed=0):
+    """``size`` equality conditions with quoted literals of ``length`` characters."""
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz &|()<>=!"
+    conditions = []
+    for i in range(size):
+        literal = "".join(rng.choice(alphabet) for _ in range(length))
+        conditions.append(f'@.{STRING_FIELDS[i % len(STRING_FIELDS)]} == "{literal}"')
+    return " || ".join(conditions)
+
+
+def mixed_rules(size, seed=0):
+    """A realistic rule: ``size`` conditions in small nested AND/OR groups."""
+    rng = random.Random(seed)
+    groups = []
+    remaining = size
+    while remaining > 0:
+        width = min(remaining, rng.randint(1, 4))
+        remaining -= width
+        inner = f" {rng.choice(['&&', '||'])} ".join(_condition(rng) for _ in range(width))
+        groups.append(f"({inner})" if width > 1 else inner)
+    return " && ".join(groups) if rng.random() < 0.5 else " || ".join(groups)
+
+
+SHAPES = {
+    "wide_and": lambda size: wide_chain(size, "&&"),
+    "wide_or": lambda size: wide_chain(size, "||"),
+    "deep": deep_nesting,
+    "long_literals": lambda size: long_literals(max(1, size // 10)),
+    "mixed": mixed_rules,
+}
+
+
+def records(count, seed=0):
+    """``count`` dict records with the fields the generated predicates use."""
+    rng = random.Random(seed)
+    return [
+        {
+            "category": rng.choice(CATEGORIES),
+            "price": rng.randint(0, 100),
+            "rating": rng.randint(0, 100),
+            "status": rng.choice(STATUSES),
+            "stock": rng.randint(0, 100),
+            "region": rng.choice(REGIONS),
+            "user": rng.choice(["u1", "u2", "u3"]),
+            "score": rng.randint(0, 100),
+        }
+        for _ in range(count)
+    ]
+
+
+def columns(count, seed=0):
+    """The same data as ``records`` in column-oriented form (e.g. for a Polars DataFrame)."""
+    rows = records(count, seed)
+    return {field: [row[field] for row in rows] for field in FIELDS}
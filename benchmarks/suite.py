@@ -0,0 +1,183 @@
+"""Benchmark suite for parsing, conversion and filtering at several input sizes.
+
+Usage:
+    python -m benchmarks.suite run [--quick] [--output results.json] [--filter SUBSTRING]
+    python -m benchmarks.suite compare BASELINE.json CURRENT.json [--threshold 0.10]
+
+``run`` times every case and writes a JSON file of results; keep one from a
+known-good version as a baseline. ``compare`` prints the relative change per
+case and exits with status 1 if any case got slower than the threshold.
+"""
+
+import argparse
+import datetime
+from importlib import metadata
+import json
+import platform
+import statistics
+import sys
+import timeit
+
+from benchmarks.generators import SHAPES, columns, records
+
+from predicate_bst import (
+    build_boolean_syntax_tree,
+    compile_predicate,
+    parse_expression,
+    to_polars,
+    to_polars_expr,
+    tokenize,
+)
+
+SIZES = [10, 100, 1_000, 10_000]
+QUICK_SIZES = [10, 100]
+# Python cannot eval deeply nested code strings, and Polars builds deep expressions slowly.
+MAX_DEPTH = {"to_polars_expr": 100, "polars_filter": 100, "evaluate": 1_000}
+ROWS = 10_000
+QUICK_ROWS = 1_000
+
+
+def _version(distribution):
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _polars():
+    try:
+        import polars
+    except ImportError:  # pragma: no cover
+        return None
+    return polars
+
+
+def build_cases(sizes, rows):
+    """Return ``{name: (callable, items)}`` for every operation, shape and size."""
+    pl = _polars()
+    data = records(rows)
+    frame = pl.DataFrame(columns(rows)) if pl is not None else None
+    cases = {}
+    for shape, generate in SHAPES.items():
+        for size in sizes:
+            expression = generate(size)
+            tokens = tokenize(expression)
+            tree = build_boolean_syntax_tree(expression)
+            cases[f"tokenize/{shape}/{size}"] = (lambda e=expression: tokenize(e), 1)
+            cases[f"parse_expression/{shape}/{size}"] = (lambda t=tokens: parse_expression(t), 1)
+            cases[f"build_tree/{shape}/{size}"] = (lambda e=expression: build_boolean_syntax_tree(e), 1)
+            deep = shape == "deep"
+            if not deep or size <= MAX_DEPTH["to_polars_expr"]:
+                cases[f"to_polars_expr/{shape}/{size}"] = (lambda t=tree: to_polars_expr(t), 1)
+            if not deep or size <= MAX_DEPTH["evaluate"]:
+                predicate = compile_predicate(tree)
+                cases[f"evaluate/{shape}/{size}"] = (lambda p=predicate: [p(r) for r in data], rows)
+            if frame is not None and (not deep or size <= MAX_DEPTH["polars_filter"]):
+                cases[f"polars_filter/{shape}/{size}"] = (
+                    lambda t=tree: frame.filter(to_polars(t)).height, rows
+                )
+    return cases
+
+
+def time_case(function, repeat):
+    """Return (best, median) seconds per call, choosing the loop count automatically."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    runs = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return min(runs), statistics.median(runs)
+
+
+def run(args):
+    sizes = QUICK_SIZES if args.quick else SIZES
+    rows = QUICK_ROWS if args.quick else ROWS
+    results = {}
+    for name, (function, items) in build_cases(sizes, rows).items():
+        if args.filter and args.filter not in name:
+            continue
+        best, median = time_case(function, args.repeat)
+        results[name] = {"seconds": best, "median": median, "items": items}
+        print(f"{name:45s} {best * 1e6:12.1f} us")
+
+    pl = _polars()
+    report = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "predicate_bst": _version("predicate-bst"),
+            "polars": pl.__version__ if pl is not None else None,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+    print(f"wrote {len(results)} results to {args.output}")
+    return 0
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compare two result sets.
+
+    Returns:
+        A list of ``(name, baseline seconds, current seconds, relative change)``
+        for cases present in both, and the names of cases slower than ``threshold``
+    """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name]["seconds"], current[name]["seconds"]
+        change = after / before - 1 if before else 0.0
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def compare(args):
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)["results"]
+    with open(args.current) as handle:
+        current = json.load(handle)["results"]
+
+    rows, regressions = compare_results(baseline, current, args.threshold)
+    for name, before, after, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:45s} {before * 1e6:12.1f} us -> {after * 1e6:12.1f} us  {change:+7.1%}{flag}")
+    only_baseline, only_current = len(set(baseline) - set(current)), len(set(current) - set(baseline))
+    if only_baseline or only_current:
+        print(f"skipped {only_baseline} case(s) only in the baseline and {only_current} only in the current run")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the {args.threshold:.0%} threshold")
+        return 1
+    print("no regressions")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time all cases and write JSON results")
+    run_parser.add_argument("--output", default="benchmark-results.json")
+    run_parser.add_argument("--quick", action="store_true", help="small sizes only")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--filter", help="only run cases whose name contains this text")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown flagged as a regression (default 0.10)")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
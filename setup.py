@@ -31,12 +31,16 @@ setup(
         "polars>=1.0.0",
     ],
     extras_require={
+        "numpy": [
+            "numpy>=1.20.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
             "black>=23.0.0",
             "isort>=5.0.0",
             "mypy>=1.0.0",
+            "numpy>=1.20.0",
         ],
     },
 )
\ No newline at end of file
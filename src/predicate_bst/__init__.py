@@ -3,23 +3,201 @@
 from .parser import (
     NodeType,
     Node,
+    ComparisonOp,
+    Condition,
+    parse_condition,
+    parse_field_path,
+    format_field_path,
+    referenced_fields,
     TokenType,
     Token,
+    iter_tokens,
     tokenize,
     parse_expression,
     build_boolean_syntax_tree,
     to_polars_expr,
     convert_to_polars
 )
+from .cache import (
+    CacheInfo,
+    PredicateCache,
+    default_cache,
+    normalize_expression
+)
+from .polars_backend import (
+    to_polars,
+    compile_polars
+)
+from .evaluator import compile_predicate
+from .batch import evaluate_batch
+from .packed import (
+    ConditionTable,
+    PackedTree,
+    PackedNode
+)
+from .index import (
+    Interval,
+    IntervalIndex,
+    MatchStats,
+    PredicateIndex,
+    access_keys
+)
+from .optimize import (
+    AdaptivePredicate,
+    SelectivityStats,
+    compile_adaptive,
+    condition_estimate,
+    optimize
+)
+from .bulk import (
+    BulkParseResult,
+    parse_many
+)
+from .stream import (
+    filter_ndjson,
+    iter_ndjson
+)
+from .lazy import (
+    explain_filtered,
+    filter_lazy,
+    scan_filtered
+)
+from .serialize import (
+    RulePack,
+    dump_trees,
+    load_trees
+)
+from .instrument import (
+    Histogram,
+    InMemoryCollector,
+    Measurement,
+    collecting,
+    get_collector,
+    set_collector
+)
+from .canonical import (
+    canonical_key,
+    canonicalize,
+    to_normal_form
+)
+from .bdd import (
+    BDD,
+    equivalent,
+    implies
+)
+from .result_cache import (
+    FilterResultCache,
+    ResultCacheInfo
+)
+from .sql import (
+    SQLDialect,
+    compile_sql,
+    query_sqlite,
+    quote_identifier,
+    to_sql
+)
+from .rewrite import (
+    rewrite_membership
+)
+from .template import (
+    PredicateTemplate,
+    extract_template
+)
 
 __all__ = [
     "NodeType",
     "Node",
+    "ComparisonOp",
+    "Condition",
+    "parse_condition",
+    "parse_field_path",
+    "format_field_path",
+    "referenced_fields",
     "TokenType",
     "Token",
+    "iter_tokens",
     "tokenize",
     "parse_expression",
     "build_boolean_syntax_tree",
     "to_polars_expr",
-    "convert_to_polars"
+    "convert_to_polars",
+    "CacheInfo",
+    "PredicateCache",
+    "default_cache",
+    "normalize_expression",
+    "to_polars",
+    "compile_polars",
+    "compile_predicate",
+    "evaluate_batch",
+    "ConditionTable",
+    "PackedTree",
+    "PackedNode",
+    "Interval",
+    "IntervalIndex",
+    "MatchStats",
+    "PredicateIndex",
+    "access_keys",
+    "AdaptivePredicate",
+    "SelectivityStats",
+    "compile_adaptive",
+    "condition_estimate",
+    "optimize",
+    "BulkParseResult",
+    "parse_many",
+    "filter_ndjson",
+    "iter_ndjson",
+    "explain_filtered",
+    "filter_lazy",
+    "scan_filtered",
+    "RulePack",
+    "dump_trees",
+    "load_trees",
+    "Histogram",
+    "InMemoryCollector",
+    "Measurement",
+    "collecting",
+    "get_collector",
+    "set_collector",
+    "PredicateClient",
+    "PredicateServer",
+    "ServerStats",
+    "canonical_key",
+    "canonicalize",
+    "to_normal_form",
+    "BDD",
+    "equivalent",
+    "implies",
+    "FilterResultCache",
+    "ResultCacheInfo",
+    "SQLDialect",
+    "compile_sql",
+    "query_sqlite",
+    "quote_identifier",
+    "to_sql",
+    "PredicateTemplate",
+    "extract_template",
+    "rewrite_membership"
 ]
+
+
+# The server pulls in asyncio, which most users never need; load it on first use.
+_LAZY_EXPORTS = {
+    "PredicateClient": "server",
+    "PredicateServer": "server",
+    "ServerStats": "server",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -0,0 +1,249 @@
+"""
+Vectorized evaluation of Boolean syntax trees over columnar batches with NumPy.
+
+``evaluate_batch`` evaluates a tree against a batch of rows held as a mapping of
+column name to array (or a NumPy structured array) and returns a boolean mask.
+The tree is walked once per batch. Within an ``AND`` node each child is only
+evaluated on the rows that are still true, and within an ``OR`` node only on
+the rows that are still false, so selective predicates skip most of the work
+for later conditions.
+
+Missing data follows ``compile_predicate``: conditions on absent columns or
+None values are false, except ``== null`` (true) and ``!= null`` (false).
+Conditions on nested paths look up the column named by the path as written
+(``"address.city"``, ``"items[0].id"``), as in flattened record batches.
+NumPy is imported lazily and is only required when this module is used.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Union
+
+from .evaluator import _OPERATORS
+from .parser import MEMBERSHIP_OPS, ComparisonOp, Node, NodeType
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError("Batch evaluation requires the 'numpy' package (pip install predicate_bst[numpy])") from exc
+    return numpy
+
+
+class _Columns:
+    """Resolves and converts columns of a batch once per evaluation."""
+
+    def __init__(self, np: Any, data: Any, length: Optional[int]):
+        self.np = np
+        self.data = data
+        self.converted: Dict[str, Any] = {}
+        if isinstance(data, np.ndarray):
+            if data.dtype.names is None:
+                raise ValueError("Array batches must be NumPy structured arrays")
+            self.names = frozenset(data.dtype.names)
+            self.length = len(data) if length is None else length
+        else:
+            self.names = None
+            if length is None:
+                if not data:
+                    raise ValueError("length is required for a batch without columns")
+                length = len(next(iter(data.values())))
+            self.length = length
+
+    def get(self, field: str) -> Optional["np.ndarray"]:
+        try:
+            return self.converted[field]
+        except KeyError:
+            pass
+        if self.names is not None:
+            values = self.data[field] if field in self.names else None
+        else:
+            values = self.data.get(field)
+            if values is not None:
+                values = self.np.asarray(values)
+                if len(values) != self.length:
+                    raise ValueError(f"Column '{field}' has {len(values)} rows, expected {self.length}")
+        self.converted[field] = values
+        return values
+
+
+def _null_mask(np: Any, values: "np.ndarray") -> "np.ndarray":
+    if values.dtype == object:
+        return np.equal(values, None).astype(bool, copy=False)
+    return np.zeros(len(values), dtype=bool)
+
+
+def _compare_scalar(compare: Any, value: Any, literal: Any) -> bool:
+    try:
+        return bool(compare(value, literal))
+    except TypeError:
+        return False
+
+
+def _is_member(value: Any, members: frozenset, include: bool) -> bool:
+    try:
+        return (value in members) == include
+    except TypeError:
+        # Unhashable values equal no member
+        return not include
+
+
+def _membership(np: Any, values: "np.ndarray", op: ComparisonOp, members: frozenset) -> "np.ndarray":
+    """Test a column slice for membership in a literal set, returning a boolean mask."""
+    include = op == ComparisonOp.IN
+    if isinstance(next(iter(members)), str):
+        vectorized = values.dtype.kind in "US"
+    else:
+        vectorized = values.dtype.kind in "biuf"
+    if vectorized:
+        found = np.isin(values, list(members))
+        return found if include else ~found
+
+    # Object columns, or columns whose type no member can equal: look values up one by one
+    result = np.zeros(len(values), dtype=bool)
+    valid = np.flatnonzero(~_null_mask(np, values))
+    if valid.size:
+        result[valid] = [_is_member(value, members, include) for value in values[valid].tolist()]
+    return result
+
+
+def _compare(np: Any, values: "np.ndarray", op: ComparisonOp, literal: Any) -> "np.ndarray":
+    """Compare a column slice with a literal, returning a boolean mask."""
+    if literal is None:
+        null = _null_mask(np, values)
+        return null if op == ComparisonOp.EQ else ~null
+    if op in MEMBERSHIP_OPS:
+        return _membership(np, values, op, literal)
+
+    compare = _OPERATORS[op]
+    if values.dtype == object:
+        result = np.zeros(len(values), dtype=bool)
+        valid = np.flatnonzero(~_null_mask(np, values))
+        if valid.size:
+            subset = values[valid]
+            try:
+                result[valid] = compare(subset, literal).astype(bool)
+            except TypeError:
+                # Mixed types: compare element by element, treating incompatible values as false.
+                result[valid] = [_compare_scalar(compare, value, literal) for value in subset]
+        return result
+
+    try:
+        result = compare(values, literal)
+    except TypeError:
+        return np.zeros(len(values), dtype=bool)
+    if not isinstance(result, np.ndarray) or result.shape != values.shape:
+        return np.zeros(len(values), dtype=bool)
+    return result.astype(bool, copy=False)
+
+
+def _evaluate_condition(node: Node, columns: _Columns, rows: Optional["np.ndarray"]) -> "np.ndarray":
+    """Evaluate a condition on the given row indices (all rows when ``rows`` is None)."""
+    np = columns.np
+    condition = node.condition
+    if condition.value is None and condition.op not in (ComparisonOp.EQ, ComparisonOp.NE):
+        raise ValueError(f"Cannot compare null with '{condition.op.value}' in condition: {condition}")
+    values = columns.get(condition.field)
+    if values is None:
+        size = columns.length if rows is None else len(rows)
+        return np.full(size, condition.value is None and condition.op == ComparisonOp.EQ, dtype=bool)
+    return _compare(np, values if rows is None else values[rows], condition.op, condition.value)
+
+
+class _Frame:
+    """Evaluation state of an AND/OR node on the explicit stack."""
+
+    __slots__ = ("node", "rows", "result", "active", "index")
+
+    def __init__(self, np: Any, node: Node, rows: Optional["np.ndarray"], size: int):
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+        self.node = node
+        self.rows = rows
+        self.result = np.full(size, node.type == NodeType.AND, dtype=bool)
+        # Positions (into ``rows``) whose outcome is still undecided; None means all of them.
+        self.active: Optional["np.ndarray"] = None
+        self.index = 0
+
+    def child_rows(self) -> Optional["np.ndarray"]:
+        if self.active is None:
+            return self.rows
+        return self.active if self.rows is None else self.rows[self.active]
+
+    def merge(self, np: Any, mask: "np.ndarray") -> bool:
+        """Fold a child's mask into the result; returns True once every row is decided."""
+        is_and = self.node.type == NodeType.AND
+        # Rows where the child decides the outcome: false under AND, true under OR.
+        undecided = mask if is_and else ~mask
+        if undecided.all():
+            return False
+        decided = ~undecided
+        if self.active is None:
+            self.result[decided] = not is_and
+            self.active = np.flatnonzero(undecided)
+        else:
+            self.result[self.active[decided]] = not is_and
+            self.active = self.active[undecided]
+        return not self.active.size
+
+
+def _evaluate(tree: Node, columns: _Columns) -> "np.ndarray":
+    """
+    Evaluate ``tree`` over all rows with an explicit stack of AND/OR frames.
+
+    Each child is evaluated only on the rows its parent has not decided yet.
+    """
+    np = columns.np
+    if tree.type == NodeType.CONDITION:
+        return _evaluate_condition(tree, columns, None)
+
+    stack = [_Frame(np, tree, None, columns.length)]
+    mask: Optional["np.ndarray"] = None
+    while True:
+        frame = stack[-1]
+        if mask is not None:
+            done = frame.merge(np, mask)
+            mask = None
+            if done or frame.index == len(frame.node.children):
+                stack.pop()
+                if not stack:
+                    return frame.result
+                mask = frame.result
+                continue
+
+        child = frame.node.children[frame.index]
+        frame.index += 1
+        rows = frame.child_rows()
+        if child.type == NodeType.CONDITION:
+            mask = _evaluate_condition(child, columns, rows)
+        else:
+            stack.append(_Frame(np, child, rows, columns.length if rows is None else len(rows)))
+
+
+def evaluate_batch(
+    tree: Node,
+    columns: Union[Mapping[str, Any], "np.ndarray"],
+    length: Optional[int] = None,
+) -> "np.ndarray":
+    """
+    Evaluate a Boolean syntax tree over a columnar batch of rows.
+
+    Args:
+        tree: The root node of the Boolean syntax tree
+        columns: A mapping of field name to a NumPy array (or any sequence
+            convertible with ``numpy.asarray``), or a NumPy structured array
+        length: Number of rows in the batch; inferred from the columns if omitted
+
+    Returns:
+        A boolean NumPy array with one entry per row
+
+    Raises:
+        ValueError: If the tree contains an unsupported condition or node, or
+            the columns have inconsistent lengths
+    """
+    np = _import_numpy()
+    return _evaluate(tree, _Columns(np, columns, length))
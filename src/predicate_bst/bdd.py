@@ -0,0 +1,269 @@
+"""
+Reduced ordered binary decision diagrams (ROBDDs) over condition atoms.
+
+A ``BDD`` manager treats every distinct condition (``@.price > 100.0``) as a
+Boolean variable, ordered by first appearance, and represents each tree as a
+node of a shared, reduced diagram. For a fixed variable order that diagram is
+unique, so within one manager:
+
+* logically equivalent trees -- however they are written, and beyond what
+  ``canonicalize`` recognises -- compile to the same node and share one
+  compiled predicate
+* implication between trees is decided exactly, as far as it follows from the
+  Boolean structure (``a && b`` implies ``a``; ``@.x > 5`` does not imply
+  ``@.x > 1``, as atoms are opaque)
+
+Evaluating a node follows a single path from the root, testing each condition
+at most once per record, however often it occurs in the source tree.
+
+Conditions are treated as independent two-valued atoms; that matches
+``compile_predicate``, where a condition on a missing field is false. Nodes
+are plain integers valid only within the manager that created them, and the
+manager is not thread-safe.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+from .cache import PredicateCache, default_cache
+from .evaluator import Predicate, _compile_condition
+from .parser import Condition, Node, NodeType, build_boolean_syntax_tree
+
+
+class BDD:
+    """
+    Manager of reduced ordered BDDs sharing one variable order and node table.
+
+    Examples:
+        >>> bdd = BDD()
+        >>> left = bdd.from_tree('@.a == 1 && (@.b == 2 || @.c == 3)')
+        >>> right = bdd.from_tree('(@.a == 1 && @.c == 3) || (@.b == 2 && @.a == 1)')
+        >>> left == right
+        True
+        >>> bdd.implies(bdd.from_tree('@.a == 1 && @.b == 2'), left)
+        True
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, cache: Optional[PredicateCache] = default_cache):
+        """
+        Args:
+            cache: Cache used when parsing predicate strings
+        """
+        self.cache = cache
+        # Node table: variable, low (condition false) and high (condition true) child per node;
+        # entries 0 and 1 are the terminals.
+        self._var: List[int] = [-1, -1]
+        self._low: List[int] = [0, 1]
+        self._high: List[int] = [0, 1]
+        self._unique: Dict[Tuple[int, int, int], int] = {}
+        self._atoms: List[Condition] = []
+        self._atom_index: Dict[Condition, int] = {}
+        self._tests: List[Predicate] = []
+        self._predicates: Dict[int, Predicate] = {}
+
+    def __len__(self) -> int:
+        """Number of nodes in the table, terminals included."""
+        return len(self._var)
+
+    @property
+    def atoms(self) -> List[Condition]:
+        """The conditions used as variables, in variable order."""
+        return list(self._atoms)
+
+    def _node(self, var: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (var, low, high)
+        node = self._unique.get(key)
+        if node is None:
+            node = self._unique[key] = len(self._var)
+            self._var.append(var)
+            self._low.append(low)
+            self._high.append(high)
+        return node
+
+    def _variable(self, condition: Condition) -> int:
+        index = self._atom_index.get(condition)
+        if index is None:
+            index = self._atom_index[condition] = len(self._atoms)
+            self._atoms.append(condition)
+            self._tests.append(_compile_condition(condition))
+        return index
+
+    def atom(self, condition: Condition) -> int:
+        """Return the node of a single condition."""
+        return self._node(self._variable(condition), self.FALSE, self.TRUE)
+
+    def _apply(self, conjunction: bool, u: int, v: int) -> int:
+        """AND (or OR) two nodes, with an explicit stack instead of recursion."""
+        absorbing, neutral = (self.FALSE, self.TRUE) if conjunction else (self.TRUE, self.FALSE)
+        var, low, high = self._var, self._low, self._high
+        done: Dict[Tuple[int, int], int] = {}
+        pending = [(u, v) if u <= v else (v, u)]
+        while pending:
+            a, b = pending[-1]
+            if (a, b) in done:
+                pending.pop()
+                continue
+            if a == absorbing or b == absorbing:
+                result: Optional[int] = absorbing
+            elif a == neutral or a == b:
+                result = b
+            elif b == neutral:
+                result = a
+            else:
+                top = min(var[a], var[b])
+                a0, a1 = (low[a], high[a]) if var[a] == top else (a, a)
+                b0, b1 = (low[b], high[b]) if var[b] == top else (b, b)
+                key0 = (a0, b0) if a0 <= b0 else (b0, a0)
+                key1 = (a1, b1) if a1 <= b1 else (b1, a1)
+                r0, r1 = done.get(key0), done.get(key1)
+                if r0 is None:
+                    pending.append(key0)
+                if r1 is None:
+                    pending.append(key1)
+                if r0 is None or r1 is None:
+                    continue
+                result = self._node(top, r0, r1)
+            done[(a, b)] = result
+            pending.pop()
+        return done[(u, v) if u <= v else (v, u)]
+
+    def conjoin(self, u: int, v: int) -> int:
+        """Return the node for ``u && v``."""
+        return self._apply(True, u, v)
+
+    def disjoin(self, u: int, v: int) -> int:
+        """Return the node for ``u || v``."""
+        return self._apply(False, u, v)
+
+    def from_tree(self, tree: Union[Node, str]) -> int:
+        """
+        Build (or find) the node of a tree.
+
+        Args:
+            tree: The root node of the Boolean syntax tree, or a predicate string
+
+        Returns:
+            The node; equivalent trees give the same node
+
+        Raises:
+            ValueError: If the tree contains an unsupported condition or node
+        """
+        if isinstance(tree, str):
+            tree = build_boolean_syntax_tree(tree, cache=self.cache)
+
+        # Number new conditions in reading order first; combining the children
+        # of each node last-to-first then adds every variable above the nodes
+        # built so far, which keeps wide chains linear.
+        pending = [tree]
+        while pending:
+            node = pending.pop()
+            if node.type == NodeType.CONDITION:
+                self._variable(node.condition)
+            pending.extend(reversed(node.children))
+
+        # Post-order walk; each finished subtree leaves its node in ``results``.
+        results: List[int] = []
+        walk: List[Tuple[Node, bool]] = [(tree, False)]
+        while walk:
+            node, expanded = walk.pop()
+            if node.type == NodeType.CONDITION:
+                results.append(self.atom(node.condition))
+                continue
+            if node.type not in (NodeType.AND, NodeType.OR):
+                raise ValueError(f"Unsupported node type: {node.type}")
+            if not node.children:
+                raise ValueError(f"{node.type.value} node has no children")
+            if not expanded:
+                walk.append((node, True))
+                walk.extend((child, False) for child in reversed(node.children))
+                continue
+            children = results[len(results) - len(node.children):]
+            del results[len(results) - len(node.children):]
+            conjunction = node.type == NodeType.AND
+            combined = children[-1]
+            for child in reversed(children[:-1]):
+                combined = self._apply(conjunction, child, combined)
+            results.append(combined)
+        return results[0]
+
+    def implies(self, u: int, v: int) -> bool:
+        """Return whether every record satisfying ``u`` also satisfies ``v``."""
+        var, low, high = self._var, self._low, self._high
+        seen: Set[Tuple[int, int]] = set()
+        pending = [(u, v)]
+        while pending:
+            a, b = pending.pop()
+            if a == self.FALSE or b == self.TRUE or a == b or (a, b) in seen:
+                continue
+            # A reduced non-terminal node has both a satisfying and a falsifying path
+            if a == self.TRUE or b == self.FALSE:
+                return False
+            seen.add((a, b))
+            top = min(var[a], var[b])
+            a0, a1 = (low[a], high[a]) if var[a] == top else (a, a)
+            b0, b1 = (low[b], high[b]) if var[b] == top else (b, b)
+            pending.append((a0, b0))
+            pending.append((a1, b1))
+        return True
+
+    def size(self, u: int) -> int:
+        """Number of non-terminal nodes reachable from ``u``."""
+        seen = set()
+        pending = [u]
+        while pending:
+            node = pending.pop()
+            if node > self.TRUE and node not in seen:
+                seen.add(node)
+                pending.append(self._low[node])
+                pending.append(self._high[node])
+        return len(seen)
+
+    def evaluate(self, u: int, record: Mapping[str, Any]) -> bool:
+        """Evaluate the node against one record."""
+        var, low, high, tests = self._var, self._low, self._high, self._tests
+        while u > self.TRUE:
+            u = high[u] if tests[var[u]](record) else low[u]
+        return u == self.TRUE
+
+    def predicate(self, u: int) -> Predicate:
+        """Return a callable evaluating the node; each node has a single callable."""
+        predicate = self._predicates.get(u)
+        if predicate is None:
+            # The tables only grow, so the closure can hold on to them
+            var, low, high, tests = self._var, self._low, self._high, self._tests
+
+            def predicate(record: Mapping[str, Any]) -> bool:
+                node = u
+                while node > 1:
+                    node = high[node] if tests[var[node]](record) else low[node]
+                return node == 1
+
+            self._predicates[u] = predicate
+        return predicate
+
+    def compile(self, tree: Union[Node, str]) -> Predicate:
+        """
+        Compile a tree into a predicate evaluated by walking its BDD.
+
+        Equivalent trees compiled by the same manager return the same callable.
+
+        Raises:
+            ValueError: If the tree contains an unsupported condition or node
+        """
+        return self.predicate(self.from_tree(tree))
+
+
+def equivalent(left: Union[Node, str], right: Union[Node, str]) -> bool:
+    """Return whether two trees match exactly the same records (treating conditions as atoms)."""
+    bdd = BDD()
+    return bdd.from_tree(left) == bdd.from_tree(right)
+
+
+def implies(left: Union[Node, str], right: Union[Node, str]) -> bool:
+    """Return whether every record matching ``left`` also matches ``right`` (treating conditions as atoms)."""
+    bdd = BDD()
+    return bdd.implies(bdd.from_tree(left), bdd.from_tree(right))
@@ -0,0 +1,157 @@
+"""
+Parsing large numbers of predicate strings in parallel.
+
+``parse_many`` deduplicates its input (by normalized expression, as the cache
+does), splits the distinct expressions into chunks and parses the chunks in a
+process or thread pool. Workers send back each chunk as a list of condition
+texts plus the raw bytes of each ``PackedTree`` node buffer, which pickles far
+more cheaply than a tree of ``Node`` objects; the parent merges the chunks
+into packed trees sharing a single ``ConditionTable``.
+"""
+
+from array import array
+from collections import namedtuple
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .cache import normalize_expression
+from .packed import ConditionTable, PackedTree, _CONDITION_CODE, _FIELDS
+from .parser import build_boolean_syntax_tree
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
+
+MODES = ("process", "thread")
+
+BulkParseResult = namedtuple("BulkParseResult", ["trees", "errors", "table"])
+
+# A parsed chunk: condition texts, then per expression either packed node bytes or an error message
+_Chunk = Tuple[List[str], List[Tuple[bool, object]]]
+
+
+def _parse_chunk(expressions: List[str]) -> _Chunk:
+    """Parse a chunk of expressions into packed buffers sharing one condition table."""
+    table = ConditionTable()
+    results: List[Tuple[bool, object]] = []
+    for expression in expressions:
+        try:
+            tree = build_boolean_syntax_tree(expression)
+        except ValueError as exc:
+            results.append((False, str(exc)))
+            continue
+        results.append((True, PackedTree.from_node(tree, table).nodes.tobytes()))
+    return [table.text(index) for index in range(len(table))], results
+
+
+def _merge_chunk(chunk: _Chunk, table: ConditionTable) -> List[Tuple[bool, object]]:
+    """Re-intern a chunk's conditions in ``table`` and rebuild its packed trees."""
+    texts, results = chunk
+    remap = [table.intern(text) for text in texts]
+    merged: List[Tuple[bool, object]] = []
+    for ok, payload in results:
+        if not ok:
+            merged.append((False, payload))
+            continue
+        nodes = array("I")
+        nodes.frombytes(payload)
+        for offset in range(0, len(nodes), _FIELDS):
+            if nodes[offset] == _CONDITION_CODE:
+                nodes[offset + 1] = remap[nodes[offset + 1]]
+        merged.append((True, PackedTree(nodes, table)))
+    return merged
+
+
+def _make_executor(mode: str, workers: int) -> "Executor":
+    # Imported here: concurrent.futures (and multiprocessing) is slow to import
+    if mode == "process":
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=workers)
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def parse_many(
+    expressions: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 1000,
+    mode: str = "process",
+    table: Optional[ConditionTable] = None,
+) -> BulkParseResult:
+    """
+    Parse many predicate strings, in parallel, into compact packed trees.
+
+    Expressions that normalize to the same string are parsed once and share a
+    ``PackedTree``. Invalid expressions do not abort the batch: their position
+    maps to the error message in ``errors`` and their tree is None.
+
+    Examples:
+        >>> result = parse_many(['@.a == 1', '@.a==1', '@.a == 1 &&', '@.b > 2'], workers=1)
+        >>> result.trees[0] is result.trees[1]
+        True
+        >>> result.errors
+        {2: 'Unexpected end of expression'}
+
+    Args:
+        expressions: The logical predicates in string form
+        workers: Number of worker processes or threads; defaults to the CPU
+            count. With one worker, or a single chunk, parsing runs inline.
+        chunksize: Number of distinct expressions sent to a worker at a time
+        mode: ``"process"`` for a process pool, or ``"thread"`` for a thread
+            pool (which only runs in parallel on free-threaded Python builds)
+        table: Condition table to intern conditions in; a new one by default
+
+    Returns:
+        A ``BulkParseResult`` of ``trees`` (a list aligned with the input),
+        ``errors`` (input position -> message) and the shared ``table``
+
+    Raises:
+        ValueError: If the mode, worker count or chunk size is invalid
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unsupported mode: {mode!r} (expected one of {', '.join(MODES)})")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if table is None:
+        table = ConditionTable()
+
+    # Map every input position to the index of its distinct expression
+    distinct: List[str] = []
+    positions: Dict[str, int] = {}
+    slots: List[int] = []
+    for expression in expressions:
+        key = normalize_expression(expression)
+        slot = positions.get(key)
+        if slot is None:
+            slot = positions[key] = len(distinct)
+            distinct.append(expression)
+        slots.append(slot)
+
+    chunks = [distinct[start:start + chunksize] for start in range(0, len(distinct), chunksize)]
+    if workers == 1 or len(chunks) <= 1:
+        parsed = map(_parse_chunk, chunks)
+        results = [result for chunk in parsed for result in _merge_chunk(chunk, table)]
+    else:
+        with _make_executor(mode, min(workers, len(chunks))) as executor:
+            results = [
+                result
+                for chunk in executor.map(_parse_chunk, chunks)
+                for result in _merge_chunk(chunk, table)
+            ]
+
+    trees: List[Optional[PackedTree]] = []
+    errors: Dict[int, str] = {}
+    for position, slot in enumerate(slots):
+        ok, payload = results[slot]
+        if ok:
+            trees.append(payload)
+        else:
+            trees.append(None)
+            errors[position] = payload
+    return BulkParseResult(trees, errors, table)
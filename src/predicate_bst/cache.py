@@ -0,0 +1,150 @@
+"""
+Thread-safe LRU cache for parsed and compiled predicates.
+
+Entries are keyed by a *kind* (``"tree"``, ``"polars_expr"``, ...) and the
+normalized expression string, so each compiled form of a predicate is cached
+independently while whitespace-only variations of the same predicate share a
+single entry.
+"""
+
+from collections import OrderedDict, namedtuple
+import re
+import threading
+from typing import Any, Callable, Hashable, Tuple
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+# Quoted strings are kept verbatim; whitespace runs outside quotes are normalized.
+_NORMALIZE_RE = re.compile(r'"[^"]*"|\'[^\']*\'|\s+')
+_OPERATOR_CHARS = frozenset("&|=!<>")
+# Characters whitespace may always surround; next to anything else (``-``, ``[``, ``@``,
+# letters...) it can make an expression invalid, so it is kept.
+_SEPARATOR_CHARS = _OPERATOR_CHARS | frozenset("(),")
+
+
+def _joinable(before: str, after: str) -> bool:
+    """Whether removing the whitespace between two characters could change the meaning."""
+    if before in _SEPARATOR_CHARS or after in _SEPARATOR_CHARS:
+        return before in _OPERATOR_CHARS and after in _OPERATOR_CHARS
+    return True
+
+
+def _normalize_match(match: "re.Match") -> str:
+    text = match.group(0)
+    if not text[0].isspace():
+        return text
+    source = match.string
+    start, end = match.span()
+    if 0 < start and end < len(source) and _joinable(source[start - 1], source[end]):
+        return " "
+    return ""
+
+
+def normalize_expression(expression: str) -> str:
+    """
+    Normalize a predicate string for use as a cache key.
+
+    Whitespace outside quoted literals is removed next to parentheses, commas
+    and operator characters, and collapsed to a single space elsewhere, where
+    it can change the meaning or validity (``foo bar``, ``& &``, ``- 1``,
+    ``@.a [0]``). Expressions that differ only in insignificant whitespace
+    therefore normalize to the same key, and an invalid expression never
+    shares a key with a valid one.
+
+    Args:
+        expression: The logical predicate in string form
+
+    Returns:
+        The normalized expression
+    """
+    return _NORMALIZE_RE.sub(_normalize_match, expression.strip())
+
+
+class PredicateCache:
+    """
+    Bounded, thread-safe LRU cache of compiled predicate forms.
+
+    Cached values are shared between callers and must be treated as read-only.
+    Failed compilations (those raising an exception) are not cached.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Hashable, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        """Maximum number of entries held by the cache."""
+        return self._maxsize
+
+    def get_or_compute(self, kind: Hashable, expression: str, compute: Callable[[str], Any]) -> Any:
+        """
+        Return the cached value for ``expression``, computing it on a miss.
+
+        Args:
+            kind: Name of the compiled form, e.g. ``"tree"`` or ``"polars_expr"``
+            expression: The logical predicate in string form
+            compute: Called with ``expression`` to build the value on a miss
+
+        Returns:
+            The cached or freshly computed value
+        """
+        key = (kind, normalize_expression(expression))
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+
+        # Compute outside the lock; concurrent misses may compute twice, which is harmless.
+        value = compute(expression)
+        self._store(key, value)
+        return value
+
+    def _store(self, key: Tuple[Hashable, str], value: Any) -> None:
+        if self._maxsize == 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        """Change the maximum size, evicting least recently used entries if needed."""
+        if maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset the hit/miss/eviction counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Return hit, miss and eviction counters together with the current size."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self._maxsize, len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+default_cache = PredicateCache()
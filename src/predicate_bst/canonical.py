@@ -0,0 +1,267 @@
+"""
+Canonical forms of Boolean syntax trees.
+
+Predicates that differ only in the order of operands, redundant parentheses,
+repeated conditions or whitespace should be recognised as the same rule.
+``canonicalize`` rewrites a tree so that all of these produce one tree:
+
+* nested nodes of the same type are merged (``a && (b && c)`` is ``a && b && c``)
+* duplicate children are removed (``a || a`` is ``a``)
+* absorbed children are removed: ``a && (a || b)`` is ``a``, and
+  ``(a || b) && (a || b || c)`` is ``a || b`` (and the same with AND and OR swapped)
+* nodes left with a single child are replaced by it
+* condition texts are normalized (``@.price>10`` is ``@.price > 10.0``) and
+  children are sorted: conditions by text, then groups by their first condition
+
+These rewrites are valid under the Kleene logic Polars uses for missing data
+as well as under the two-valued semantics of ``compile_predicate``.
+
+``canonical_key`` is a digest of the canonical form, usable as a dictionary key
+for deduplicating rules. With ``form="dnf"`` or ``"cnf"`` the tree is also
+expanded into disjunctive or conjunctive normal form when that takes at most
+``max_clauses`` clauses; normal forms make more equivalences visible but can
+grow exponentially, hence the bound.
+"""
+
+import hashlib
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from .cache import PredicateCache, default_cache
+from .parser import Node, NodeType, build_boolean_syntax_tree
+
+
+FORMS = ("dnf", "cnf")
+
+# Absorption between groups compares every pair; skip it for nodes with more groups than this.
+_MAX_ABSORPTION_GROUPS = 256
+
+_TYPE_TAGS = {NodeType.AND: b"&", NodeType.OR: b"|", NodeType.CONDITION: b"c"}
+
+
+def _digest(tag: bytes, payload: bytes) -> bytes:
+    return hashlib.blake2b(tag + payload, digest_size=16).digest()
+
+
+class _Canonical:
+    """A canonical subtree with its digest and the canonical forms of its children."""
+
+    __slots__ = ("node", "digest", "children", "label")
+
+    def __init__(self, node: Node, digest: bytes, children: Tuple["_Canonical", ...] = ()):
+        self.node = node
+        self.digest = digest
+        self.children = children
+        # Text of the first condition, so that groups sort near their leading condition
+        self.label: str = children[0].label if children else node.value
+
+    def sort_key(self) -> Tuple[bool, str, bytes]:
+        return (bool(self.children), self.label, self.digest)
+
+
+def _canonical_leaf(node: Node) -> _Canonical:
+    try:
+        text = str(node.condition)
+    except ValueError:
+        # Not a parseable condition: keep the text, which backends will reject
+        return _Canonical(node, _digest(_TYPE_TAGS[NodeType.CONDITION], node.value.strip().encode("utf-8")))
+    leaf = node if node.value == text else Node(NodeType.CONDITION, text, node.condition)
+    return _Canonical(leaf, _digest(_TYPE_TAGS[NodeType.CONDITION], text.encode("utf-8")))
+
+
+def _combine(node_type: NodeType, children: List[_Canonical]) -> _Canonical:
+    """Merge, deduplicate, absorb and sort the canonical children of an AND/OR node."""
+    flat: Dict[bytes, _Canonical] = {}
+    for child in children:
+        if child.node.type == node_type:
+            for grandchild in child.children:
+                flat.setdefault(grandchild.digest, grandchild)
+        else:
+            flat.setdefault(child.digest, child)
+
+    # Under AND, each child is the disjunction of its operands (an OR's children,
+    # or just itself); it is absorbed by another child whose operands are a subset.
+    # The same holds with AND and OR swapped.
+    operands: Dict[bytes, FrozenSet[bytes]] = {
+        digest: frozenset(c.digest for c in child.children) if child.children else frozenset((digest,))
+        for digest, child in flat.items()
+    }
+    singles = {digest for digest, group in operands.items() if len(group) == 1}
+    groups = sorted((digest for digest in operands if digest not in singles), key=lambda d: len(operands[d]))
+    absorbed = set()
+    for index, digest in enumerate(groups):
+        group = operands[digest]
+        if not singles.isdisjoint(group):
+            absorbed.add(digest)
+        elif len(groups) <= _MAX_ABSORPTION_GROUPS:
+            for smaller in groups[:index]:
+                if smaller not in absorbed and len(operands[smaller]) < len(group) and operands[smaller] <= group:
+                    absorbed.add(digest)
+                    break
+
+    kept = sorted((child for digest, child in flat.items() if digest not in absorbed), key=_Canonical.sort_key)
+    if len(kept) == 1:
+        return kept[0]
+    node = Node(node_type)
+    node.children = [child.node for child in kept]
+    digest = _digest(_TYPE_TAGS[node_type], b"".join(child.digest for child in kept))
+    return _Canonical(node, digest, tuple(kept))
+
+
+def _canonical(tree: Node) -> _Canonical:
+    # Post-order walk; each finished subtree leaves its canonical form in ``results``.
+    results: List[_Canonical] = []
+    pending: List[Tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if node.type == NodeType.CONDITION:
+            results.append(_canonical_leaf(node))
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+            continue
+        children = results[len(results) - len(node.children):]
+        del results[len(results) - len(node.children):]
+        results.append(_combine(node.type, children))
+    return results[0]
+
+
+def _normal_form(root: _Canonical, form: str, max_clauses: int) -> Optional[_Canonical]:
+    """Expand a canonical tree into DNF or CNF, or return None if that needs too many clauses."""
+    if form not in FORMS:
+        raise ValueError(f"Unknown normal form: {form!r} (expected one of {', '.join(FORMS)})")
+    outer, inner = (NodeType.OR, NodeType.AND) if form == "dnf" else (NodeType.AND, NodeType.OR)
+    leaves: Dict[bytes, _Canonical] = {}
+
+    # Post-order walk; each finished subtree leaves its clauses (sets of leaf digests) in ``results``.
+    results: List[List[FrozenSet[bytes]]] = []
+    pending: List[Tuple[_Canonical, bool]] = [(root, False)]
+    while pending:
+        item, expanded = pending.pop()
+        if not item.children:
+            leaves[item.digest] = item
+            results.append([frozenset((item.digest,))])
+            continue
+        if not expanded:
+            pending.append((item, True))
+            pending.extend((child, False) for child in reversed(item.children))
+            continue
+        operands = results[len(results) - len(item.children):]
+        del results[len(results) - len(item.children):]
+        if item.node.type == outer:
+            clauses = [clause for operand in operands for clause in operand]
+        else:
+            clauses = operands[0]
+            for operand in operands[1:]:
+                clauses = _minimal([left | right for left in clauses for right in operand])
+                if len(clauses) > max_clauses:
+                    return None
+        clauses = _minimal(clauses)
+        if len(clauses) > max_clauses:
+            return None
+        results.append(clauses)
+
+    return _combine(outer, [
+        _combine(inner, [leaves[digest] for digest in clause]) for clause in results[0]
+    ])
+
+
+def _minimal(clauses: List[FrozenSet[bytes]]) -> List[FrozenSet[bytes]]:
+    """Drop duplicate clauses and clauses that contain another one (absorption)."""
+    kept: List[FrozenSet[bytes]] = []
+    for clause in sorted(set(clauses), key=len):
+        if not any(smaller <= clause for smaller in kept):
+            kept.append(clause)
+    return kept
+
+
+def _parse(tree: Union[Node, str], cache: Optional[PredicateCache]) -> Node:
+    return build_boolean_syntax_tree(tree, cache=cache) if isinstance(tree, str) else tree
+
+
+def canonicalize(
+    tree: Union[Node, str],
+    form: Optional[str] = None,
+    max_clauses: int = 256,
+    cache: Optional[PredicateCache] = default_cache,
+) -> Node:
+    """
+    Return the canonical form of a tree; equivalent rewrites of a rule give equal trees.
+
+    The input tree is not modified. The result may share condition nodes with
+    it, so treat both as read-only.
+
+    Examples:
+        >>> str(canonicalize('@.b == 1 && (@.a == 2 && @.b == 1)'))
+        'AND(Condition(@.a == 2), Condition(@.b == 1))'
+        >>> str(canonicalize('@.a == 1 && (@.a == 1 || @.b == 2)'))
+        'Condition(@.a == 1)'
+
+    Args:
+        tree: The root node of the Boolean syntax tree, or a predicate string
+        form: ``"dnf"`` or ``"cnf"`` to also expand into that normal form, or
+            None for the plain canonical form
+        max_clauses: Largest normal form to produce; trees needing more
+            clauses are returned in the plain canonical form
+        cache: Cache used when parsing a predicate string
+
+    Returns:
+        The canonical tree
+
+    Raises:
+        ValueError: If the tree contains an unsupported or childless node, or
+            ``form`` is unknown
+    """
+    root = _canonical(_parse(tree, cache))
+    if form is not None:
+        root = _normal_form(root, form, max_clauses) or root
+    return root.node
+
+
+def to_normal_form(
+    tree: Union[Node, str],
+    form: str = "dnf",
+    max_clauses: int = 256,
+    cache: Optional[PredicateCache] = default_cache,
+) -> Optional[Node]:
+    """
+    Expand a tree into canonical disjunctive or conjunctive normal form.
+
+    Args:
+        tree: The root node of the Boolean syntax tree, or a predicate string
+        form: ``"dnf"`` (an OR of ANDs) or ``"cnf"`` (an AND of ORs)
+        max_clauses: Largest number of clauses to produce
+        cache: Cache used when parsing a predicate string
+
+    Returns:
+        The normal form, or None if it would need more than ``max_clauses`` clauses
+
+    Raises:
+        ValueError: If the tree contains an unsupported or childless node, or
+            ``form`` is unknown
+    """
+    root = _normal_form(_canonical(_parse(tree, cache)), form, max_clauses)
+    return root.node if root is not None else None
+
+
+def canonical_key(
+    tree: Union[Node, str],
+    form: Optional[str] = None,
+    max_clauses: int = 256,
+    cache: Optional[PredicateCache] = default_cache,
+) -> str:
+    """
+    Return a digest identifying the canonical form of a tree.
+
+    Trees with equal canonical forms have equal keys, so the key can index
+    rules for deduplication. Keys are stable across processes and versions of
+    Python. Arguments are as for ``canonicalize``.
+    """
+    root = _canonical(_parse(tree, cache))
+    if form is not None:
+        root = _normal_form(root, form, max_clauses) or root
+    return root.digest.hex()
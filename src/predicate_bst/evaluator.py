@@ -0,0 +1,304 @@
+"""
+Compiled evaluation of Boolean syntax trees against Python mappings.
+
+``compile_predicate`` turns a tree into a plain Python callable. It uses the
+conditions parsed when the tree was built, with literals already converted, and comparisons
+are bound to ``operator`` functions; the tree structure itself is emitted as a
+single short-circuiting ``and``/``or`` lambda, so evaluating a record neither
+walks ``Node.children`` nor re-parses condition strings.
+
+Comparison semantics follow Polars' handling of missing data: a condition on
+a field that is absent or None is false, except ``== null`` (true) and
+``!= null`` (false). Comparisons between incompatible types are false.
+Nested paths (``@.a.b``, ``@.items[0].id``) follow mappings and list
+indexes; a path that leads through anything else is a missing field.
+Membership conditions (``in``/``not in``) look the value up in the frozenset
+of their literals, so each costs one hash lookup however long the list.
+"""
+
+import operator
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from .cache import PredicateCache, default_cache
+from .parser import MEMBERSHIP_OPS, ComparisonOp, Condition, FieldPath, Node, NodeType, build_boolean_syntax_tree
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .optimize import SelectivityStats
+
+
+Predicate = Callable[[Mapping[str, Any]], bool]
+
+_OPERATORS = {
+    ComparisonOp.EQ: operator.eq,
+    ComparisonOp.NE: operator.ne,
+    ComparisonOp.GT: operator.gt,
+    ComparisonOp.GE: operator.ge,
+    ComparisonOp.LT: operator.lt,
+    ComparisonOp.LE: operator.le,
+}
+
+# Python's parser rejects deeply nested parentheses, so deeper subtrees are compiled to jump tables.
+_MAX_CODEGEN_DEPTH = 50
+
+
+def _path_getter(path: FieldPath) -> Callable[[Mapping[str, Any]], Any]:
+    """Return a callable looking up a field path in a record, giving None where the path breaks off."""
+    first, steps = path[0], path[1:]
+
+    def lookup(record: Mapping[str, Any]) -> Any:
+        value = record.get(first)
+        for step in steps:
+            if isinstance(step, int):
+                if not isinstance(value, list) or not -len(value) <= step < len(value):
+                    return None
+                value = value[step]
+            else:
+                try:
+                    value = value.get(step)
+                except AttributeError:  # not a mapping
+                    return None
+        return value
+
+    return lookup
+
+
+def _compile_condition(condition: Condition) -> Predicate:
+    """Compile a single parsed condition into a callable."""
+    if len(condition.path) > 1:
+        # Flat fields keep their own closures below, saving a call per record
+        lookup = _path_getter(condition.path)
+        test = _compile_value_test(condition)
+        return lambda record: test(lookup(record))
+
+    field, op, value = condition.field, condition.op, condition.value
+
+    if value is None:
+        if op == ComparisonOp.EQ:
+            return lambda record: record.get(field) is None
+        if op == ComparisonOp.NE:
+            return lambda record: record.get(field) is not None
+        raise ValueError(f"Cannot compare null with '{op.value}' in condition: {condition}")
+
+    if op in MEMBERSHIP_OPS:
+        return _compile_membership(field, value, op == ComparisonOp.IN)
+
+    compare = _OPERATORS[op]
+
+    def condition_predicate(record: Mapping[str, Any]) -> bool:
+        actual = record.get(field)
+        if actual is None:
+            return False
+        try:
+            return compare(actual, value)
+        except TypeError:
+            return False
+
+    return condition_predicate
+
+
+def _compile_value_test(condition: Condition) -> Callable[[Any], bool]:
+    """Compile a condition into a callable testing an already looked-up value."""
+    op, value = condition.op, condition.value
+
+    if value is None:
+        if op == ComparisonOp.EQ:
+            return lambda actual: actual is None
+        if op == ComparisonOp.NE:
+            return lambda actual: actual is not None
+        raise ValueError(f"Cannot compare null with '{op.value}' in condition: {condition}")
+
+    if op in MEMBERSHIP_OPS:
+        include = op == ComparisonOp.IN
+
+        def membership_test(actual: Any) -> bool:
+            if actual is None:
+                return False
+            try:
+                return (actual in value) == include
+            except TypeError:
+                # Unhashable values (lists, dicts) equal no literal
+                return not include
+
+        return membership_test
+
+    compare = _OPERATORS[op]
+
+    def value_test(actual: Any) -> bool:
+        if actual is None:
+            return False
+        try:
+            return compare(actual, value)
+        except TypeError:
+            return False
+
+    return value_test
+
+
+def _compile_membership(field: str, values: frozenset, include: bool) -> Predicate:
+    if include:
+        def in_predicate(record: Mapping[str, Any]) -> bool:
+            actual = record.get(field)
+            if actual is None:
+                return False
+            try:
+                return actual in values
+            except TypeError:
+                # Unhashable values (lists, dicts) equal no literal
+                return False
+
+        return in_predicate
+
+    def not_in_predicate(record: Mapping[str, Any]) -> bool:
+        actual = record.get(field)
+        if actual is None:
+            return False
+        try:
+            return actual not in values
+        except TypeError:
+            return True
+
+    return not_in_predicate
+
+
+# Compiles one condition; replaced to instrument leaves (see ``compile_predicate``'s ``stats``).
+CompileLeaf = Callable[[Condition], Predicate]
+
+
+def _flatten(tree: Node) -> List[Node]:
+    """Return the operands of ``tree``, merging nested nodes of the same type."""
+    operands = []
+    pending = list(reversed(tree.children))
+    while pending:
+        child = pending.pop()
+        if child.type == tree.type:
+            pending.extend(reversed(child.children))
+        else:
+            operands.append(child)
+    return operands
+
+
+def _emit(tree: Node, leaves: List[Predicate], depth: int, compile_leaf: CompileLeaf) -> str:
+    """Emit Python source for ``tree``, registering compiled conditions in ``leaves``."""
+    if tree.type == NodeType.CONDITION:
+        leaves.append(compile_leaf(tree.condition))
+        return f"_c{len(leaves) - 1}(r)"
+
+    if tree.type in (NodeType.AND, NodeType.OR):
+        if not tree.children:
+            raise ValueError(f"{tree.type.value} node has no children")
+        if depth >= _MAX_CODEGEN_DEPTH:
+            leaves.append(_compile_program(tree, compile_leaf))
+            return f"_c{len(leaves) - 1}(r)"
+
+        joiner = " and " if tree.type == NodeType.AND else " or "
+        return "(" + joiner.join(_emit(child, leaves, depth + 1, compile_leaf) for child in _flatten(tree)) + ")"
+
+    raise ValueError(f"Unsupported node type: {tree.type}")
+
+
+# Jump targets that end evaluation of a compiled program.
+_TRUE = -1
+_FALSE = -2
+
+
+def _compile_program(tree: Node, compile_leaf: CompileLeaf) -> Predicate:
+    """
+    Compile ``tree`` into a flat short-circuit jump table (used for trees too deep for code generation).
+
+    Every condition becomes one instruction ``(condition, on_true, on_false)`` whose targets
+    are the index of the next condition to test, or ``_TRUE``/``_FALSE`` once the outcome is
+    known. Both compilation and evaluation are iterative, so nesting depth is unbounded.
+    """
+    instructions: List[List[Any]] = []
+    # Jumps to a later sibling point at a label (a one-element list) that is filled in
+    # with the sibling's first instruction once the sibling is reached.
+    pending: List[Tuple[Node, Any, Any, Optional[List[int]]]] = [(tree, _TRUE, _FALSE, None)]
+    while pending:
+        node, on_true, on_false, label = pending.pop()
+        if label is not None:
+            label[0] = len(instructions)
+
+        if node.type == NodeType.CONDITION:
+            instructions.append([compile_leaf(node.condition), on_true, on_false])
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+
+        # Under AND a true child falls through to the next sibling; under OR a false one does.
+        children = _flatten(node)
+        next_label = None
+        for i in range(len(children) - 1, -1, -1):
+            label = [_FALSE] if i else None
+            if next_label is None:
+                pending.append((children[i], on_true, on_false, label))
+            elif node.type == NodeType.AND:
+                pending.append((children[i], next_label, on_false, label))
+            else:
+                pending.append((children[i], on_true, next_label, label))
+            next_label = label
+
+    program = tuple(
+        (condition, on_true if isinstance(on_true, int) else on_true[0],
+         on_false if isinstance(on_false, int) else on_false[0])
+        for condition, on_true, on_false in instructions
+    )
+
+    def run_program(record: Mapping[str, Any]) -> bool:
+        position = 0
+        while position >= 0:
+            condition, on_true, on_false = program[position]
+            position = on_true if condition(record) else on_false
+        return position == _TRUE
+
+    return run_program
+
+
+def _compile_tree(tree: Node, compile_leaf: CompileLeaf = _compile_condition) -> Predicate:
+    leaves: List[Predicate] = []
+    source = _emit(tree, leaves, 0, compile_leaf)
+    namespace: Dict[str, Any] = {f"_c{i}": leaf for i, leaf in enumerate(leaves)}
+    return eval(compile(f"lambda r: {source}", "<predicate>", "eval"), namespace)
+
+
+def compile_predicate(
+    tree: Union[Node, str],
+    cache: Optional[PredicateCache] = default_cache,
+    stats: Optional["SelectivityStats"] = None,
+) -> Predicate:
+    """
+    Compile a Boolean syntax tree into a callable that evaluates records.
+
+    Examples:
+        >>> is_match = compile_predicate('@.price > 100 && @.category == "books"')
+        >>> is_match({"price": 120.5, "category": "books"})
+        True
+
+    Args:
+        tree: The root node of the Boolean syntax tree, or a predicate string
+        cache: Cache used to memoize compilation of predicate strings, or None
+            to disable caching. Trees are always compiled afresh.
+        stats: If given, every condition counts its evaluations and passes in
+            this ``SelectivityStats`` (see ``predicate_bst.optimize``). The
+            result is slower and is never cached.
+
+    Returns:
+        A callable taking a mapping and returning whether it satisfies the predicate
+
+    Raises:
+        ValueError: If the tree contains an unsupported condition or node
+    """
+    if stats is not None:
+        if isinstance(tree, str):
+            tree = build_boolean_syntax_tree(tree, cache=cache)
+        return _compile_tree(tree, lambda condition: stats.observe(condition, _compile_condition(condition)))
+    if not isinstance(tree, str):
+        return _compile_tree(tree)
+
+    def compute(expression: str) -> Predicate:
+        return _compile_tree(build_boolean_syntax_tree(expression))
+
+    if cache is not None:
+        return cache.get_or_compute("predicate", tree, compute)
+    return compute(tree)
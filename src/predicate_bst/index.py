@@ -0,0 +1,525 @@
+"""
+Matching one record against many registered predicates.
+
+``PredicateIndex`` registers Boolean syntax trees by id. Each predicate is
+reduced to a set of *access keys* -- conditions at least one of which must hold
+for the predicate to be true -- and a lookup only evaluates predicates whose
+access keys are satisfied by the record, plus those that cannot be indexed.
+
+Equality keys (``@.field == literal``) are stored in hash tables keyed by field
+and value. Range keys (``>``, ``>=``, ``<``, ``<=`` on numbers, with ranges on
+the same field within an AND merged into one interval) are stored in a
+per-field ``IntervalIndex``, which finds the intervals containing a value in
+O(log n + k) time.
+"""
+
+from collections import namedtuple
+from typing import Any, Dict, FrozenSet, Hashable, List, Mapping, Optional, Set, Tuple, Union
+
+from .evaluator import Predicate, compile_predicate
+from .parser import RANGE_OPS, ComparisonOp, Condition, Node, NodeType, build_boolean_syntax_tree
+
+
+MatchStats = namedtuple("MatchStats", ["registered", "candidates", "pruned", "matched"])
+
+_NEGATIVE_INFINITY = float("-inf")
+_POSITIVE_INFINITY = float("inf")
+
+
+class Interval(namedtuple("Interval", ["low", "high", "low_inclusive", "high_inclusive"])):
+    """A numeric interval; unbounded ends are represented by infinities."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_condition(cls, condition: Condition) -> "Interval":
+        """Return the interval of values satisfying a range condition."""
+        value = condition.value
+        if condition.op == ComparisonOp.GT:
+            return cls(value, _POSITIVE_INFINITY, False, False)
+        if condition.op == ComparisonOp.GE:
+            return cls(value, _POSITIVE_INFINITY, True, False)
+        if condition.op == ComparisonOp.LT:
+            return cls(_NEGATIVE_INFINITY, value, False, False)
+        if condition.op == ComparisonOp.LE:
+            return cls(_NEGATIVE_INFINITY, value, False, True)
+        raise ValueError(f"Not a range condition: {condition}")
+
+    def intersect(self, other: "Interval") -> "Interval":
+        """Return the intersection of two intervals (which may be empty)."""
+        if self.low > other.low:
+            low, low_inclusive = self.low, self.low_inclusive
+        elif self.low < other.low:
+            low, low_inclusive = other.low, other.low_inclusive
+        else:
+            low, low_inclusive = self.low, self.low_inclusive and other.low_inclusive
+        if self.high < other.high:
+            high, high_inclusive = self.high, self.high_inclusive
+        elif self.high > other.high:
+            high, high_inclusive = other.high, other.high_inclusive
+        else:
+            high, high_inclusive = self.high, self.high_inclusive and other.high_inclusive
+        return Interval(low, high, low_inclusive, high_inclusive)
+
+    @property
+    def empty(self) -> bool:
+        """Whether no value lies in the interval."""
+        if self.low == self.high:
+            return not (self.low_inclusive and self.high_inclusive)
+        return self.low > self.high
+
+    def __contains__(self, value: Any) -> bool:
+        if value < self.low or (value == self.low and not self.low_inclusive):
+            return False
+        return value < self.high or (value == self.high and self.high_inclusive)
+
+
+class _IntervalNode:
+    """Node of a centered interval tree."""
+
+    __slots__ = ("center", "by_low", "by_high", "left", "right")
+
+    def __init__(self, center: float):
+        self.center = center
+        self.by_low: List[Tuple[Interval, Hashable]] = []
+        self.by_high: List[Tuple[Interval, Hashable]] = []
+        self.left: Optional["_IntervalNode"] = None
+        self.right: Optional["_IntervalNode"] = None
+
+
+def _bisect(items: List[Tuple[Interval, Hashable]], value: Any, position: int, descending: bool) -> int:
+    """Return the first index whose interval end at ``position`` comes after ``value`` in the list's order."""
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        point = items[middle][0][position]
+        if (point < value) if descending else (point > value):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _insort(items: List[Tuple[Interval, Hashable]], item: Tuple[Interval, Hashable], position: int,
+            descending: bool) -> None:
+    """Insert ``item`` into a list sorted by one interval end, after items with the same end."""
+    items.insert(_bisect(items, item[0][position], position, descending), item)
+
+
+def _position(items: List[Tuple[Interval, Hashable]], interval: Interval, key: Hashable, position: int,
+              descending: bool) -> int:
+    """Return the index of the item stored under ``key`` in a list sorted by one interval end."""
+    index = _bisect(items, interval[position], position, descending)
+    while True:
+        index -= 1
+        if items[index][1] == key:
+            return index
+
+
+class IntervalIndex:
+    """
+    Stabbing-query index over numeric intervals (a centered interval tree).
+
+    Intervals can be added and removed at any time. Each change updates the
+    tree in place in O(log n + k) time, where k is the number of intervals
+    stored at the node it lands on; once the changes since the last build
+    outnumber the intervals it held, the tree is rebuilt on the next query to
+    restore its balance, so rebuilds cost O(log n) per change amortized. A
+    query returns the keys of all intervals containing a value in
+    O(log n + k) time.
+    """
+
+    def __init__(self):
+        self._intervals: Dict[Hashable, Interval] = {}
+        self._root: Optional[_IntervalNode] = None
+        self._dirty = False
+        self._changes = 0
+        self._built_size = 0
+
+    def add(self, key: Hashable, interval: Interval) -> None:
+        """Add (or replace) the interval stored under ``key``."""
+        previous = self._intervals.get(key)
+        self._intervals[key] = interval
+        if self._track_change():
+            if previous is not None:
+                self._unplace(previous, key)
+            self._place(interval, key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove the interval stored under ``key``; raises KeyError if absent."""
+        interval = self._intervals.pop(key)
+        if self._track_change():
+            self._unplace(interval, key)
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def _track_change(self) -> bool:
+        """Count a change; return whether to apply it to the tree rather than rebuild later."""
+        if self._dirty:
+            return False
+        self._changes += 1
+        if self._changes > max(self._built_size, 32):
+            self._dirty = True
+            return False
+        return True
+
+    def _place(self, interval: Interval, key: Hashable) -> None:
+        if interval.empty:
+            return
+        item = (interval, key)
+        parent, side, node = None, "", self._root
+        while node is not None:
+            if interval.high < node.center:
+                parent, side, node = node, "left", node.left
+            elif interval.low > node.center:
+                parent, side, node = node, "right", node.right
+            else:
+                _insort(node.by_low, item, 0, False)
+                _insort(node.by_high, item, 1, True)
+                return
+        # A new leaf centered on the interval, so it holds it
+        if interval.low == _NEGATIVE_INFINITY:
+            center = interval.high
+        elif interval.high == _POSITIVE_INFINITY:
+            center = interval.low
+        else:
+            center = (interval.low + interval.high) / 2
+        node = _IntervalNode(center)
+        node.by_low.append(item)
+        node.by_high.append(item)
+        if parent is None:
+            self._root = node
+        else:
+            setattr(parent, side, node)
+
+    def _unplace(self, interval: Interval, key: Hashable) -> None:
+        if interval.empty:
+            return
+        node = self._root
+        while node is not None:
+            if interval.high < node.center:
+                node = node.left
+            elif interval.low > node.center:
+                node = node.right
+            else:
+                # Emptied nodes are kept until the next rebuild
+                del node.by_low[_position(node.by_low, interval, key, 0, False)]
+                del node.by_high[_position(node.by_high, interval, key, 1, True)]
+                return
+
+    def _build(self) -> None:
+        self._dirty = False
+        self._changes = 0
+        self._built_size = len(self._intervals)
+        self._root = None
+        if not self._intervals:
+            return
+        items = [(interval, key) for key, interval in self._intervals.items() if not interval.empty]
+        # Explicit stack of (parent, side, intervals) still to place
+        pending: List[Tuple[Optional[_IntervalNode], str, List[Tuple[Interval, Hashable]]]] = [(None, "", items)]
+        while pending:
+            parent, side, group = pending.pop()
+            if not group:
+                continue
+            # Median of the finite endpoints keeps the tree balanced
+            endpoints = sorted(
+                point for interval, _ in group for point in (interval.low, interval.high)
+                if point not in (_NEGATIVE_INFINITY, _POSITIVE_INFINITY)
+            )
+            node = _IntervalNode(endpoints[len(endpoints) // 2] if endpoints else 0.0)
+            left, right = [], []
+            for item in group:
+                interval = item[0]
+                if interval.high < node.center:
+                    left.append(item)
+                elif interval.low > node.center:
+                    right.append(item)
+                else:
+                    node.by_low.append(item)
+            node.by_high = sorted(node.by_low, key=lambda item: item[0].high, reverse=True)
+            node.by_low.sort(key=lambda item: item[0].low)
+            if parent is None:
+                self._root = node
+            else:
+                setattr(parent, side, node)
+            pending.append((node, "left", left))
+            pending.append((node, "right", right))
+
+    def stab(self, value: Any) -> Set[Hashable]:
+        """Return the keys of all intervals containing ``value``."""
+        if self._dirty:
+            self._build()
+        result = set()
+        node = self._root
+        while node is not None:
+            if value < node.center:
+                # Every interval here reaches the center, so only the low end matters
+                for interval, key in node.by_low:
+                    if interval.low > value:
+                        break
+                    if value in interval:
+                        result.add(key)
+                node = node.left
+            elif value > node.center:
+                for interval, key in node.by_high:
+                    if interval.high < value:
+                        break
+                    if value in interval:
+                        result.add(key)
+                node = node.right
+            else:
+                result.update(key for interval, key in node.by_low if value in interval)
+                break
+        return result
+
+
+# An access key is ("==", field, value) for equalities or ("range", field, Interval) for ranges.
+AccessKeys = Optional[FrozenSet[Tuple[str, str, Any]]]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+def _condition_keys(condition: Condition) -> AccessKeys:
+    if len(condition.path) > 1:
+        # Records are probed by top-level field only
+        return None
+    if condition.op == ComparisonOp.EQ and condition.value is not None:
+        try:
+            hash(condition.value)
+        except TypeError:
+            return None
+        return frozenset((("==", condition.field, condition.value),))
+    if condition.op == ComparisonOp.IN:
+        # Matching records equal one of the members
+        return frozenset(("==", condition.field, member) for member in condition.value)
+    if condition.op in RANGE_OPS and _is_number(condition.value):
+        return frozenset((("range", condition.field, Interval.from_condition(condition)),))
+    return None
+
+
+def _merged_range_keys(children: List[Node]) -> Dict[str, FrozenSet[Tuple[str, str, Any]]]:
+    """Intersect the numeric range conditions on each field among the children of an AND."""
+    intervals: Dict[str, Interval] = {}
+    for child in children:
+        if child.type != NodeType.CONDITION:
+            continue
+        condition = child.condition
+        if condition.op in RANGE_OPS and _is_number(condition.value) and len(condition.path) == 1:
+            interval = Interval.from_condition(condition)
+            previous = intervals.get(condition.field)
+            intervals[condition.field] = interval if previous is None else previous.intersect(interval)
+    return {
+        field: frozenset() if interval.empty else frozenset((("range", field, interval),))
+        for field, interval in intervals.items()
+    }
+
+
+def _single_range_field(keys: FrozenSet[Tuple[str, str, Any]]) -> Optional[str]:
+    kind, field, _ = next(iter(keys))
+    return field if kind == "range" else None
+
+
+def _selectivity_rank(keys: FrozenSet[Tuple[str, str, Any]]) -> Tuple[bool, int]:
+    # Prefer hash lookups over interval queries, then fewer keys
+    return (any(kind == "range" for kind, _, _ in keys), len(keys))
+
+
+def access_keys(tree: Node) -> AccessKeys:
+    """
+    Compute conditions of which at least one must hold for ``tree`` to be true.
+
+    A condition contributes itself if it is an equality with a non-null literal
+    or a range comparison with a numeric literal. An AND node needs only one of
+    its children to be indexable -- range conditions on the same field are first
+    merged into one interval -- and prefers equality keys, then the fewest keys;
+    an OR node is indexable only if all of its children are, and uses the union
+    of their keys.
+
+    Args:
+        tree: The root node of the Boolean syntax tree
+
+    Returns:
+        A frozenset of ``("==", field, value)`` and ``("range", field, Interval)``
+        keys, or None if the tree cannot be indexed. An empty set means the tree
+        can never be true.
+
+    Raises:
+        ValueError: If the tree contains an unsupported condition or node
+    """
+    results: List[AccessKeys] = []
+    pending: List[Tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if node.type == NodeType.CONDITION:
+            results.append(_condition_keys(node.condition))
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((child, False) for child in node.children)
+            continue
+
+        child_keys = results[len(results) - len(node.children):]
+        del results[len(results) - len(node.children):]
+        if node.type == NodeType.AND:
+            merged = _merged_range_keys(node.children)
+            # A merged interval is at least as tight as any single range on its field
+            indexable = [
+                keys for keys in child_keys
+                if keys is not None and not (len(keys) == 1 and _single_range_field(keys) in merged)
+            ]
+            indexable.extend(merged.values())
+            results.append(min(indexable, key=_selectivity_rank) if indexable else None)
+        elif any(keys is None for keys in child_keys):
+            results.append(None)
+        else:
+            results.append(frozenset().union(*child_keys))
+
+    return results[0]
+
+
+class PredicateIndex:
+    """
+    Index of registered predicates for matching records against all of them at once.
+
+    Examples:
+        >>> index = PredicateIndex()
+        >>> index.add("books", '@.category == "books" && @.price < 20')
+        >>> index.add("music", '@.category == "music"')
+        >>> index.match({"category": "books", "price": 12.5})
+        ['books']
+    """
+
+    def __init__(self):
+        self._predicates: Dict[Hashable, Predicate] = {}
+        self._keys: Dict[Hashable, AccessKeys] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._sequence = 0
+        # field -> literal -> ids of predicates with that access key
+        self._equality: Dict[str, Dict[Any, Set[Hashable]]] = {}
+        # field -> interval index over (field, interval) keys, and those keys -> predicate ids
+        self._ranges: Dict[str, IntervalIndex] = {}
+        self._range_ids: Dict[Tuple[str, Interval], Set[Hashable]] = {}
+        self._unindexed: Set[Hashable] = set()
+
+    def add(self, predicate_id: Hashable, tree: Union[Node, str]) -> None:
+        """
+        Register a predicate, replacing any predicate registered under the same id.
+
+        Args:
+            predicate_id: Identifier returned by ``match`` when the predicate matches
+            tree: The root node of the Boolean syntax tree, or a predicate string
+
+        Raises:
+            ValueError: If the predicate is invalid or contains unsupported conditions
+        """
+        if isinstance(tree, str):
+            tree = build_boolean_syntax_tree(tree)
+        predicate = compile_predicate(tree)
+        keys = access_keys(tree)
+
+        if predicate_id in self._predicates:
+            self.remove(predicate_id)
+        self._predicates[predicate_id] = predicate
+        self._keys[predicate_id] = keys
+        self._order[predicate_id] = self._sequence
+        self._sequence += 1
+
+        if keys is None:
+            self._unindexed.add(predicate_id)
+            return
+        for kind, field, value in keys:
+            if kind == "==":
+                self._equality.setdefault(field, {}).setdefault(value, set()).add(predicate_id)
+                continue
+            ids = self._range_ids.get((field, value))
+            if ids is None:
+                ids = self._range_ids[(field, value)] = set()
+                self._ranges.setdefault(field, IntervalIndex()).add((field, value), value)
+            ids.add(predicate_id)
+
+    def remove(self, predicate_id: Hashable) -> None:
+        """
+        Unregister a predicate.
+
+        Raises:
+            KeyError: If no predicate is registered under ``predicate_id``
+        """
+        del self._predicates[predicate_id]
+        del self._order[predicate_id]
+        keys = self._keys.pop(predicate_id)
+        if keys is None:
+            self._unindexed.discard(predicate_id)
+            return
+        for kind, field, value in keys:
+            if kind == "==":
+                by_value = self._equality[field]
+                ids = by_value[value]
+                ids.discard(predicate_id)
+                if not ids:
+                    del by_value[value]
+                    if not by_value:
+                        del self._equality[field]
+                continue
+            ids = self._range_ids[(field, value)]
+            ids.discard(predicate_id)
+            if not ids:
+                del self._range_ids[(field, value)]
+                intervals = self._ranges[field]
+                intervals.remove((field, value))
+                if not len(intervals):
+                    del self._ranges[field]
+
+    def candidates(self, record: Mapping[str, Any]) -> Set[Hashable]:
+        """Return the ids of predicates that could match ``record`` and need evaluating."""
+        result = set(self._unindexed)
+        for field, by_value in self._equality.items():
+            value = record.get(field)
+            if value is None:
+                continue
+            try:
+                ids = by_value.get(value)
+            except TypeError:  # unhashable record value
+                continue
+            if ids:
+                result.update(ids)
+        for field, intervals in self._ranges.items():
+            value = record.get(field)
+            # Like the evaluator, compare booleans as the numbers 0 and 1; NaN is in no range
+            if not isinstance(value, (int, float)) or value != value:
+                continue
+            for key in intervals.stab(value):
+                result.update(self._range_ids[key])
+        return result
+
+    def match_with_stats(self, record: Mapping[str, Any]) -> Tuple[List[Hashable], MatchStats]:
+        """
+        Return the ids of matching predicates with pruning statistics.
+
+        Returns:
+            The matching ids in registration order, and a ``MatchStats`` with the
+            number of registered predicates, candidates evaluated, predicates
+            pruned without evaluation and matches
+        """
+        candidates = self.candidates(record)
+        predicates = self._predicates
+        matches = [predicate_id for predicate_id in candidates if predicates[predicate_id](record)]
+        matches.sort(key=self._order.__getitem__)
+        stats = MatchStats(len(predicates), len(candidates), len(predicates) - len(candidates), len(matches))
+        return matches, stats
+
+    def match(self, record: Mapping[str, Any]) -> List[Hashable]:
+        """Return the ids of all registered predicates matching ``record``, in registration order."""
+        return self.match_with_stats(record)[0]
+
+    def __len__(self) -> int:
+        return len(self._predicates)
+
+    def __contains__(self, predicate_id: Hashable) -> bool:
+        return predicate_id in self._predicates
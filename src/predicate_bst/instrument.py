@@ -0,0 +1,248 @@
+"""
+Opt-in instrumentation of the parse and convert pipeline.
+
+Nothing is measured until a collector is installed with ``set_collector`` (or
+the ``collecting`` context manager); until then ``build_boolean_syntax_tree``
+and ``convert_to_polars`` pay for a single global lookup. With a collector
+installed, every call reports one ``Measurement``: total and per-phase wall
+time, token and node counts and depth of the tree it built (trees from the
+cache are not walked), whether the cache was hit, and the error type if the
+call failed.
+
+A collector is any callable taking a ``Measurement``, so it can forward to a
+metrics exporter directly. ``InMemoryCollector`` aggregates measurements into
+counters and log-scale histograms. Collectors are called on the calling
+thread and must be thread-safe if predicates are parsed concurrently;
+exceptions raised by a collector propagate to the caller.
+"""
+
+from bisect import bisect_left
+from collections import namedtuple
+from contextlib import contextmanager
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+
+Measurement = namedtuple(
+    "Measurement",
+    ["operation", "seconds", "phases", "tokens", "nodes", "depth", "cache_hit", "error"],
+)
+Measurement.__doc__ = """\
+One instrumented call.
+
+Attributes:
+    operation: ``"build_boolean_syntax_tree"`` or ``"convert_to_polars"``
+    seconds: Total wall time of the call
+    phases: Wall time per phase (``"tokenize"``, ``"parse"``, ``"codegen"``) that
+        actually ran; empty on a cache hit
+    tokens: Number of tokens, or None if the expression was not tokenized
+    nodes: Number of tree nodes, or None if the call built no tree (such as on
+        a cache hit)
+    depth: Depth of the tree (a single condition has depth 1), or None likewise
+    cache_hit: Whether the result came from the cache, or None without a cache
+    error: Name of the exception type if the call failed, else None
+"""
+
+Collector = Callable[[Measurement], Any]
+
+_collector: Optional[Collector] = None
+
+
+def set_collector(collector: Optional[Collector]) -> Optional[Collector]:
+    """
+    Install a collector for all subsequent calls, or None to disable instrumentation.
+
+    Args:
+        collector: A callable receiving each ``Measurement``, or None
+
+    Returns:
+        The previously installed collector
+    """
+    global _collector
+    previous = _collector
+    _collector = collector
+    return previous
+
+
+def get_collector() -> Optional[Collector]:
+    """Return the installed collector, or None if instrumentation is disabled."""
+    return _collector
+
+
+@contextmanager
+def collecting(collector: Collector) -> Iterator[Collector]:
+    """Install ``collector`` for the duration of a ``with`` block."""
+    previous = set_collector(collector)
+    try:
+        yield collector
+    finally:
+        set_collector(previous)
+
+
+def tree_shape(tree: Any) -> Tuple[int, int]:
+    """Return the number of nodes and the depth of a tree."""
+    nodes = depth = 0
+    pending = [(tree, 1)]
+    while pending:
+        node, level = pending.pop()
+        nodes += 1
+        depth = max(depth, level)
+        pending.extend((child, level + 1) for child in node.children)
+    return nodes, depth
+
+
+# Bucket upper bounds: doubling from 1 microsecond (up to ~17 minutes) and from 1 (up to ~16 million).
+TIME_BUCKETS = tuple(1e-6 * 2 ** i for i in range(30))
+COUNT_BUCKETS = tuple(float(2 ** i) for i in range(25))
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+
+    ``buckets[i]`` counts values ``<= bounds[i]`` (and above the previous bound);
+    the last entry counts values above every bound.
+    """
+
+    __slots__ = ("bounds", "buckets", "count", "total", "min", "max")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        """Add one value."""
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return an upper bound for the ``q`` quantile (0 <= q <= 1), from the bucket bounds."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if bucket and seen >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def copy(self) -> "Histogram":
+        """Return an independent copy of the histogram."""
+        histogram = Histogram(self.bounds)
+        histogram.buckets = list(self.buckets)
+        histogram.count, histogram.total = self.count, self.total
+        histogram.min, histogram.max = self.min, self.max
+        return histogram
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "buckets": list(zip(self.bounds + (float("inf"),), self.buckets)),
+        }
+
+
+class InMemoryCollector:
+    """
+    Thread-safe collector aggregating measurements per operation.
+
+    For each operation it keeps call, error, cache-hit and cache-miss counters
+    and histograms of total time, time per phase, tokens, nodes and depth.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, Any]] = {}
+
+    def _stats(self, operation: str) -> Dict[str, Any]:
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = {
+                "calls": 0,
+                "errors": {},
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "seconds": Histogram(TIME_BUCKETS),
+                "phases": {},
+                "tokens": Histogram(COUNT_BUCKETS),
+                "nodes": Histogram(COUNT_BUCKETS),
+                "depth": Histogram(COUNT_BUCKETS),
+            }
+        return stats
+
+    def __call__(self, measurement: Measurement) -> None:
+        with self._lock:
+            stats = self._stats(measurement.operation)
+            stats["calls"] += 1
+            if measurement.error is not None:
+                stats["errors"][measurement.error] = stats["errors"].get(measurement.error, 0) + 1
+            if measurement.cache_hit is not None:
+                stats["cache_hits" if measurement.cache_hit else "cache_misses"] += 1
+            stats["seconds"].observe(measurement.seconds)
+            for phase, seconds in measurement.phases.items():
+                histogram = stats["phases"].get(phase)
+                if histogram is None:
+                    histogram = stats["phases"][phase] = Histogram(TIME_BUCKETS)
+                histogram.observe(seconds)
+            for name in ("tokens", "nodes", "depth"):
+                value = getattr(measurement, name)
+                if value is not None:
+                    stats[name].observe(value)
+
+    def histogram(self, operation: str, metric: str, phase: Optional[str] = None) -> Optional[Histogram]:
+        """
+        Return a copy of a histogram, or None if nothing was recorded for it.
+
+        The copy does not change as measurements arrive, so it can be read
+        without holding the collector's lock.
+
+        Args:
+            operation: The instrumented operation
+            metric: ``"seconds"``, ``"tokens"``, ``"nodes"``, ``"depth"`` or ``"phases"``
+            phase: The phase name when ``metric`` is ``"phases"``
+        """
+        with self._lock:
+            stats = self._operations.get(operation)
+            if stats is None:
+                return None
+            histogram = stats["phases"].get(phase) if metric == "phases" else stats[metric]
+            return None if histogram is None else histogram.copy()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return all counters and histograms as plain dictionaries."""
+        with self._lock:
+            return {
+                operation: {
+                    "calls": stats["calls"],
+                    "errors": dict(stats["errors"]),
+                    "cache_hits": stats["cache_hits"],
+                    "cache_misses": stats["cache_misses"],
+                    "seconds": stats["seconds"].to_dict(),
+                    "phases": {phase: histogram.to_dict() for phase, histogram in stats["phases"].items()},
+                    "tokens": stats["tokens"].to_dict(),
+                    "nodes": stats["nodes"].to_dict(),
+                    "depth": stats["depth"].to_dict(),
+                }
+                for operation, stats in self._operations.items()
+            }
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        with self._lock:
+            self._operations.clear()
@@ -0,0 +1,289 @@
+"""
+Cost- and selectivity-based reordering of AND/OR children.
+
+Short-circuit evaluation is cheapest when an AND tests first the children that
+are cheap and likely to be false, and an OR those that are cheap and likely to
+be true. ``optimize`` returns a copy of a tree with the children of every node
+sorted by that rank (``cost / (1 - p)`` under AND, ``cost / p`` under OR, where
+``p`` is the probability of being true). Conditions have no side effects and
+AND/OR are commutative under Kleene logic, so reordering never changes results.
+
+Costs and probabilities start from static heuristics -- null checks before
+equality, equality before range comparisons, range comparisons before string
+ordering -- and are replaced by pass rates observed at runtime once a
+``SelectivityStats`` has seen a condition often enough. ``AdaptivePredicate``
+ties the two together: it collects statistics while evaluating records and can
+be re-optimized in place once enough have been gathered.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .cache import PredicateCache, default_cache
+from .evaluator import Predicate, compile_predicate
+from .parser import MEMBERSHIP_OPS, RANGE_OPS, ComparisonOp, Condition, Node, NodeType, build_boolean_syntax_tree
+
+
+# Static estimates: (relative cost, probability of being true)
+_NULL_CHECK = (0.5, 0.1)
+_EQUALITY = (1.0, 0.1)
+_STRING_EQUALITY = (1.5, 0.1)
+_RANGE = (2.0, 1 / 3)
+_STRING_RANGE = (3.0, 1 / 3)
+_UNKNOWN = (4.0, 0.5)
+_MAX_MEMBERSHIP_PROBABILITY = 0.9
+
+
+class SelectivityStats:
+    """
+    Evaluation and pass counts per condition, gathered by instrumented predicates.
+
+    Conditions are keyed by value, so predicates sharing a ``SelectivityStats``
+    pool their observations of identical conditions. Counters are updated
+    without locking; under concurrent use they are approximate, which is
+    enough for ordering decisions.
+    """
+
+    def __init__(self):
+        # condition -> [evaluations, passes]
+        self._counts: Dict[Condition, List[int]] = {}
+
+    def observe(self, condition: Condition, predicate: Predicate) -> Predicate:
+        """Wrap a compiled condition so that its outcomes are counted."""
+        counts = self._counts.setdefault(condition, [0, 0])
+
+        def observed(record: Mapping[str, Any]) -> bool:
+            result = predicate(record)
+            counts[0] += 1
+            if result:
+                counts[1] += 1
+            return result
+
+        return observed
+
+    def evaluations(self, condition: Condition) -> int:
+        """Return how many times ``condition`` has been evaluated."""
+        counts = self._counts.get(condition)
+        return counts[0] if counts else 0
+
+    def pass_rate(self, condition: Condition) -> Optional[float]:
+        """Return the observed fraction of evaluations that were true, or None if unobserved."""
+        counts = self._counts.get(condition)
+        if not counts or not counts[0]:
+            return None
+        return counts[1] / counts[0]
+
+    def clear(self) -> None:
+        """Reset all counters (instrumented predicates keep counting from zero)."""
+        for counts in self._counts.values():
+            counts[0] = counts[1] = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+def condition_estimate(condition: Condition) -> Tuple[float, float]:
+    """
+    Return the static ``(cost, probability of being true)`` estimate for a condition.
+
+    Args:
+        condition: The parsed condition
+
+    Returns:
+        A tuple of the relative evaluation cost and the estimated pass probability
+    """
+    op, value = condition.op, condition.value
+    if value is None:
+        cost, probability = _NULL_CHECK
+    elif op in RANGE_OPS:
+        cost, probability = _STRING_RANGE if isinstance(value, str) else _RANGE
+    elif op in MEMBERSHIP_OPS:
+        # One set lookup, passing for any of the members
+        cost, probability = _STRING_EQUALITY if isinstance(next(iter(value)), str) else _EQUALITY
+        probability = min(probability * len(value), _MAX_MEMBERSHIP_PROBABILITY)
+    else:
+        cost, probability = _STRING_EQUALITY if isinstance(value, str) else _EQUALITY
+    if op in (ComparisonOp.NE, ComparisonOp.NOT_IN):
+        probability = 1 - probability
+    return cost, probability
+
+
+def _leaf_estimate(node: Node, stats: Optional[SelectivityStats], min_samples: int) -> Tuple[float, float]:
+    try:
+        condition = node.condition
+    except ValueError:
+        return _UNKNOWN
+    cost, probability = condition_estimate(condition)
+    if stats is not None and stats.evaluations(condition) >= min_samples:
+        probability = stats.pass_rate(condition)
+    return cost, probability
+
+
+def _rank(estimate: Tuple[float, float], node_type: NodeType) -> float:
+    cost, probability = estimate
+    # Probability that this child settles the node and stops evaluation
+    decisive = 1 - probability if node_type == NodeType.AND else probability
+    return cost / decisive if decisive > 0 else float("inf")
+
+
+def optimize(tree: Node, stats: Optional[SelectivityStats] = None, min_samples: int = 100) -> Node:
+    """
+    Reorder the children of AND/OR nodes to minimize expected evaluation cost.
+
+    The input tree is not modified (trees may be shared through the cache);
+    leaves are reused and inner nodes copied. Ties keep the original order.
+
+    Examples:
+        >>> tree = build_boolean_syntax_tree('@.price > 100 && @.category == "books"')
+        >>> str(optimize(tree))
+        'AND(Condition(@.category == "books"), Condition(@.price > 100))'
+
+    Args:
+        tree: The root node of the Boolean syntax tree
+        stats: Observed pass rates overriding the static estimates
+        min_samples: Evaluations a condition needs in ``stats`` before its
+            observed pass rate is trusted
+
+    Returns:
+        The reordered tree
+
+    Raises:
+        ValueError: If the tree contains an unsupported node
+    """
+    # Post-order walk; each finished subtree leaves (node, (cost, probability)) in ``results``.
+    results: List[Tuple[Node, Tuple[float, float]]] = []
+    pending: List[Tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if node.type == NodeType.CONDITION:
+            results.append((node, _leaf_estimate(node, stats, min_samples)))
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+            continue
+
+        children = results[len(results) - len(node.children):]
+        del results[len(results) - len(node.children):]
+        children.sort(key=lambda child: _rank(child[1], node.type))
+
+        # Expected cost: each child runs only if all earlier ones failed to settle the node.
+        cost, reached = 0.0, 1.0
+        for _, (child_cost, probability) in children:
+            cost += reached * child_cost
+            reached *= probability if node.type == NodeType.AND else 1 - probability
+        probability = reached if node.type == NodeType.AND else 1 - reached
+
+        optimized = Node(node.type)
+        optimized.children = [child for child, _ in children]
+        results.append((optimized, (cost, probability)))
+
+    return results[0][0]
+
+
+class AdaptivePredicate:
+    """
+    A compiled predicate that records selectivity statistics and can reorder itself.
+
+    The tree is first ordered with static estimates. Calling ``reoptimize``
+    once enough records have been evaluated reorders it using the observed pass
+    rates and swaps in a recompiled predicate; callers holding this object
+    (for example through the cache) pick up the new order immediately.
+    """
+
+    def __init__(
+        self,
+        tree: Node,
+        stats: Optional[SelectivityStats] = None,
+        min_samples: int = 1000,
+    ):
+        """
+        Args:
+            tree: The root node of the Boolean syntax tree
+            stats: Statistics to record into, shared between predicates if given
+            min_samples: Records to evaluate before ``reoptimize`` takes effect,
+                and evaluations a condition needs before its pass rate is trusted
+        """
+        self.stats = stats if stats is not None else SelectivityStats()
+        self.min_samples = min_samples
+        self._tree = optimize(tree)
+        self._conditions = self._collect_conditions(self._tree)
+        self._predicate = compile_predicate(self._tree, stats=self.stats)
+
+    @staticmethod
+    def _collect_conditions(tree: Node) -> List[Condition]:
+        conditions = []
+        pending = [tree]
+        while pending:
+            node = pending.pop()
+            if node.type == NodeType.CONDITION:
+                conditions.append(node.condition)
+            else:
+                pending.extend(node.children)
+        return conditions
+
+    @property
+    def tree(self) -> Node:
+        """The tree in its current evaluation order."""
+        return self._tree
+
+    @property
+    def ready(self) -> bool:
+        """Whether enough records have been evaluated for ``reoptimize`` to take effect."""
+        # The first condition in evaluation order sees every record.
+        return max(self.stats.evaluations(condition) for condition in self._conditions) >= self.min_samples
+
+    def reoptimize(self, force: bool = False) -> bool:
+        """
+        Reorder the tree using the collected statistics.
+
+        Args:
+            force: Reoptimize even if fewer than ``min_samples`` records were evaluated
+
+        Returns:
+            True if the evaluation order changed
+        """
+        if not (force or self.ready):
+            return False
+        tree = optimize(self._tree, self.stats, self.min_samples)
+        if tree.to_dict() == self._tree.to_dict():
+            return False
+        self._tree = tree
+        self._predicate = compile_predicate(tree, stats=self.stats)
+        return True
+
+    def __call__(self, record: Mapping[str, Any]) -> bool:
+        return self._predicate(record)
+
+
+def compile_adaptive(
+    expression: str,
+    cache: Optional[PredicateCache] = default_cache,
+) -> AdaptivePredicate:
+    """
+    Compile a predicate string into a (cached) ``AdaptivePredicate``.
+
+    Every caller compiling the same expression through the same cache shares
+    one object, so its statistics pool all evaluations and a ``reoptimize``
+    benefits every caller.
+
+    Args:
+        expression: The logical predicate in string form
+        cache: Cache used to memoize the predicate, or None to disable caching
+
+    Returns:
+        The adaptive predicate
+
+    Raises:
+        ValueError: If the expression is invalid or contains unsupported operations
+    """
+    def compute(text: str) -> AdaptivePredicate:
+        return AdaptivePredicate(build_boolean_syntax_tree(text))
+
+    if cache is not None:
+        return cache.get_or_compute("adaptive", expression, compute)
+    return compute(expression)
@@ -0,0 +1,216 @@
+"""
+Compact, array-backed storage for Boolean syntax trees.
+
+A ``PackedTree`` stores a whole tree in a single ``array.array`` of unsigned
+32-bit integers, three per node, laid out in breadth-first order so that the
+children of every node are contiguous:
+
+* ``AND`` / ``OR`` nodes: ``(type code, index of first child, child count)``
+* ``CONDITION`` nodes: ``(type code, condition index, 0)``
+
+Condition texts are interned in a ``ConditionTable`` that is meant to be
+shared by many trees, so each distinct condition is stored (and parsed) only
+once. ``PackedTree.root`` returns a read-only ``PackedNode`` view with the same
+``type`` / ``value`` / ``children`` / ``condition`` interface as ``Node``, so the
+converters and evaluators accept packed trees directly.
+"""
+
+from array import array
+import sys
+from typing import Dict, List, Optional
+
+from .parser import Condition, Node, NodeType, parse_condition
+
+
+_TYPE_CODES = {
+    NodeType.AND: 0,
+    NodeType.OR: 1,
+    NodeType.CONDITION: 2,
+}
+_NODE_TYPES = {code: node_type for node_type, code in _TYPE_CODES.items()}
+_CONDITION_CODE = _TYPE_CODES[NodeType.CONDITION]
+_FIELDS = 3
+
+
+class ConditionTable:
+    """
+    Interning table mapping condition texts to small integer indices.
+
+    Parsed conditions are cached per index, so trees sharing a table also
+    share the parsed ``Condition`` objects.
+    """
+
+    __slots__ = ("_texts", "_indices", "_conditions")
+
+    def __init__(self):
+        self._texts: List[str] = []
+        self._indices: Dict[str, int] = {}
+        self._conditions: Dict[int, Optional[Condition]] = {}
+
+    def intern(self, text: str) -> int:
+        """Return the index of ``text``, adding it to the table if needed."""
+        try:
+            return self._indices[text]
+        except KeyError:
+            index = len(self._texts)
+            self._texts.append(text)
+            self._indices[text] = index
+            return index
+
+    def text(self, index: int) -> str:
+        """Return the condition text stored at ``index``."""
+        return self._texts[index]
+
+    def condition(self, index: int) -> Optional[Condition]:
+        """Return the parsed condition at ``index``, or None if the text is not a valid condition."""
+        try:
+            return self._conditions[index]
+        except KeyError:
+            try:
+                condition = parse_condition(self._texts[index])
+            except ValueError:
+                condition = None
+            self._conditions[index] = condition
+            return condition
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __getstate__(self):
+        return self._texts
+
+    def __setstate__(self, texts: List[str]) -> None:
+        self._texts = texts
+        self._indices = {text: index for index, text in enumerate(texts)}
+        self._conditions = {}
+
+
+class PackedTree:
+    """A Boolean syntax tree stored in a flat integer array."""
+
+    __slots__ = ("nodes", "table")
+
+    def __init__(self, nodes: array, table: ConditionTable):
+        if nodes.typecode != "I" or len(nodes) % _FIELDS:
+            raise ValueError("Packed node buffer must be an array('I') with three entries per node")
+        self.nodes = nodes
+        self.table = table
+
+    @classmethod
+    def from_node(cls, tree: Node, table: Optional[ConditionTable] = None) -> "PackedTree":
+        """
+        Pack a tree built from ``Node`` objects (or any node view).
+
+        Args:
+            tree: The root node of the Boolean syntax tree
+            table: Condition table to intern condition texts in; share one
+                table between trees to store each distinct condition once
+
+        Returns:
+            The packed tree
+        """
+        if table is None:
+            table = ConditionTable()
+        nodes = array("I")
+        # Breadth-first: the children of each node are queued, and numbered, consecutively.
+        queue = [tree]
+        position = 0
+        while position < len(queue):
+            node = queue[position]
+            position += 1
+            if node.type == NodeType.CONDITION:
+                nodes.extend((_CONDITION_CODE, table.intern(node.value), 0))
+            else:
+                nodes.extend((_TYPE_CODES[node.type], len(queue), len(node.children)))
+                queue.extend(node.children)
+        return cls(nodes, table)
+
+    def to_node(self) -> Node:
+        """Unpack into a tree of ``Node`` objects."""
+        nodes = self.nodes
+        table = self.table
+        result = []
+        for offset in range(0, len(nodes), _FIELDS):
+            code = nodes[offset]
+            if code == _CONDITION_CODE:
+                index = nodes[offset + 1]
+                result.append(Node(NodeType.CONDITION, table.text(index), table.condition(index)))
+            else:
+                result.append(Node(_NODE_TYPES[code]))
+        for i, node in enumerate(result):
+            offset = i * _FIELDS
+            if nodes[offset] != _CONDITION_CODE:
+                first = nodes[offset + 1]
+                node.children = result[first:first + nodes[offset + 2]]
+        return result[0]
+
+    @property
+    def root(self) -> "PackedNode":
+        """A ``Node``-compatible view of the root node."""
+        return PackedNode(self, 0)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by this tree's node buffer (the shared condition table excluded)."""
+        return sys.getsizeof(self.nodes)
+
+    def __len__(self) -> int:
+        return len(self.nodes) // _FIELDS
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackedTree):
+            return NotImplemented
+        return self.root.to_dict() == other.root.to_dict()
+
+    def __getstate__(self):
+        return self.nodes, self.table
+
+    def __setstate__(self, state) -> None:
+        self.nodes, self.table = state
+
+
+class PackedNode:
+    """Read-only ``Node``-compatible view of one node of a ``PackedTree``."""
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: PackedTree, index: int):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def type(self) -> NodeType:
+        return _NODE_TYPES[self.tree.nodes[self.index * _FIELDS]]
+
+    @property
+    def value(self) -> Optional[str]:
+        offset = self.index * _FIELDS
+        if self.tree.nodes[offset] != _CONDITION_CODE:
+            return None
+        return self.tree.table.text(self.tree.nodes[offset + 1])
+
+    @property
+    def children(self) -> List["PackedNode"]:
+        offset = self.index * _FIELDS
+        nodes = self.tree.nodes
+        if nodes[offset] == _CONDITION_CODE:
+            return []
+        first = nodes[offset + 1]
+        return [PackedNode(self.tree, i) for i in range(first, first + nodes[offset + 2])]
+
+    @property
+    def condition(self) -> Condition:
+        """The parsed condition, shared through the tree's condition table."""
+        offset = self.index * _FIELDS
+        nodes = self.tree.nodes
+        if nodes[offset] != _CONDITION_CODE:
+            raise ValueError(f"{self.type.value} node has no condition")
+        condition = self.tree.table.condition(nodes[offset + 1])
+        if condition is None:
+            # Re-parse to raise the descriptive error
+            return parse_condition(self.value)
+        return condition
+
+    __str__ = Node.__str__
+    to_dict = Node.to_dict
+    to_ascii = Node.to_ascii
@@ -6,8 +6,13 @@ parentheses, and conditions into a tree structure.
 """
 
 from enum import Enum
+import json
 import re
-from typing import List, Dict, Any, Optional, Tuple, Union
+import time
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Mapping, Optional, Tuple, Union
+
+from . import instrument
+from .cache import PredicateCache, default_cache
 
 
 class NodeType(Enum):
@@ -17,61 +22,194 @@ class NodeType(Enum):
     CONDITION = "CONDITION"
 
 
+class ComparisonOp(Enum):
+    """Comparison operators supported in conditions."""
+    EQ = "=="
+    NE = "!="
+    GT = ">"
+    GE = ">="
+    LT = "<"
+    LE = "<="
+    IN = "in"
+    NOT_IN = "not in"
+
+
+RANGE_OPS = frozenset((ComparisonOp.GT, ComparisonOp.GE, ComparisonOp.LT, ComparisonOp.LE))
+MEMBERSHIP_OPS = frozenset((ComparisonOp.IN, ComparisonOp.NOT_IN))
+
+# A field path: names of nested fields and integer indexes into lists, e.g. ``("items", 0, "id")``
+FieldPath = Tuple[Union[str, int], ...]
+
+
+class Condition:
+    """
+    A parsed ``@.field op literal`` condition.
+    
+    Attributes:
+        path: The field path, one name per level and an int per list index
+            (e.g. ``("price",)`` or ``("items", 0, "id")``)
+        op: The comparison operator
+        value: The literal as a Python value: str, int, float, bool or None
+            (``null``); for ``in`` and ``not in``, a non-empty frozenset of
+            strings, of numbers or of booleans
+    """
+    __slots__ = ("path", "op", "value")
+    
+    def __init__(self, path: FieldPath, op: ComparisonOp, value: Any):
+        self.path = path
+        self.op = op
+        self.value = value
+    
+    @property
+    def field(self) -> str:
+        """The field path as written in conditions (e.g. ``items[0].id``)."""
+        return format_field_path(self.path)
+    
+    def _key(self) -> Tuple[Any, ...]:
+        # The literal's type is part of the identity so that 1 and true stay distinct
+        kind: Any = type(self.value)
+        if kind is frozenset:
+            kind = _literal_family(next(iter(self.value)))
+        return (self.path, self.op, kind, self.value)
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Condition):
+            return NotImplemented
+        return self._key() == other._key()
+    
+    def __hash__(self) -> int:
+        return hash(self._key())
+    
+    def __repr__(self) -> str:
+        return f"Condition({self.path!r}, {self.op}, {self.value!r})"
+    
+    def __str__(self) -> str:
+        """Canonical condition text, which parses back to an equal condition."""
+        return f"@.{self.field} {self.op.value} {_format_literal(self.value)}"
+
+
 class Node:
     """Represents a node in the Boolean syntax tree."""
-    def __init__(self, node_type: NodeType, value: Optional[str] = None):
+    __slots__ = ("type", "value", "children", "_condition", "_fields")
+    
+    def __init__(self, node_type: NodeType, value: Optional[str] = None, condition: Optional[Condition] = None):
         self.type = node_type
         self.value = value
         self.children = []
+        self._condition = condition
+        self._fields: Optional[Tuple[FieldPath, ...]] = None
+    
+    @property
+    def condition(self) -> Condition:
+        """
+        The parsed form of a CONDITION node's value.
+        
+        Conditions are parsed once (when the tree is built, or on first access
+        for nodes constructed by hand) and cached on the node.
+        
+        Raises:
+            ValueError: If the node is not a condition or its value cannot be parsed
+        """
+        if self._condition is None:
+            if self.type != NodeType.CONDITION:
+                raise ValueError(f"{self.type.value} node has no condition")
+            self._condition = parse_condition(self.value)
+        return self._condition
     
     def __str__(self) -> str:
         """String representation of the node."""
-        if self.type == NodeType.CONDITION:
-            return f"Condition({self.value})"
-        elif self.type == NodeType.AND:
-            return f"AND({', '.join(str(child) for child in self.children)})"
-        elif self.type == NodeType.OR:
-            return f"OR({', '.join(str(child) for child in self.children)})"
-        return ""
+        parts = []
+        # Pending items are either nodes still to render or literal text to emit.
+        pending: List[Union["Node", str]] = [self]
+        while pending:
+            item = pending.pop()
+            if isinstance(item, str):
+                parts.append(item)
+            elif item.type == NodeType.CONDITION:
+                parts.append(f"Condition({item.value})")
+            elif item.type in (NodeType.AND, NodeType.OR):
+                parts.append(f"{item.type.value}(")
+                pending.append(")")
+                for i in range(len(item.children) - 1, -1, -1):
+                    pending.append(item.children[i])
+                    if i:
+                        pending.append(", ")
+        return "".join(parts)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert the node to a dictionary representation."""
-        result = {
-            "type": self.type.value
-        }
-        
-        if self.type == NodeType.CONDITION:
-            result["value"] = self.value
-        else:
-            result["children"] = [child.to_dict() for child in self.children]
+        root: Dict[str, Any] = {}
+        pending = [(self, root)]
+        while pending:
+            node, result = pending.pop()
+            result["type"] = node.type.value
+            
+            if node.type == NodeType.CONDITION:
+                result["value"] = node.value
+            else:
+                children = [{} for _ in node.children]
+                result["children"] = children
+                pending.extend(zip(node.children, children))
         
-        return result
+        return root
+    
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Node":
+        """
+        Build a tree from the dictionary representation produced by ``to_dict``.
+        
+        Args:
+            data: The dictionary representation of the root node
+        
+        Returns:
+            The root node of the rebuilt tree
+        
+        Raises:
+            ValueError: If the dictionary is not a valid tree representation
+        """
+        placeholder = cls(NodeType.AND)
+        pending = [(data, placeholder.children)]
+        while pending:
+            item, siblings = pending.pop()
+            try:
+                node_type = NodeType(item["type"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Invalid node representation: {item!r}") from None
+            if node_type == NodeType.CONDITION:
+                value = item.get("value")
+                if not isinstance(value, str):
+                    raise ValueError(f"Condition node without a string value: {item!r}")
+                siblings.append(_condition_node(value))
+                continue
+            children = item.get("children")
+            if not isinstance(children, list) or not children:
+                raise ValueError(f"{node_type.value} node without children: {item!r}")
+            node = cls(node_type)
+            siblings.append(node)
+            # Children are appended in order as the stack unwinds in reverse
+            pending.extend((child, node.children) for child in reversed(children))
+        return placeholder.children[0]
     
     def to_ascii(self) -> str:
         """Generate an ASCII representation of the tree with this node as root."""
         lines = []
-        self._to_ascii_rec(lines, "", "", "")
-        return "\n".join(lines)
-    
-    def _to_ascii_rec(self, lines: List[str], prefix: str, child_prefix: str, label_prefix: str) -> None:
-        """Recursively build ASCII representation of the tree."""
-        label = str(self.type.value)
-        if self.type == NodeType.CONDITION:
-            label += f": {self.value}"
-        
-        lines.append(f"{prefix}{label_prefix}{label}")
-        
-        for i, child in enumerate(self.children):
-            is_last_child = i == len(self.children) - 1
+        pending = [(self, "", "", "")]
+        while pending:
+            node, prefix, child_prefix, label_prefix = pending.pop()
+            label = str(node.type.value)
+            if node.type == NodeType.CONDITION:
+                label += f": {node.value}"
             
-            if is_last_child:
-                new_prefix = child_prefix + "    "
-                new_label_prefix = "└── "
-            else:
-                new_prefix = child_prefix + "│   "
-                new_label_prefix = "├── "
+            lines.append(f"{prefix}{label_prefix}{label}")
             
-            child._to_ascii_rec(lines, child_prefix, new_prefix, new_label_prefix)
+            # Push children in reverse so they are rendered in order
+            for i in range(len(node.children) - 1, -1, -1):
+                if i == len(node.children) - 1:
+                    pending.append((node.children[i], child_prefix, child_prefix + "    ", "└── "))
+                else:
+                    pending.append((node.children[i], child_prefix, child_prefix + "│   ", "├── "))
+        
+        return "\n".join(lines)
 
 
 class TokenType(Enum):
@@ -85,6 +223,8 @@ class TokenType(Enum):
 
 class Token:
     """Represents a token in the logical expression."""
+    __slots__ = ("type", "value")
+    
     def __init__(self, token_type: TokenType, value: Optional[str] = None):
         self.type = token_type
         self.value = value
@@ -96,6 +236,64 @@ class Token:
         return str(self.type.value)
 
 
+# One alternation covering every token. A condition is a run of characters other than
+# quotes, parentheses, ``&`` and ``|`` -- quoted strings and lone ``&``/``|`` included --
+# starting with a non-space character. A quote that cannot be closed stops the condition
+# run and is matched by ``quote``.
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<and>&&)
+      | (?P<or>\|\|)
+      | (?P<lparen>\()
+      | (?P<rparen>\))
+      | (?P<condition>(?:[^\s"'()&|]|"[^"]*"|'[^']*'|&(?!&)|\|(?!\|))
+                      (?:[^"'()&|]+|"[^"]*"|'[^']*'|&(?!&)|\|(?!\|))*)
+      | (?P<quote>["'])
+    )
+""", re.VERBOSE)
+
+_OPERATOR_TOKENS = {
+    'and': TokenType.AND,
+    'or': TokenType.OR,
+    'lparen': TokenType.LEFT_PAREN,
+    'rparen': TokenType.RIGHT_PAREN,
+}
+
+
+def iter_tokens(expression: str) -> Iterator[Token]:
+    """
+    Lazily tokenize a logical expression in a single regex-driven pass.
+    
+    Args:
+        expression: The logical expression to tokenize
+    
+    Yields:
+        The tokens of the expression in order
+    
+    Raises:
+        ValueError: If the expression contains unbalanced quotes
+    """
+    n = len(expression)
+    for match in _TOKEN_RE.finditer(expression):
+        kind = match.lastgroup
+        if kind == 'condition':
+            end = match.end()
+            if end < n and expression[end] in '"\'':
+                raise ValueError(
+                    f"Unbalanced quotes in condition starting at position {match.start(kind)}: "
+                    f"unclosed {expression[end]} at position {end}"
+                )
+            yield Token(TokenType.CONDITION, match.group(kind).rstrip())
+        elif kind == 'quote':
+            position = match.start(kind)
+            raise ValueError(
+                f"Unbalanced quotes in condition starting at position {position}: "
+                f"unclosed {expression[position]} at position {position}"
+            )
+        else:
+            yield Token(_OPERATOR_TOKENS[kind])
+
+
 def tokenize(expression: str) -> List[Token]:
     """
     Tokenize a logical expression into a list of tokens.
@@ -109,72 +307,66 @@ def tokenize(expression: str) -> List[Token]:
     Raises:
         ValueError: If the expression is invalid or contains unbalanced quotes
     """
-    tokens = []
-    i = 0
-    n = len(expression)
+    return list(iter_tokens(expression))
+
+
+_PRECEDENCE = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+}
+
+_OPERATOR_NODES = {
+    TokenType.AND: NodeType.AND,
+    TokenType.OR: NodeType.OR,
+}
+
+
+def _condition_node(value: str) -> Node:
+    """
+    Create a CONDITION node, parsing its value up front when possible.
     
-    while i < n:
-        # Skip whitespace
-        if expression[i].isspace():
-            i += 1
-            continue
-        
-        # Check for operators and parentheses
-        if i + 1 < n and expression[i:i+2] == '&&':
-            tokens.append(Token(TokenType.AND))
-            i += 2
-        elif i + 1 < n and expression[i:i+2] == '||':
-            tokens.append(Token(TokenType.OR))
-            i += 2
-        elif expression[i] == '(':
-            tokens.append(Token(TokenType.LEFT_PAREN))
-            i += 1
-        elif expression[i] == ')':
-            tokens.append(Token(TokenType.RIGHT_PAREN))
-            i += 1
-        else:
-            # This is a condition
-            start = i
-            in_quotes = False
-            quote_char = None
-            
-            # Continue until we hit an operator or a parenthesis (ignoring those in quotes)
-            while i < n:
-                # Handle quoted strings
-                if expression[i] in ('"', "'"):
-                    if not in_quotes:
-                        in_quotes = True
-                        quote_char = expression[i]
-                    elif expression[i] == quote_char:
-                        in_quotes = False
-                        quote_char = None
-                
-                # Check for operators and parentheses (outside quotes)
-                if not in_quotes:
-                    if i + 1 < n and (expression[i:i+2] == '&&' or expression[i:i+2] == '||'):
-                        break
-                    if expression[i] == '(' or expression[i] == ')':
-                        break
-                
-                i += 1
-            
-            # Check for unbalanced quotes
-            if in_quotes:
-                raise ValueError(f"Unbalanced quotes in condition starting at position {start}")
-            
-            condition = expression[start:i].strip()
-            if condition:
-                tokens.append(Token(TokenType.CONDITION, condition))
+    Values that are not ``@.field op literal`` conditions are kept as plain
+    text; backends raise when they need the parsed form.
+    """
+    try:
+        condition = parse_condition(value)
+    except ValueError:
+        condition = None
+    return Node(NodeType.CONDITION, value, condition)
+
+
+def _reduce(operands: List[Node], operator: TokenType) -> None:
+    """
+    Replace the top two operands with a node combining them with ``operator``.
     
-    return tokens
+    Operands that are already nodes of the same type are merged, so chains such
+    as ``a && b && c`` become a single n-ary node rather than nested binary ones.
+    """
+    node_type = _OPERATOR_NODES[operator]
+    right = operands.pop()
+    left = operands.pop()
+    if left.type == node_type:
+        node = left
+    else:
+        node = Node(node_type)
+        node.children.append(left)
+    if right.type == node_type:
+        node.children.extend(right.children)
+    else:
+        node.children.append(right)
+    operands.append(node)
 
 
-def parse_expression(tokens: List[Token]) -> Node:
+def parse_expression(tokens: Iterable[Token]) -> Node:
     """
-    Parse a list of tokens into a Boolean syntax tree.
+    Parse a sequence of tokens into a Boolean syntax tree.
+    
+    The parser is an operator-precedence (shunting-yard) engine driven by
+    explicit stacks, so arbitrarily deep nesting and long operator chains are
+    parsed in linear time without recursion.
     
     Args:
-        tokens: The list of tokens to parse
+        tokens: The tokens to parse, e.g. from ``tokenize`` or ``iter_tokens``
     
     Returns:
         The root node of the Boolean syntax tree
@@ -182,83 +374,57 @@ def parse_expression(tokens: List[Token]) -> Node:
     Raises:
         ValueError: If the tokens form an invalid expression
     """
-    def parse_or_expr(index: int) -> Tuple[Node, int]:
-        """Parse an OR expression."""
-        left, index = parse_and_expr(index)
-        
-        while index < len(tokens) and tokens[index].type == TokenType.OR:
-            # Create OR node
-            or_node = Node(NodeType.OR)
-            or_node.children.append(left)
-            
-            # Parse right operand
-            index += 1
-            right, index = parse_and_expr(index)
-            or_node.children.append(right)
-            
-            left = or_node
-        
-        return left, index
-    
-    def parse_and_expr(index: int) -> Tuple[Node, int]:
-        """Parse an AND expression."""
-        left, index = parse_primary(index)
-        
-        while index < len(tokens) and tokens[index].type == TokenType.AND:
-            # Create AND node
-            and_node = Node(NodeType.AND)
-            and_node.children.append(left)
-            
-            # Parse right operand
-            index += 1
-            right, index = parse_primary(index)
-            and_node.children.append(right)
-            
-            left = and_node
-        
-        return left, index
+    operands: List[Node] = []
+    operators: List[TokenType] = []
+    open_parens = 0
+    expect_operand = True
+    index = -1
     
-    def parse_primary(index: int) -> Tuple[Node, int]:
-        """Parse a primary expression (condition or parenthesized expression)."""
-        if index >= len(tokens):
-            raise ValueError("Unexpected end of expression")
+    for index, token in enumerate(tokens):
+        if expect_operand:
+            if token.type == TokenType.CONDITION:
+                operands.append(_condition_node(token.value))
+                expect_operand = False
+            elif token.type == TokenType.LEFT_PAREN:
+                operators.append(TokenType.LEFT_PAREN)
+                open_parens += 1
+            else:
+                raise ValueError(f"Unexpected token: {token.type}")
         
-        token = tokens[index]
+        elif token.type in _PRECEDENCE:
+            # Operators are left-associative: reduce everything binding at least as tightly
+            precedence = _PRECEDENCE[token.type]
+            while operators and operators[-1] != TokenType.LEFT_PAREN and _PRECEDENCE[operators[-1]] >= precedence:
+                _reduce(operands, operators.pop())
+            operators.append(token.type)
+            expect_operand = True
         
-        if token.type == TokenType.LEFT_PAREN:
-            # Parse expression within parentheses
-            index += 1
-            expr, index = parse_or_expr(index)
-            
-            # Expect closing parenthesis
-            if index < len(tokens) and tokens[index].type == TokenType.RIGHT_PAREN:
-                index += 1
-                return expr, index
-            else:
-                raise ValueError("Expected closing parenthesis")
+        elif token.type == TokenType.RIGHT_PAREN and open_parens:
+            while operators[-1] != TokenType.LEFT_PAREN:
+                _reduce(operands, operators.pop())
+            operators.pop()
+            open_parens -= 1
         
-        elif token.type == TokenType.CONDITION:
-            # Create condition node
-            node = Node(NodeType.CONDITION, token.value)
-            return node, index + 1
+        elif open_parens:
+            raise ValueError("Expected closing parenthesis")
         
         else:
-            raise ValueError(f"Unexpected token: {token.type}")
+            raise ValueError(f"Unexpected token at position {index}")
     
-    if not tokens:
+    if index < 0:
         raise ValueError("Empty expression")
+    if expect_operand:
+        raise ValueError("Unexpected end of expression")
+    if open_parens:
+        raise ValueError("Expected closing parenthesis")
     
-    # Start parsing from the first token
-    result, index = parse_or_expr(0)
+    while operators:
+        _reduce(operands, operators.pop())
     
-    # Ensure all tokens were consumed
-    if index != len(tokens):
-        raise ValueError(f"Unexpected token at position {index}")
-    
-    return result
+    return operands[0]
 
 
-def build_boolean_syntax_tree(expression: str) -> Node:
+def build_boolean_syntax_tree(expression: str, cache: Optional[PredicateCache] = None) -> Node:
     """
     Convert a logical statement into a Boolean syntax tree.
     
@@ -283,6 +449,8 @@ def build_boolean_syntax_tree(expression: str) -> Node:
     
     Args:
         expression: The logical statement to parse
+        cache: Optional cache to look the tree up in. Cached trees are shared
+            between callers and must not be modified.
     
     Returns:
         The root node of the Boolean syntax tree
@@ -290,8 +458,342 @@ def build_boolean_syntax_tree(expression: str) -> Node:
     Raises:
         ValueError: If the expression is invalid
     """
-    tokens = tokenize(expression)
-    return parse_expression(tokens)
+    if instrument._collector is not None:
+        return _measure("build_boolean_syntax_tree", "tree", expression, cache, _measured_tree)
+    if cache is not None:
+        return cache.get_or_compute("tree", expression, _build_tree)
+    return _build_tree(expression)
+
+
+def _build_tree(expression: str) -> Node:
+    return parse_expression(iter_tokens(expression))
+
+
+def _measured_tree(expression: str, measurement: Dict[str, Any]) -> Node:
+    """Build a tree, timing tokenizing and parsing separately (so tokens are materialized first)."""
+    phases = measurement["phases"]
+    start = time.perf_counter()
+    try:
+        tokens = tokenize(expression)
+    finally:
+        phases["tokenize"] = time.perf_counter() - start
+    measurement["tokens"] = len(tokens)
+    start = time.perf_counter()
+    try:
+        tree = parse_expression(tokens)
+    finally:
+        phases["parse"] = time.perf_counter() - start
+    measurement["tree"] = tree
+    return tree
+
+
+def _measure(
+    operation: str,
+    kind: str,
+    expression: str,
+    cache: Optional[PredicateCache],
+    compute: Callable[[str, Dict[str, Any]], Any],
+) -> Any:
+    """Run an instrumented pipeline call and report a ``Measurement`` to the collector."""
+    collector = instrument._collector
+    measurement: Dict[str, Any] = {"phases": {}, "tokens": None, "tree": None, "hit": None if cache is None else True}
+
+    def compute_once(text: str) -> Any:
+        measurement["hit"] = False
+        return compute(text, measurement)
+
+    error = None
+    start = time.perf_counter()
+    try:
+        if cache is None:
+            result = compute(expression, measurement)
+        else:
+            result = cache.get_or_compute(kind, expression, compute_once)
+        return result
+    except Exception as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        # Only a tree built by this call is measured; walking cached trees would slow down hits
+        tree = measurement["tree"]
+        nodes, depth = instrument.tree_shape(tree) if tree is not None else (None, None)
+        collector(instrument.Measurement(
+            operation, seconds, measurement["phases"], measurement["tokens"], nodes, depth, measurement["hit"], error
+        ))
+
+
+# Fields are paths like ``a.b`` or ``items[0].id``. ``in`` and ``not in`` must be separated
+# from the field name, so ``@.xin [1]`` stays invalid.
+_CONDITION_RE = re.compile(
+    r'^\s*@\.(\w+(?:\.\w+|\[-?\d+\])*)\s*(==|!=|>=|<=|>|<|(?<=\s)(?:not\s+in|in)(?=[\s\[]))\s*(.*?)\s*$', re.DOTALL
+)
+_COMPARISON_OPS = {op.value: op for op in ComparisonOp}
+_LIST_ITEM_RE = re.compile(r'\s*("[^"]*"|\'[^\']*\'|[^,"\']*?)\s*(,|$)')
+
+
+def _parse_literal(text: str, numeric: bool = False) -> Any:
+    """
+    Convert the literal side of a condition into a Python value.
+    
+    Quoted text becomes a string, ``true``/``false`` become booleans, ``null``
+    becomes None and unquoted numbers become int or float. With ``numeric`` set
+    (range comparisons), numbers are converted to float, quoted or not.
+    """
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in ('"', "'") and text[0] not in text[1:-1]:
+        if numeric:
+            try:
+                return float(text[1:-1])
+            except ValueError:
+                pass
+        return text[1:-1]
+    if text == 'true':
+        return True
+    if text == 'false':
+        return False
+    if text == 'null':
+        return None
+    try:
+        return float(text) if numeric else int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Unsupported literal: {text}") from None
+
+
+def _literal_family(value: Any) -> str:
+    """Name the kind of a set member: values of one family compare with each other."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, str):
+        return "str"
+    return "number"
+
+
+def _parse_list_literal(text: str) -> frozenset:
+    """
+    Convert the ``[a, b, ...]`` literal of a membership condition into a frozenset.
+    
+    Members are parsed like other literals; they must not be ``null`` and must
+    all be strings, all numbers or all booleans.
+    """
+    if len(text) < 2 or text[0] != '[' or text[-1] != ']':
+        raise ValueError(f"Expected a list literal: {text}")
+    body = text[1:-1]
+    members = []
+    if body.strip():
+        position = 0
+        while position <= len(body):
+            match = _LIST_ITEM_RE.match(body, position)
+            item = match.group(1) if match else None
+            if not item:
+                raise ValueError(f"Empty item in list literal: {text}")
+            members.append(_parse_literal(item))
+            if not match.group(2):
+                break
+            position = match.end()
+    if not members:
+        raise ValueError(f"Empty list literal: {text}")
+    if any(member is None for member in members):
+        raise ValueError(f"null is not allowed in a list literal: {text}")
+    if len({_literal_family(member) for member in members}) > 1:
+        raise ValueError(f"Mixed literal types in list literal: {text}")
+    return frozenset(members)
+
+
+def _format_literal(value: Any) -> str:
+    """Format a literal value as condition text (the inverse of ``_parse_literal``)."""
+    if isinstance(value, frozenset):
+        # Members of one family are mutually comparable, so sorting gives a canonical order
+        return "[" + ", ".join(_format_literal(member) for member in sorted(value)) + "]"
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return f"'{value}'" if '"' in value else f'"{value}"'
+    return repr(value)
+
+
+_PATH_STEP_RE = re.compile(r'\.?(\w+)|\[(-?\d+)\]')
+
+
+def parse_field_path(text: str) -> FieldPath:
+    """
+    Split a field path as written in conditions into its steps.
+    
+    Examples:
+        >>> parse_field_path('items[0].id')
+        ('items', 0, 'id')
+    
+    Raises:
+        ValueError: If the text is not a field path
+    """
+    path: List[Union[str, int]] = []
+    position = 0
+    while position < len(text):
+        match = _PATH_STEP_RE.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid field path: {text}")
+        name, index = match.groups()
+        # Names after the first are separated by a dot
+        if name is not None and text.startswith(".", position) != (position > 0):
+            raise ValueError(f"Invalid field path: {text}")
+        path.append(name if name is not None else int(index))
+        position = match.end()
+    if not path or not isinstance(path[0], str):
+        raise ValueError(f"Invalid field path: {text}")
+    return tuple(path)
+
+
+def format_field_path(path: FieldPath) -> str:
+    """Write a field path as in conditions (the inverse of ``parse_field_path``)."""
+    parts = []
+    for step in path:
+        if isinstance(step, int):
+            parts.append(f"[{step}]")
+        else:
+            parts.append(f".{step}" if parts else step)
+    return "".join(parts)
+
+
+def parse_condition(condition: str) -> Condition:
+    """
+    Parse a condition of the form ``@.field op literal``.
+    
+    The field may be a nested path, like ``@.address.city`` or
+    ``@.items[0].id``. Besides the comparison operators,
+    ``@.field in [a, b, ...]`` and ``@.field not in [a, b, ...]`` test
+    membership in a list of literals.
+    
+    Examples:
+        >>> parse_condition('@.price >= 10')
+        Condition(('price',), ComparisonOp.GE, 10.0)
+        >>> parse_condition('@.id in [3, 1]')
+        Condition(('id',), ComparisonOp.IN, frozenset({1, 3}))
+    
+    Args:
+        condition: The condition text
+    
+    Returns:
+        The parsed condition. Range comparisons (``>``, ``>=``, ``<``, ``<=``)
+        convert numeric literals, quoted or not, to float.
+    
+    Raises:
+        ValueError: If the condition does not have the expected form
+    """
+    match = _CONDITION_RE.match(condition)
+    if not match:
+        if not re.search(r'@\.\w+', condition):
+            raise ValueError(f"Invalid field reference in condition: {condition}")
+        raise ValueError(f"Unsupported comparison operator in condition: {condition}")
+    field, op_text, literal = match.groups()
+    op = _COMPARISON_OPS[" ".join(op_text.split())]
+    path = parse_field_path(field) if "." in field or "[" in field else (field,)
+    if op in MEMBERSHIP_OPS:
+        return Condition(path, op, _parse_list_literal(literal))
+    return Condition(path, op, _parse_literal(literal, numeric=op in RANGE_OPS))
+
+
+def referenced_fields(tree: Node) -> Tuple[FieldPath, ...]:
+    """
+    Return the field paths a tree's conditions use, each once, in order of first appearance.
+    
+    Readers can use the result to load only these columns (the first step of
+    each path) or sub-fields. For ``Node`` trees the result is computed once
+    and cached on the root, which must not be modified afterwards.
+    
+    Examples:
+        >>> referenced_fields(build_boolean_syntax_tree('@.a.b == 1 || (@.items[0].id > 2 && @.a.b != 3)'))
+        (('a', 'b'), ('items', 0, 'id'))
+    
+    Args:
+        tree: The root node of the Boolean syntax tree, or a ``Node``-compatible view
+    
+    Returns:
+        The distinct field paths
+    
+    Raises:
+        ValueError: If a condition cannot be parsed
+    """
+    # Node-compatible views (such as ``PackedNode``) have no cache slot
+    fields = getattr(tree, "_fields", None)
+    if fields is None:
+        seen: Dict[FieldPath, None] = {}
+        pending = [tree]
+        while pending:
+            node = pending.pop()
+            if node.type == NodeType.CONDITION:
+                seen.setdefault(node.condition.path)
+            else:
+                pending.extend(reversed(node.children))
+        fields = tuple(seen)
+        if isinstance(tree, Node):
+            tree._fields = fields
+    return fields
+
+
+_POLARS_METHODS = {
+    ComparisonOp.EQ: 'eq',
+    ComparisonOp.NE: 'ne',
+    ComparisonOp.GT: 'gt',
+    ComparisonOp.GE: 'ge',
+    ComparisonOp.LT: 'lt',
+    ComparisonOp.LE: 'le',
+}
+
+
+def _python_literal(value: Any) -> str:
+    """Format a literal value as Python source."""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return repr(value)
+
+
+def _polars_members(values: frozenset) -> Optional[List[Any]]:
+    """
+    Return the sorted members of a membership literal for Polars' ``is_in``, or None for numbers.
+    
+    ``is_in`` needs the list's dtype to match the column's, which is not known
+    when the expression is built: ``[1, 3]`` fails on a float column and
+    ``[1.0, 3.0]`` on an integer one. Numeric members are therefore compared
+    one by one with ``eq``/``ne``, which work across numeric dtypes, exactly and
+    without casting the column.
+    """
+    members = sorted(values)
+    if _literal_family(members[0]) == "number":
+        return None
+    return members
+
+
+def _condition_to_polars_expr(condition: Condition) -> str:
+    """Convert a single parsed condition to a Polars expression string."""
+    pl_field = "pl.element()"
+    for step in condition.path:
+        if isinstance(step, int):
+            pl_field += f".list.get({step}, null_on_oob=True)"
+        else:
+            pl_field += f".struct.field({_python_literal(step)})"
+    
+    if condition.value is None:
+        if condition.op == ComparisonOp.EQ:
+            return f"{pl_field}.is_null()"
+        if condition.op == ComparisonOp.NE:
+            return f"{pl_field}.is_not_null()"
+        raise ValueError(f"Cannot compare null with '{condition.op.value}' in condition: {condition}")
+    
+    if condition.op in MEMBERSHIP_OPS:
+        members = _polars_members(condition.value)
+        if members is not None:
+            membership = f"{pl_field}.is_in([{', '.join(_python_literal(member) for member in members)}])"
+            return membership if condition.op == ComparisonOp.IN else f"{membership}.not_()"
+        method, combine = ("eq", "any") if condition.op == ComparisonOp.IN else ("ne", "all")
+        tests = [f"{pl_field}.{method}({_python_literal(member)})" for member in sorted(condition.value)]
+        return tests[0] if len(tests) == 1 else f"pl.{combine}_horizontal({', '.join(tests)})"
+    
+    return f"{pl_field}.{_POLARS_METHODS[condition.op]}({_python_literal(condition.value)})"
 
 
 def to_polars_expr(tree: Node) -> str:
@@ -300,7 +802,10 @@ def to_polars_expr(tree: Node) -> str:
     
     This function translates BST nodes into polars expression code that can be executed
     using the polars query engine. It handles field references, comparison operations,
-    and logical operations.
+    and logical operations. Nodes with two children become ``(a).and_(b)`` / ``(a).or_(b)``;
+    longer n-ary nodes become ``pl.all_horizontal(...)`` / ``pl.any_horizontal(...)``. The
+    tree is walked with an explicit stack and the output is emitted in a single pass, so
+    long chains and deep nesting convert in linear time.
     
     Args:
         tree: The root node of the Boolean syntax tree
@@ -311,106 +816,57 @@ def to_polars_expr(tree: Node) -> str:
     Raises:
         ValueError: If a condition has an unsupported format or operation
     """
-    if tree.type == NodeType.CONDITION:
-        # Parse condition: expected format is "@.field op value"
-        condition = tree.value.strip()
-        
-        # Match field pattern (@.field)
-        field_match = re.search(r'(@\.\w+)', condition)
-        if not field_match:
-            raise ValueError(f"Invalid field reference in condition: {condition}")
-        
-        field_ref = field_match.group(1)
-        field_name = field_ref.replace('@.', '')
-        
-        # Replace @.field with pl.element().struct.field("field")
-        pl_field = f'pl.element().struct.field("{field_name}")'
-        
-        # Match comparison operator
-        if '==' in condition:
-            op_parts = condition.split('==', 1)
-            op_method = '.eq'
-        elif '!=' in condition:
-            op_parts = condition.split('!=', 1)
-            op_method = '.ne'
-        elif '>=' in condition:
-            op_parts = condition.split('>=', 1)
-            op_method = '.ge'
-        elif '<=' in condition:
-            op_parts = condition.split('<=', 1)
-            op_method = '.le'
-        elif '>' in condition:
-            op_parts = condition.split('>', 1)
-            op_method = '.gt'
-        elif '<' in condition:
-            op_parts = condition.split('<', 1)
-            op_method = '.lt'
-        else:
-            raise ValueError(f"Unsupported comparison operator in condition: {condition}")
-        
-        # Extract and format value
-        value = op_parts[1].strip()
-        
-        # For numeric comparisons, convert to float
-        if op_method in ['.gt', '.lt', '.ge', '.le']:
-            # Strip quotes if present
-            if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
-                value = value[1:-1]
+    parts = []
+    # Pending items are either nodes still to convert or literal text to emit.
+    pending: List[Union[Node, str]] = [tree]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        
+        elif item.type == NodeType.CONDITION:
+            parts.append(_condition_to_polars_expr(item.condition))
+        
+        elif item.type in (NodeType.AND, NodeType.OR):
+            if not item.children:
+                raise ValueError(f"{item.type.value} node has no children")
             
-            # Try to convert to float
-            try:
-                float_value = float(value)
-                value = str(float_value)  # Ensure proper format
-            except ValueError:
-                # If it's not convertible to float, use it as is
-                pass
-        
-        # Format and return polars expression for this condition
-        return f"{pl_field}{op_method}({value})"
-        
-    elif tree.type == NodeType.AND:
-        # Convert AND node to .and_() method chain
-        if not tree.children:
-            raise ValueError("AND node has no children")
-        
-        children_exprs = [to_polars_expr(child) for child in tree.children]
-        if len(children_exprs) == 1:
-            return children_exprs[0]
-        
-        # Chain all children with .and_()
-        result = children_exprs[0]
-        for expr in children_exprs[1:]:
-            result = f"({result}).and_({expr})"
-        
-        return result
-        
-    elif tree.type == NodeType.OR:
-        # Convert OR node to .or_() method chain
-        if not tree.children:
-            raise ValueError("OR node has no children")
-        
-        children_exprs = [to_polars_expr(child) for child in tree.children]
-        if len(children_exprs) == 1:
-            return children_exprs[0]
-        
-        # Chain all children with .or_()
-        result = children_exprs[0]
-        for expr in children_exprs[1:]:
-            result = f"({result}).or_({expr})"
+            if len(item.children) > 2:
+                # Longer chains use one variadic call instead of a deep .and_()/.or_() chain
+                name = "all_horizontal" if item.type == NodeType.AND else "any_horizontal"
+                parts.append(f"pl.{name}(")
+                pending.append(")")
+                for i in range(len(item.children) - 1, -1, -1):
+                    pending.append(item.children[i])
+                    if i:
+                        pending.append(", ")
+                continue
+            
+            method = ").and_(" if item.type == NodeType.AND else ").or_("
+            if len(item.children) == 2:
+                parts.append("(")
+                pending.append(")")
+                pending.append(item.children[1])
+                pending.append(method)
+            pending.append(item.children[0])
         
-        return result
+        else:
+            raise ValueError(f"Unsupported node type: {item.type}")
     
-    raise ValueError(f"Unsupported node type: {tree.type}")
+    return "".join(parts)
 
 
-def convert_to_polars(expression: str) -> str:
+def convert_to_polars(expression: str, cache: Optional[PredicateCache] = default_cache) -> str:
     """
     Convert a logical predicate string directly to a Polars expression string.
     
     This is a convenience function that combines parsing and conversion to Polars.
+    Results are memoized in ``cache`` (the shared default cache unless another
+    one is given); pass ``cache=None`` to always convert from scratch.
     
     Args:
         expression: The logical predicate in string form
+        cache: Cache used to memoize the conversion, or None to disable caching
         
     Returns:
         A Python code string representing a Polars expression
@@ -418,5 +874,21 @@ def convert_to_polars(expression: str) -> str:
     Raises:
         ValueError: If the expression is invalid or contains unsupported operations
     """
+    if instrument._collector is not None:
+        return _measure("convert_to_polars", "polars_expr", expression, cache, _measured_polars_expr)
+    if cache is not None:
+        return cache.get_or_compute("polars_expr", expression, _convert_to_polars)
+    return _convert_to_polars(expression)
+
+
+def _convert_to_polars(expression: str) -> str:
     tree = build_boolean_syntax_tree(expression)
     return to_polars_expr(tree)
+
+
+def _measured_polars_expr(expression: str, measurement: Dict[str, Any]) -> str:
+    tree = _measured_tree(expression, measurement)
+    start = time.perf_counter()
+    code = to_polars_expr(tree)
+    measurement["phases"]["codegen"] = time.perf_counter() - start
+    return code
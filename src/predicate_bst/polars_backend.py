@@ -0,0 +1,198 @@
+"""
+Polars backend building ``polars.Expr`` objects directly from Boolean syntax trees.
+
+Unlike ``to_polars_expr``, which returns Python source that has to be passed to
+``eval()``, the functions here return expression objects that can be handed
+straight to ``DataFrame.filter`` / ``LazyFrame.filter``. Polars is imported
+lazily so that importing ``predicate_bst`` does not pay for it.
+"""
+
+from typing import TYPE_CHECKING, Any, List, Mapping, Optional, Tuple
+
+from .cache import PredicateCache, default_cache
+from .parser import (
+    MEMBERSHIP_OPS,
+    ComparisonOp,
+    Condition,
+    FieldPath,
+    Node,
+    NodeType,
+    _polars_members,
+    build_boolean_syntax_tree,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+
+
+TARGETS = ("column", "struct")
+
+_MAX_EXACT_INTEGER = 2 ** 53
+
+
+def _import_polars():
+    try:
+        import polars
+    except ImportError as exc:  # pragma: no cover - polars is a declared dependency
+        raise ImportError("The Polars backend requires the 'polars' package") from exc
+    return polars
+
+
+def _exact_literal(value: Any) -> Any:
+    if isinstance(value, float) and value.is_integer() and abs(value) < _MAX_EXACT_INTEGER:
+        # Range literals are parsed as floats; an integer literal spares integer
+        # columns a cast, which would block statistics-based pushdown in scans.
+        return int(value)
+    return value
+
+
+def _field_expr(pl: Any, path: FieldPath, target: str) -> "pl.Expr":
+    if target == "column":
+        expr = pl.col(path[0])
+    else:
+        expr = pl.element().struct.field(path[0])
+    return _nested_expr(expr, path[1:])
+
+
+def _nested_expr(expr: "pl.Expr", steps: FieldPath) -> "pl.Expr":
+    """Follow the remaining steps of a field path into struct fields and list elements."""
+    for step in steps:
+        if isinstance(step, int):
+            # Lists that are too short give null, like a missing field
+            expr = expr.list.get(step, null_on_oob=True)
+        else:
+            expr = expr.struct.field(step)
+    return expr
+
+
+def _condition_expr(
+    pl: Any,
+    condition: Condition,
+    target: str,
+    fields: Optional[Mapping[str, "pl.Expr"]] = None,
+) -> "pl.Expr":
+    if fields is not None and condition.field in fields:
+        column = fields[condition.field]
+    else:
+        column = _field_expr(pl, condition.path, target)
+    op, value = condition.op, condition.value
+
+    if value is None:
+        if op == ComparisonOp.EQ:
+            return column.is_null()
+        if op == ComparisonOp.NE:
+            return column.is_not_null()
+        raise ValueError(f"Cannot compare null with '{op.value}' in condition: {condition}")
+
+    if op in MEMBERSHIP_OPS:
+        members = _polars_members(value)
+        if members is not None:
+            membership = column.is_in(members)
+            return membership if op == ComparisonOp.IN else membership.not_()
+        if op == ComparisonOp.IN:
+            tests = [column.eq(_exact_literal(member)) for member in sorted(value)]
+            return tests[0] if len(tests) == 1 else pl.any_horizontal(tests)
+        tests = [column.ne(_exact_literal(member)) for member in sorted(value)]
+        return tests[0] if len(tests) == 1 else pl.all_horizontal(tests)
+
+    value = _exact_literal(value)
+    if op == ComparisonOp.EQ:
+        return column.eq(value)
+    if op == ComparisonOp.NE:
+        return column.ne(value)
+    if op == ComparisonOp.GT:
+        return column.gt(value)
+    if op == ComparisonOp.GE:
+        return column.ge(value)
+    if op == ComparisonOp.LT:
+        return column.lt(value)
+    return column.le(value)
+
+
+def to_polars(
+    tree: Node,
+    target: str = "column",
+    fields: Optional[Mapping[str, "pl.Expr"]] = None,
+) -> "pl.Expr":
+    """
+    Convert a Boolean syntax tree to a Polars expression object.
+
+    Args:
+        tree: The root node of the Boolean syntax tree
+        target: ``"column"`` to reference top-level columns with ``pl.col(field)``,
+            or ``"struct"`` to reference struct fields of list elements with
+            ``pl.element().struct.field(field)`` (for use inside ``list.eval``).
+            Nested paths continue with ``struct.field`` for names and
+            ``list.get`` for indexes.
+        fields: Expressions to use for specific fields instead of the target's
+            default, e.g. ``{"city": pl.col("address").struct.field("city")}``
+
+    Returns:
+        A ``polars.Expr`` evaluating to a boolean
+
+    Raises:
+        ValueError: If the target is unknown or a condition is unsupported
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unsupported target: {target!r} (expected one of {', '.join(TARGETS)})")
+    pl = _import_polars()
+
+    # Post-order walk with an explicit stack; finished sub-expressions collect in ``results``.
+    results: List["pl.Expr"] = []
+    pending: List[Tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if node.type == NodeType.CONDITION:
+            results.append(_condition_expr(pl, node.condition, target, fields))
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+            continue
+
+        operands = results[len(results) - len(node.children):]
+        del results[len(results) - len(node.children):]
+        if len(operands) == 1:
+            results.append(operands[0])
+        elif len(operands) == 2:
+            left, right = operands
+            results.append(left.and_(right) if node.type == NodeType.AND else left.or_(right))
+        elif node.type == NodeType.AND:
+            # Variadic forms keep long chains shallow in the Polars expression graph
+            results.append(pl.all_horizontal(operands))
+        else:
+            results.append(pl.any_horizontal(operands))
+
+    return results[0]
+
+
+def compile_polars(
+    expression: str,
+    target: str = "column",
+    cache: Optional[PredicateCache] = default_cache,
+) -> "pl.Expr":
+    """
+    Convert a logical predicate string directly to a Polars expression object.
+
+    Args:
+        expression: The logical predicate in string form
+        target: ``"column"`` or ``"struct"``, see ``to_polars``
+        cache: Cache used to memoize the conversion, or None to disable caching
+
+    Returns:
+        A ``polars.Expr`` evaluating to a boolean
+
+    Raises:
+        ValueError: If the expression is invalid or contains unsupported operations
+    """
+    def compute(text: str) -> "pl.Expr":
+        return to_polars(build_boolean_syntax_tree(text), target)
+
+    if cache is not None:
+        return cache.get_or_compute(("polars", target), expression, compute)
+    return compute(expression)
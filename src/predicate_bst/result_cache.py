@@ -0,0 +1,226 @@
+"""
+Cache of filtered DataFrames that answers stricter predicates from earlier results.
+
+Interactive drill-downs filter the same frame over and over, each query
+usually narrowing the previous one (``@.category == "books"``, then
+``@.category == "books" && @.price < 20``). ``FilterResultCache`` keeps the
+results of recent filters keyed by the canonical form of their predicate
+(see ``predicate_bst.canonical``), so rewrites of a cached predicate are hits.
+For a new predicate it looks for a cached predicate it implies -- decided
+exactly on their BDDs (see ``predicate_bst.bdd``) -- and filters the smallest
+such cached result instead of the whole frame.
+
+Implication treats conditions as opaque atoms, so ``@.price < 20`` is not
+known to imply ``@.price < 30``. That is sound for Polars' filtering:
+predicates without negation are monotone, so a row a predicate keeps under
+Kleene logic is kept when nulls are read as false, as the BDD does.
+
+Entries are evicted least recently used first once their estimated size
+(``DataFrame.estimated_size``) exceeds ``max_bytes``. A cache serves a single
+source frame; passing a different frame, or a different ``version`` of it,
+discards every entry.
+"""
+
+from collections import OrderedDict, namedtuple
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Optional, Union
+
+from .bdd import BDD
+from .cache import PredicateCache, default_cache
+from .canonical import _canonical
+from .parser import Node, build_boolean_syntax_tree
+from .polars_backend import to_polars
+
+if TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+
+
+ResultCacheInfo = namedtuple(
+    "ResultCacheInfo", ["hits", "subsumed", "misses", "evictions", "entries", "nbytes", "max_bytes"]
+)
+
+# Rebuild the BDD from the live entries once evicted predicates have left this many nodes behind.
+_MAX_BDD_NODES = 1 << 16
+
+
+class _Entry:
+    __slots__ = ("tree", "node", "frame", "nbytes")
+
+    def __init__(self, tree: Node, node: int, frame: "pl.DataFrame", nbytes: int):
+        self.tree = tree
+        self.node = node
+        self.frame = frame
+        self.nbytes = nbytes
+
+
+class FilterResultCache:
+    """
+    Memory-bounded, thread-safe cache of ``DataFrame.filter`` results for one source frame.
+
+    Cached frames are shared between callers and must be treated as read-only.
+
+    Examples:
+        >>> results = FilterResultCache(max_bytes=512 * 2**20)
+        >>> books = results.filter(frame, '@.category == "books"')
+        >>> cheap = results.filter(frame, '@.category == "books" && @.price < 20')  # filters ``books``
+        >>> results.info().subsumed
+        1
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20, cache: Optional[PredicateCache] = default_cache):
+        """
+        Args:
+            max_bytes: Largest total estimated size of the cached frames
+            cache: Cache used when parsing predicate strings
+
+        Raises:
+            ValueError: If ``max_bytes`` is negative
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
+        self._max_bytes = max_bytes
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._keys_by_node: Dict[int, str] = {}
+        self._bdd = BDD(cache=None)
+        self._nbytes = 0
+        self._source: Any = None
+        self._version: Optional[Hashable] = None
+        self._generation = 0
+        self._hits = self._subsumed = self._misses = self._evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def filter(
+        self,
+        frame: "pl.DataFrame",
+        predicate: Union[Node, str],
+        version: Optional[Hashable] = None,
+    ) -> "pl.DataFrame":
+        """
+        Return the rows of ``frame`` matching a predicate, reusing cached results.
+
+        Args:
+            frame: The source frame
+            predicate: The root node of the Boolean syntax tree, or a predicate string
+            version: Version of the source frame; when given, entries are kept
+                as long as the version is unchanged (even for a new frame
+                object), otherwise as long as ``frame`` is the same object
+
+        Returns:
+            The matching rows, in their order in ``frame``
+
+        Raises:
+            ValueError: If the predicate contains an unsupported condition or node
+        """
+        if isinstance(predicate, str):
+            predicate = build_boolean_syntax_tree(predicate, cache=self.cache)
+        canonical = _canonical(predicate)
+        key = canonical.digest.hex()
+
+        with self._lock:
+            self._check_source(frame, version)
+            generation = self._generation
+            cached_key: Optional[str] = key if key in self._entries else None
+            if cached_key is None:
+                # Equivalent predicates with different canonical forms share a BDD node
+                node = self._bdd.from_tree(canonical.node)
+                cached_key = self._keys_by_node.get(node)
+            if cached_key is not None:
+                self._entries.move_to_end(cached_key)
+                self._hits += 1
+                return self._entries[cached_key].frame
+
+            base: Optional[_Entry] = None
+            for candidate in self._entries.values():
+                if (base is None or candidate.frame.height < base.frame.height) and self._bdd.implies(
+                    node, candidate.node
+                ):
+                    base = candidate
+            if base is None:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(self._keys_by_node[base.node])
+                self._subsumed += 1
+
+        # Filter outside the lock; concurrent misses may filter twice, which is harmless.
+        result = (frame if base is None else base.frame).filter(to_polars(canonical.node))
+        self._store(key, _Entry(canonical.node, node, result, result.estimated_size()), generation)
+        return result
+
+    def _check_source(self, frame: "pl.DataFrame", version: Optional[Hashable]) -> None:
+        if version is None:
+            changed = self._version is not None or frame is not self._source
+        else:
+            changed = version != self._version
+        if changed:
+            self._source, self._version = frame, version
+            self._discard()
+
+    def _discard(self) -> None:
+        self._entries.clear()
+        self._keys_by_node.clear()
+        self._bdd = BDD(cache=None)
+        self._nbytes = 0
+        self._generation += 1
+
+    def _store(self, key: str, entry: _Entry, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation or entry.nbytes > self._max_bytes:
+                return
+            if key in self._entries or entry.node in self._keys_by_node:
+                # A concurrent filter stored this (or an equivalent) predicate first
+                return
+            self._entries[key] = entry
+            self._keys_by_node[entry.node] = key
+            self._nbytes += entry.nbytes
+            while self._nbytes > self._max_bytes:
+                self._evict()
+            if len(self._bdd) > _MAX_BDD_NODES:
+                self._rebuild_bdd()
+
+    def _evict(self) -> None:
+        _, entry = self._entries.popitem(last=False)
+        del self._keys_by_node[entry.node]
+        self._nbytes -= entry.nbytes
+        self._evictions += 1
+
+    def _rebuild_bdd(self) -> None:
+        # Nodes computed by filters still in flight belong to the old BDD; don't store them
+        self._generation += 1
+        self._bdd = BDD(cache=None)
+        self._keys_by_node.clear()
+        for key, entry in self._entries.items():
+            entry.node = self._bdd.from_tree(entry.tree)
+            self._keys_by_node[entry.node] = key
+
+    def invalidate(self) -> None:
+        """Discard all cached results, e.g. after modifying the source frame in place."""
+        with self._lock:
+            self._discard()
+
+    def clear(self) -> None:
+        """Discard all cached results and reset the counters."""
+        with self._lock:
+            self._discard()
+            self._hits = self._subsumed = self._misses = self._evictions = 0
+
+    def info(self) -> ResultCacheInfo:
+        """
+        Return the counters and current size.
+
+        ``hits`` counts predicates answered from an equivalent cached one,
+        ``subsumed`` those filtered from the result of a cached predicate they
+        imply, and ``misses`` those filtered from the full frame.
+        """
+        with self._lock:
+            return ResultCacheInfo(
+                self._hits, self._subsumed, self._misses, self._evictions,
+                len(self._entries), self._nbytes, self._max_bytes,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,163 @@
+"""
+Rewrite passes that simplify Boolean syntax trees for faster evaluation.
+
+Generated predicates often test one field against many values,
+``@.sku == "a" || @.sku == "b" || ...``, which every backend evaluates as one
+comparison per value. ``rewrite_membership`` merges such groups into a single
+membership condition, ``@.sku in ["a", "b", ...]``, which the Python evaluator
+answers with one frozenset lookup and SQL with ``IN (...)``. Polars uses one
+``is_in`` for strings and booleans. The mirror case, an AND of ``!=``
+conditions on one field, becomes ``not in``.
+
+The rewrite preserves the results of the backends: like ``==`` and ``!=``,
+membership conditions are false for missing fields and None values, and
+values of other types match no member. Only literals of one kind are merged
+(strings, numbers or booleans), and ``null`` comparisons are left alone.
+Polars' ``is_in`` needs the member list's dtype to match the column's, which
+is unknown when the expression is built, so numeric members are still
+compared one by one there (``any_horizontal`` of ``eq``, ``all_horizontal``
+of ``ne``); this works on integer and float columns alike.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from .cache import PredicateCache, default_cache
+from .parser import (
+    ComparisonOp,
+    Condition,
+    Node,
+    NodeType,
+    _literal_family,
+    build_boolean_syntax_tree,
+)
+
+
+# Conditions each connective can merge, and the membership operator they merge into
+_MERGEABLE = {
+    NodeType.OR: ((ComparisonOp.EQ, ComparisonOp.IN), ComparisonOp.IN),
+    NodeType.AND: ((ComparisonOp.NE, ComparisonOp.NOT_IN), ComparisonOp.NOT_IN),
+}
+
+
+def _merge_key(node: Node, node_type: NodeType) -> Optional[Tuple[Tuple[str, ...], str]]:
+    """Return the (path, literal kind) a child of an AND/OR node can be merged under, if any."""
+    if node.type != NodeType.CONDITION:
+        return None
+    try:
+        condition = node.condition
+    except ValueError:
+        return None
+    ops, _ = _MERGEABLE[node_type]
+    if condition.op not in ops or condition.value is None:
+        return None
+    if condition.op == ops[0]:
+        return condition.path, _literal_family(condition.value)
+    return condition.path, _literal_family(next(iter(condition.value)))
+
+
+def _merge_children(node_type: NodeType, children: List[Node], min_values: int) -> List[Node]:
+    """Replace groups of mergeable conditions among ``children`` with one membership condition each."""
+    groups: Dict[Tuple[Tuple[str, ...], str], List[int]] = {}
+    for index, child in enumerate(children):
+        key = _merge_key(child, node_type)
+        if key is not None:
+            groups.setdefault(key, []).append(index)
+
+    ops, merged_op = _MERGEABLE[node_type]
+    merged: Dict[int, Optional[Node]] = {}
+    for (path, _), indices in groups.items():
+        if len(indices) < 2:
+            continue
+        values = set()
+        for index in indices:
+            condition = children[index].condition
+            if condition.op == ops[0]:
+                values.add(condition.value)
+            else:
+                values.update(condition.value)
+        if len(values) < min_values:
+            continue
+        condition = Condition(path, merged_op, frozenset(values))
+        # The merged condition takes the place of the group's first member
+        merged[indices[0]] = Node(NodeType.CONDITION, str(condition), condition)
+        merged.update((index, None) for index in indices[1:])
+
+    if not merged:
+        return children
+    kept = []
+    for index, child in enumerate(children):
+        replacement = merged.get(index, child)
+        if replacement is not None:
+            kept.append(replacement)
+    return kept
+
+
+def rewrite_membership(
+    tree: Union[Node, str],
+    min_values: int = 2,
+    cache: Optional[PredicateCache] = default_cache,
+) -> Node:
+    """
+    Merge equality tests on one field into ``in`` conditions, and inequalities into ``not in``.
+
+    Under an OR node, ``==`` and ``in`` conditions on the same field become a
+    single ``in`` condition; under an AND node, ``!=`` and ``not in``
+    conditions become a single ``not in`` condition. Nested nodes of the same
+    type are flattened first, and nodes left with a single child are replaced
+    by it.
+
+    The input tree is not modified (trees may be shared through the cache);
+    leaves are reused and inner nodes copied.
+
+    Examples:
+        >>> str(rewrite_membership('@.sku == "a" || @.sku == "b" || @.price > 10'))
+        'OR(Condition(@.sku in ["a", "b"]), Condition(@.price > 10))'
+        >>> str(rewrite_membership('@.id != 3 && @.id != 1'))
+        'Condition(@.id not in [1, 3])'
+
+    Args:
+        tree: The root node of the Boolean syntax tree, or a predicate string
+        min_values: Smallest number of distinct values worth a membership condition
+        cache: Cache used when parsing a predicate string
+
+    Returns:
+        The rewritten tree
+
+    Raises:
+        ValueError: If the tree contains an unsupported or childless node
+    """
+    if isinstance(tree, str):
+        tree = build_boolean_syntax_tree(tree, cache=cache)
+
+    # Post-order walk; each finished subtree leaves its rewritten node in ``results``.
+    results: List[Node] = []
+    pending: List[Tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if node.type == NodeType.CONDITION:
+            results.append(node)
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+            continue
+
+        children = []
+        for child in results[len(results) - len(node.children):]:
+            if child.type == node.type:
+                children.extend(child.children)
+            else:
+                children.append(child)
+        del results[len(results) - len(node.children):]
+        children = _merge_children(node.type, children, min_values)
+        if len(children) == 1:
+            results.append(children[0])
+            continue
+        copy = Node(node.type)
+        copy.children = children
+        results.append(copy)
+    return results[0]
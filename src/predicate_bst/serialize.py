@@ -0,0 +1,326 @@
+"""
+Compact binary serialization of Boolean syntax trees ("rule packs").
+
+``dump_trees`` writes any number of trees into one little-endian buffer:
+
+* a header: magic ``b"PBST"``, format version, and section sizes
+* a string table: UTF-8 strings (field names, string literals and condition
+  texts), each stored once, addressed by index
+* a condition table: one fixed-size record per distinct condition holding
+  its text, field, operator and literal, so loading needs no parsing
+* the trees: each a run of 32-bit words in postfix order, where a condition
+  word refers to the condition table and an AND/OR word carries its child count
+
+``RulePack`` reads such a buffer -- ``bytes``, a ``memoryview`` or an ``mmap``
+-- in place. Nothing is copied up front: strings, conditions and trees are
+decoded on first access and cached, so a warm start can map a precompiled pack
+and only pay for the rules it actually uses.
+"""
+
+import mmap
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .parser import ComparisonOp, Condition, Node, NodeType, parse_field_path
+
+
+MAGIC = b"PBST"
+FORMAT_VERSION = 1
+
+# magic, version, flags, string count, condition count, tree count, node word count
+_HEADER = struct.Struct("<4sHHIIII")
+# text string, field string, operator code, literal tag, 8-byte literal payload
+_CONDITION = struct.Struct("<IIBB2x8s")
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+_UINT64 = struct.Struct("<Q")
+
+_OPS = list(ComparisonOp)
+_OP_CODES = {op: code for code, op in enumerate(_OPS)}
+
+# Literal tags; _RAW marks condition texts that are stored unparsed
+_NULL, _FALSE, _TRUE, _INT, _FLOAT, _STRING, _RAW = range(7)
+_NO_PAYLOAD = bytes(8)
+
+# Node words: the low two bits hold the node kind, the rest the child count or condition index
+_KIND_BITS = 2
+_KIND_MASK = (1 << _KIND_BITS) - 1
+_KINDS = {NodeType.AND: 0, NodeType.OR: 1, NodeType.CONDITION: 2}
+_NODE_TYPES = {kind: node_type for node_type, kind in _KINDS.items()}
+_CONDITION_KIND = _KINDS[NodeType.CONDITION]
+_MAX_OPERAND = (1 << (32 - _KIND_BITS)) - 1
+
+
+class _Strings:
+    """Interning string table used while writing."""
+
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+        self.encoded: List[bytes] = []
+
+    def intern(self, text: str) -> int:
+        index = self.indices.get(text)
+        if index is None:
+            index = self.indices[text] = len(self.encoded)
+            self.encoded.append(text.encode("utf-8"))
+        return index
+
+
+def _condition_record(text: str, condition: Optional[Condition], strings: _Strings) -> bytes:
+    text_index = strings.intern(text)
+    if condition is None:
+        return _CONDITION.pack(text_index, 0, 0, _RAW, _NO_PAYLOAD)
+    value = condition.value
+    if value is None:
+        tag, payload = _NULL, _NO_PAYLOAD
+    elif value is True or value is False:
+        tag, payload = (_TRUE if value else _FALSE), _NO_PAYLOAD
+    elif isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+        tag, payload = _INT, _INT64.pack(value)
+    elif isinstance(value, float):
+        tag, payload = _FLOAT, _FLOAT64.pack(value)
+    elif isinstance(value, str):
+        tag, payload = _STRING, _UINT64.pack(strings.intern(value))
+    else:
+        # e.g. integers beyond 64 bits: keep the text and parse it on load
+        return _CONDITION.pack(text_index, 0, 0, _RAW, _NO_PAYLOAD)
+    field_index = strings.intern(condition.field)
+    return _CONDITION.pack(text_index, field_index, _OP_CODES[condition.op], tag, payload)
+
+
+def dump_trees(trees: Iterable[Node]) -> bytes:
+    """
+    Serialize trees into a compact binary rule pack.
+
+    Args:
+        trees: Root nodes of the trees to store (``Node`` objects or node views
+            such as ``PackedNode``)
+
+    Returns:
+        The rule pack, loadable with ``RulePack``
+
+    Raises:
+        ValueError: If a tree contains an unsupported or childless node, or
+            exceeds the format's size limits
+    """
+    strings = _Strings()
+    conditions: List[bytes] = []
+    condition_indices: Dict[str, int] = {}
+    words: List[int] = []
+    tree_offsets = [0]
+
+    for tree in trees:
+        # Post-order walk with an explicit stack emits the postfix words directly.
+        pending: List[Tuple[Any, bool]] = [(tree, False)]
+        while pending:
+            node, expanded = pending.pop()
+            if node.type == NodeType.CONDITION:
+                index = condition_indices.get(node.value)
+                if index is None:
+                    try:
+                        condition = node.condition
+                    except ValueError:
+                        condition = None
+                    index = condition_indices[node.value] = len(conditions)
+                    conditions.append(_condition_record(node.value, condition, strings))
+                words.append(index << _KIND_BITS | _CONDITION_KIND)
+                continue
+            if node.type not in (NodeType.AND, NodeType.OR):
+                raise ValueError(f"Unsupported node type: {node.type}")
+            if not node.children:
+                raise ValueError(f"{node.type.value} node has no children")
+            if expanded:
+                if len(node.children) > _MAX_OPERAND:
+                    raise ValueError(f"{node.type.value} node has too many children to serialize")
+                words.append(len(node.children) << _KIND_BITS | _KINDS[node.type])
+                continue
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+        tree_offsets.append(len(words))
+
+    if len(conditions) > _MAX_OPERAND:
+        raise ValueError("Too many distinct conditions to serialize")
+
+    string_offsets = [0]
+    for encoded in strings.encoded:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, len(strings.encoded), len(conditions), len(tree_offsets) - 1, len(words)
+    )
+    return b"".join((
+        header,
+        struct.pack(f"<{len(string_offsets)}I", *string_offsets),
+        b"".join(conditions),
+        struct.pack(f"<{len(tree_offsets)}I", *tree_offsets),
+        struct.pack(f"<{len(words)}I", *words),
+        b"".join(strings.encoded),
+    ))
+
+
+class RulePack:
+    """
+    Read-only sequence of trees backed by a serialized rule pack.
+
+    The buffer is referenced, not copied; keep it (and any file it maps)
+    alive and unmodified for as long as the pack is used. Trees decoded from
+    one pack share their condition nodes, so treat them as read-only, like
+    trees returned from the cache.
+    """
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview, "mmap.mmap"]):
+        """
+        Args:
+            buffer: A buffer produced by ``dump_trees``
+
+        Raises:
+            ValueError: If the buffer is not a rule pack of a supported version
+        """
+        data = memoryview(buffer).cast("B")
+        if len(data) < _HEADER.size:
+            raise ValueError("Buffer is too short to be a rule pack")
+        magic, version, _, n_strings, n_conditions, n_trees, n_words = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Buffer is not a rule pack (bad magic)")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported rule pack version: {version} (expected {FORMAT_VERSION})")
+
+        self._data = data
+        self._file = None
+        self._string_offsets = _HEADER.size
+        self._conditions_offset = self._string_offsets + 4 * (n_strings + 1)
+        self._trees_offset = self._conditions_offset + _CONDITION.size * n_conditions
+        self._words_offset = self._trees_offset + 4 * (n_trees + 1)
+        self._blob_offset = self._words_offset + 4 * n_words
+        if len(data) < self._blob_offset:
+            raise ValueError("Rule pack is truncated")
+        blob_size = struct.unpack_from("<I", data, self._conditions_offset - 4)[0]
+        if len(data) != self._blob_offset + blob_size:
+            raise ValueError("Rule pack is truncated or has trailing data")
+
+        self._n_strings = n_strings
+        self._n_conditions = n_conditions
+        self._n_trees = n_trees
+        self._strings: Dict[int, str] = {}
+        self._leaves: Dict[int, Node] = {}
+        self._trees: Dict[int, Node] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "RulePack":
+        """Memory-map a rule pack file; call ``close`` (or use ``with``) when done."""
+        handle = open(path, "rb")
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            handle.close()
+            raise
+        try:
+            pack = cls(mapped)
+        except BaseException:
+            mapped.close()
+            handle.close()
+            raise
+        pack._file = (handle, mapped)
+        return pack
+
+    def close(self) -> None:
+        """Release the memory map of a pack opened with ``open``."""
+        self._data.release()
+        if self._file is not None:
+            handle, mapped = self._file
+            mapped.close()
+            handle.close()
+            self._file = None
+
+    def __enter__(self) -> "RulePack":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _string(self, index: int) -> str:
+        try:
+            return self._strings[index]
+        except KeyError:
+            start, end = struct.unpack_from("<II", self._data, self._string_offsets + 4 * index)
+            text = str(self._data[self._blob_offset + start:self._blob_offset + end], "utf-8")
+            self._strings[index] = text
+            return text
+
+    def _leaf(self, index: int) -> Node:
+        try:
+            return self._leaves[index]
+        except KeyError:
+            pass
+        text_index, field_index, op_code, tag, payload = _CONDITION.unpack_from(
+            self._data, self._conditions_offset + _CONDITION.size * index
+        )
+        text = self._string(text_index)
+        if tag == _RAW:
+            # Parsed lazily by the node, like a hand-built one
+            leaf = Node(NodeType.CONDITION, text)
+        else:
+            if tag == _INT:
+                value = _INT64.unpack(payload)[0]
+            elif tag == _FLOAT:
+                value = _FLOAT64.unpack(payload)[0]
+            elif tag == _STRING:
+                value = self._string(_UINT64.unpack(payload)[0])
+            else:
+                value = (None, False, True)[tag]
+            field = self._string(field_index)
+            leaf = Node(NodeType.CONDITION, text, Condition(parse_field_path(field), _OPS[op_code], value))
+        self._leaves[index] = leaf
+        return leaf
+
+    def __len__(self) -> int:
+        return self._n_trees
+
+    def __getitem__(self, index: int) -> Node:
+        """Return (and cache) the tree at ``index`` as ``Node`` objects."""
+        if index < 0:
+            index += self._n_trees
+        if not 0 <= index < self._n_trees:
+            raise IndexError("rule pack index out of range")
+        try:
+            return self._trees[index]
+        except KeyError:
+            pass
+
+        start, end = struct.unpack_from("<II", self._data, self._trees_offset + 4 * index)
+        words = struct.unpack_from(f"<{end - start}I", self._data, self._words_offset + 4 * start)
+        leaves = self._leaves
+        stack: List[Node] = []
+        for word in words:
+            kind, operand = word & _KIND_MASK, word >> _KIND_BITS
+            if kind == _CONDITION_KIND:
+                leaf = leaves.get(operand)
+                stack.append(leaf if leaf is not None else self._leaf(operand))
+                continue
+            node = Node(_NODE_TYPES[kind])
+            node.children = stack[len(stack) - operand:]
+            del stack[len(stack) - operand:]
+            stack.append(node)
+        tree = stack[0]
+        self._trees[index] = tree
+        return tree
+
+    def __iter__(self) -> Iterator[Node]:
+        for index in range(self._n_trees):
+            yield self[index]
+
+
+def load_trees(buffer: Union[bytes, bytearray, memoryview, "mmap.mmap"]) -> List[Node]:
+    """
+    Decode every tree of a rule pack.
+
+    Args:
+        buffer: A buffer produced by ``dump_trees``
+
+    Returns:
+        The trees, in the order they were dumped
+
+    Raises:
+        ValueError: If the buffer is not a rule pack of a supported version
+    """
+    return list(RulePack(buffer))
@@ -0,0 +1,437 @@
+"""
+Asyncio predicate evaluation service with micro-batching.
+
+``PredicateServer`` listens on a Unix socket or a localhost TCP port and speaks
+newline-delimited JSON. Each request line is
+``{"id": ..., "predicate": "...", "records": [{...}, ...]}`` and is answered,
+possibly out of order, by ``{"id": ..., "mask": [true, false, ...]}`` or
+``{"id": ..., "error": "..."}``.
+
+Concurrent requests for the same predicate (from any connection) are gathered
+into one batch that is evaluated in a single pass once it holds
+``max_batch_size`` records or ``max_latency`` seconds after its first request,
+whichever comes first. With NumPy installed, the merged records are turned
+into one column per referenced field and evaluated column-wise with
+``evaluate_batch``; otherwise each record goes through the compiled predicate.
+Batches of ``offload_size`` records or more are evaluated in the event loop's
+default executor, so a large batch does not stall other connections. Predicates are compiled through a shared
+``PredicateCache``, so every client benefits from one warm cache. At most
+``max_pending`` requests are in flight at once; beyond that the server stops
+reading from its sockets, which pushes back on clients through the socket
+buffers.
+
+``PredicateClient`` is the matching client; one client can have many requests
+in flight concurrently.
+"""
+
+import asyncio
+from collections import namedtuple
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .batch import _import_numpy, evaluate_batch
+from .cache import PredicateCache, default_cache, normalize_expression
+from .evaluator import Predicate, _path_getter, compile_predicate
+from .parser import FieldPath, Node, build_boolean_syntax_tree, format_field_path, referenced_fields
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+
+ServerStats = namedtuple("ServerStats", ["requests", "records", "batches", "errors"])
+
+_DEFAULT_LIMIT = 16 * 1024 * 1024
+
+
+def _encode(message: Mapping[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+# JSON value types stored in typed arrays, which NumPy compares without calling back into Python
+_COLUMN_DTYPES = {int: "int64", float: "float64", bool: "bool"}
+
+
+def _column(np: Any, values: List[Any]) -> "np.ndarray":
+    """Return a column of JSON values, typed if they all share a numeric or boolean type."""
+    kinds = set(map(type, values))
+    if len(kinds) == 1:
+        dtype = _COLUMN_DTYPES.get(kinds.pop())
+        if dtype is not None:
+            try:
+                return np.array(values, dtype=dtype)
+            except OverflowError:  # integers beyond int64
+                pass
+    # Other columns keep the values as objects, so comparisons follow the evaluator
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+class _RecordColumns(Mapping):
+    """Columns of a list of records, built on first access (conditions never reached cost nothing)."""
+
+    def __init__(self, np: Any, records: List[Mapping[str, Any]], paths: Sequence[FieldPath]):
+        self.np = np
+        self.records = records
+        self.paths = {format_field_path(path): path for path in paths}
+
+    def __getitem__(self, field: str) -> "np.ndarray":
+        path = self.paths[field]
+        if len(path) == 1:
+            name = path[0]
+            values = [record.get(name) for record in self.records]
+        else:
+            values = list(map(_path_getter(path), self.records))
+        return _column(self.np, values)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+
+def _evaluate(tree: Node, predicate: Predicate, items: List[Tuple[List[Mapping[str, Any]], Any]]) -> List[bool]:
+    """Evaluate the merged records of a batch, column-wise when NumPy is available."""
+    records = [record for records, _ in items for record in records]
+    try:
+        np = _import_numpy()
+    except ImportError:
+        return [predicate(record) for record in records]
+    columns = _RecordColumns(np, records, referenced_fields(tree))
+    return evaluate_batch(tree, columns, length=len(records)).tolist()
+
+
+class _Batch:
+    """Requests for one predicate waiting to be evaluated together."""
+
+    __slots__ = ("tree", "predicate", "items", "size", "timer")
+
+    def __init__(self, tree: Node, predicate: Predicate):
+        self.tree = tree
+        self.predicate = predicate
+        self.items: List[Tuple[List[Mapping[str, Any]], "asyncio.Future[List[bool]]"]] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class PredicateServer:
+    """
+    Micro-batching predicate evaluation server.
+
+    Examples:
+        >>> async with PredicateServer(max_latency=0.001) as server:
+        ...     await server.start(path="/tmp/predicates.sock")
+        ...     await server.serve_forever()
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 1024,
+        max_latency: float = 0.001,
+        max_pending: int = 1024,
+        max_request_bytes: int = _DEFAULT_LIMIT,
+        offload_size: int = 8192,
+        cache: Optional[PredicateCache] = default_cache,
+    ):
+        """
+        Args:
+            max_batch_size: Records at which a batch is evaluated immediately
+            max_latency: Longest time, in seconds, a request waits for its batch
+                to fill up
+            max_pending: Requests in flight before the server stops reading
+            max_request_bytes: Longest accepted request line
+            offload_size: Records at which a batch is evaluated in the default
+                executor instead of on the event loop
+            cache: Cache shared by all connections for compiled predicates
+
+        Raises:
+            ValueError: If a limit is not positive
+        """
+        if max_batch_size < 1 or max_pending < 1 or max_request_bytes < 1 or offload_size < 1:
+            raise ValueError("max_batch_size, max_pending, max_request_bytes and offload_size must be positive")
+        if max_latency < 0:
+            raise ValueError("max_latency must not be negative")
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self.max_request_bytes = max_request_bytes
+        self.offload_size = offload_size
+        self.cache = cache
+        self._batches: Dict[str, _Batch] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._requests = self._records = self._evaluated = self._errors = 0
+
+    async def start(self, path: Optional[str] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Start listening on a Unix socket at ``path``, or on ``host``:``port`` otherwise.
+
+        Port 0 picks a free port; see ``address`` for the one chosen.
+        """
+        self._slots = asyncio.Semaphore(self.max_pending)
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path, limit=self.max_request_bytes)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=self.max_request_bytes)
+
+    @property
+    def address(self) -> Any:
+        """The socket address the server listens on (a path, or a ``(host, port)`` tuple)."""
+        if self._server is None:
+            raise RuntimeError("Server is not started")
+        return self._server.sockets[0].getsockname()
+
+    @property
+    def stats(self) -> ServerStats:
+        """Requests and records served, batches evaluated and requests that failed."""
+        return ServerStats(self._requests, self._records, self._evaluated, self._errors)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise RuntimeError("Server is not started")
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections and evaluate any batches still waiting."""
+        for key in list(self._batches):
+            self._flush(key)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "PredicateServer":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks: Set["asyncio.Task[None]"] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    self._errors += 1
+                    writer.write(_encode({"id": None, "error": "Request line too long"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Back-pressure: while every slot is taken, stop reading from this socket.
+                await self._slots.acquire()
+                task = asyncio.ensure_future(self._serve(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _serve(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        try:
+            response = await self._respond(line)
+            async with write_lock:
+                writer.write(_encode(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._slots.release()
+
+    async def _respond(self, line: bytes) -> Dict[str, Any]:
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise ValueError("Request is not valid JSON") from None
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            request_id = request.get("id")
+            expression, records = request.get("predicate"), request.get("records")
+            if not isinstance(expression, str):
+                raise ValueError("Request needs a 'predicate' string")
+            if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+                raise ValueError("Request needs 'records' as a list of JSON objects")
+            key = normalize_expression(expression)
+            batch = self._batches.get(key)
+            if batch is None:
+                # Requests joining a waiting batch reuse its compiled forms
+                batch = _Batch(
+                    build_boolean_syntax_tree(expression, cache=self.cache),
+                    compile_predicate(expression, cache=self.cache),
+                )
+        except ValueError as exc:
+            self._errors += 1
+            return {"id": request_id, "error": str(exc)}
+
+        self._requests += 1
+        self._records += len(records)
+        try:
+            mask = await self._submit(key, batch, records)
+        except Exception as exc:
+            self._errors += 1
+            return {"id": request_id, "error": f"Evaluation failed: {exc}"}
+        return {"id": request_id, "mask": mask}
+
+    def _submit(
+        self,
+        key: str,
+        batch: _Batch,
+        records: List[Mapping[str, Any]],
+    ) -> "asyncio.Future[List[bool]]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batches[key] = batch
+        batch.items.append((records, future))
+        batch.size += len(records)
+        if batch.size >= self.max_batch_size:
+            self._flush(key)
+        elif batch.timer is None:
+            batch.timer = loop.call_later(self.max_latency, self._flush, key)
+        return future
+
+    def _flush(self, key: str) -> None:
+        """Evaluate a batch in one pass, on the loop or in the executor if it is large."""
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self._evaluated += 1
+        if batch.size >= self.offload_size:
+            loop = asyncio.get_running_loop()
+            evaluation = loop.run_in_executor(None, _evaluate, batch.tree, batch.predicate, batch.items)
+            evaluation.add_done_callback(lambda done: self._deliver(batch, done))
+            return
+        try:
+            mask = _evaluate(batch.tree, batch.predicate, batch.items)
+        except Exception as exc:
+            self._fail(batch, exc)
+        else:
+            self._resolve(batch, mask)
+
+    def _deliver(self, batch: _Batch, evaluation: "asyncio.Future[List[bool]]") -> None:
+        if evaluation.cancelled():
+            for _, future in batch.items:
+                future.cancel()
+        elif evaluation.exception() is not None:
+            self._fail(batch, evaluation.exception())
+        else:
+            self._resolve(batch, evaluation.result())
+
+    @staticmethod
+    def _resolve(batch: _Batch, mask: List[bool]) -> None:
+        """Hand each request its slice of the batch mask."""
+        offset = 0
+        for records, future in batch.items:
+            if not future.done():
+                future.set_result(mask[offset:offset + len(records)])
+            offset += len(records)
+
+    @staticmethod
+    def _fail(batch: _Batch, exc: BaseException) -> None:
+        """Fail every request of a batch whose evaluation raised, so none of them hangs."""
+        for _, future in batch.items:
+            if not future.done():
+                future.set_exception(exc)
+
+
+class PredicateClient:
+    """Async client for ``PredicateServer``; requests may be issued concurrently."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._write_lock = asyncio.Lock()
+        self._futures: Dict[int, "asyncio.Future[List[bool]]"] = {}
+        self._next_id = 0
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(
+        cls,
+        path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        limit: int = _DEFAULT_LIMIT,
+    ) -> "PredicateClient":
+        """Connect to a server's Unix socket at ``path``, or to ``host``:``port``."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=limit)
+        elif port is not None:
+            reader, writer = await asyncio.open_connection(host, port, limit=limit)
+        else:
+            raise ValueError("Pass either a socket path or a port")
+        return cls(reader, writer)
+
+    async def evaluate(self, predicate: str, records: Sequence[Mapping[str, Any]]) -> List[bool]:
+        """
+        Evaluate a predicate against records on the server.
+
+        Args:
+            predicate: The logical predicate in string form
+            records: JSON-serializable mappings
+
+        Returns:
+            Whether each record satisfies the predicate
+
+        Raises:
+            ValueError: If the server rejected the request
+            ConnectionError: If the connection closed before the reply arrived
+        """
+        if self._receiver.done():
+            raise ConnectionError("Connection to the predicate server is closed")
+        request_id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._futures[request_id] = future
+        line = _encode({"id": request_id, "predicate": predicate, "records": list(records)})
+        async with self._write_lock:
+            self._writer.write(line)
+            await self._writer.drain()
+        return await future
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._futures.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(ValueError(response["error"]))
+                else:
+                    future.set_result(response["mask"])
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the predicate server closed"))
+            self._futures.clear()
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+        await asyncio.gather(self._receiver, return_exceptions=True)
+
+    async def __aenter__(self) -> "PredicateClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
@@ -0,0 +1,225 @@
+"""
+SQL backend producing parameterized ``WHERE`` clauses from Boolean syntax trees.
+
+``to_sql`` returns the clause text with a placeholder for every literal and
+the literals as a separate parameter list, so predicates that differ only in
+their literals produce identical SQL. Drivers that cache prepared statements
+by text -- like ``sqlite3``, which keeps ``cached_statements`` per connection
+-- then prepare each predicate shape once, and the database can use its
+indexes for the filtering.
+
+Comparison semantics follow the other backends: ``== null`` and ``!= null``
+become ``IS NULL`` and ``IS NOT NULL``, and any other comparison with a NULL
+column is unknown, which ``WHERE`` treats as false; that includes ``NOT IN``.
+``in`` and ``not in`` conditions get one placeholder per member, so their
+clause text depends on the number of members. Unlike in Python,
+comparisons between values of different types follow the database's own rules
+(SQLite, for instance, orders every number before every string), and booleans
+are passed as the driver adapts them (1 and 0 for ``sqlite3``).
+
+Fields must be top-level columns; conditions on nested paths are rejected.
+Nested groups become nested parentheses; databases limit how deep those may
+go (SQLite to 1000 levels by default).
+"""
+
+from collections import namedtuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .cache import PredicateCache, default_cache
+from .parser import MEMBERSHIP_OPS, ComparisonOp, Condition, Node, NodeType, build_boolean_syntax_tree
+
+if TYPE_CHECKING:  # pragma: no cover
+    import sqlite3
+
+
+SQLDialect = namedtuple("SQLDialect", ["name", "placeholder", "quote_open", "quote_close"])
+SQLDialect.__doc__ = """\
+How a SQL dialect writes placeholders and quoted identifiers.
+
+Attributes:
+    name: Name of the dialect
+    placeholder: Placeholder text, formatted with the 1-based parameter
+        ``index`` (e.g. ``"?"``, ``"%s"`` or ``"${index}"``)
+    quote_open: Opening identifier quote
+    quote_close: Closing identifier quote, doubled when it occurs in a name
+"""
+
+DIALECTS: Dict[str, SQLDialect] = {
+    "sqlite": SQLDialect("sqlite", "?", '"', '"'),
+    "postgres": SQLDialect("postgres", "${index}", '"', '"'),
+    "mysql": SQLDialect("mysql", "%s", "`", "`"),
+    "mssql": SQLDialect("mssql", "?", "[", "]"),
+}
+
+_SQL_OPERATORS = {
+    ComparisonOp.EQ: "=",
+    ComparisonOp.NE: "<>",
+    ComparisonOp.GT: ">",
+    ComparisonOp.GE: ">=",
+    ComparisonOp.LT: "<",
+    ComparisonOp.LE: "<=",
+}
+
+_SQL_CONNECTIVES = {NodeType.AND: " AND ", NodeType.OR: " OR "}
+
+
+def _dialect(dialect: Union[str, SQLDialect]) -> SQLDialect:
+    if isinstance(dialect, SQLDialect):
+        return dialect
+    try:
+        return DIALECTS[dialect]
+    except KeyError:
+        raise ValueError(f"Unsupported SQL dialect: {dialect!r} (expected one of {', '.join(DIALECTS)})") from None
+
+
+def quote_identifier(name: str, dialect: Union[str, SQLDialect] = "sqlite") -> str:
+    """Quote a table or column name for a dialect, escaping embedded quotes."""
+    dialect = _dialect(dialect)
+    escaped = name.replace(dialect.quote_close, dialect.quote_close * 2)
+    return f"{dialect.quote_open}{escaped}{dialect.quote_close}"
+
+
+def _condition_sql(condition: Condition, dialect: SQLDialect, quote: bool, params: List[Any]) -> str:
+    if len(condition.path) > 1:
+        raise ValueError(f"Nested field paths are not supported in SQL: {condition}")
+    column = quote_identifier(condition.field, dialect) if quote else condition.field
+    op, value = condition.op, condition.value
+
+    if value is None:
+        if op == ComparisonOp.EQ:
+            return f"{column} IS NULL"
+        if op == ComparisonOp.NE:
+            return f"{column} IS NOT NULL"
+        raise ValueError(f"Cannot compare null with '{op.value}' in condition: {condition}")
+
+    if op in MEMBERSHIP_OPS:
+        placeholders = []
+        for member in sorted(value):
+            params.append(member)
+            placeholders.append(dialect.placeholder.format(index=len(params)))
+        keyword = "IN" if op == ComparisonOp.IN else "NOT IN"
+        return f"{column} {keyword} ({', '.join(placeholders)})"
+
+    params.append(value)
+    return f"{column} {_SQL_OPERATORS[op]} {dialect.placeholder.format(index=len(params))}"
+
+
+def to_sql(
+    tree: Node,
+    dialect: Union[str, SQLDialect] = "sqlite",
+    quote_identifiers: bool = True,
+) -> Tuple[str, List[Any]]:
+    """
+    Convert a Boolean syntax tree to a parameterized SQL condition.
+
+    Examples:
+        >>> to_sql(build_boolean_syntax_tree('@.price > 100 && @.category == "books"'))
+        ('"price" > ? AND "category" = ?', [100.0, 'books'])
+
+    Args:
+        tree: The root node of the Boolean syntax tree
+        dialect: A name from ``DIALECTS`` or a custom ``SQLDialect``
+        quote_identifiers: Whether to quote column names
+
+    Returns:
+        The condition for a ``WHERE`` clause, and its parameters in placeholder order
+
+    Raises:
+        ValueError: If the dialect is unknown or the tree contains an
+            unsupported condition or node
+    """
+    dialect = _dialect(dialect)
+    params: List[Any] = []
+
+    # Post-order walk with an explicit stack; finished sub-clauses collect in ``results``
+    # as (text, whether it needs parentheses inside another connective).
+    results: List[Tuple[str, bool]] = []
+    pending: List[Tuple[Node, bool]] = [(tree, False)]
+    while pending:
+        node, expanded = pending.pop()
+        if node.type == NodeType.CONDITION:
+            results.append((_condition_sql(node.condition, dialect, quote_identifiers, params), False))
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+
+        if not expanded:
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(node.children))
+            continue
+
+        operands = results[len(results) - len(node.children):]
+        del results[len(results) - len(node.children):]
+        if len(operands) == 1:
+            results.append(operands[0])
+            continue
+        text = _SQL_CONNECTIVES[node.type].join(f"({text})" if grouped else text for text, grouped in operands)
+        results.append((text, True))
+
+    return results[0][0], params
+
+
+def compile_sql(
+    expression: str,
+    dialect: Union[str, SQLDialect] = "sqlite",
+    quote_identifiers: bool = True,
+    cache: Optional[PredicateCache] = default_cache,
+) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Convert a logical predicate string directly to a parameterized SQL condition.
+
+    Args:
+        expression: The logical predicate in string form
+        dialect: A name from ``DIALECTS`` or a custom ``SQLDialect``
+        quote_identifiers: Whether to quote column names
+        cache: Cache used to memoize the conversion, or None to disable caching
+
+    Returns:
+        The condition for a ``WHERE`` clause, and its parameters in placeholder order
+
+    Raises:
+        ValueError: If the expression is invalid or contains unsupported operations
+    """
+    def compute(text: str) -> Tuple[str, Tuple[Any, ...]]:
+        clause, params = to_sql(build_boolean_syntax_tree(text), dialect, quote_identifiers)
+        return clause, tuple(params)
+
+    if cache is not None:
+        return cache.get_or_compute(("sql", _dialect(dialect), quote_identifiers), expression, compute)
+    return compute(expression)
+
+
+def query_sqlite(
+    connection: "sqlite3.Connection",
+    table: str,
+    predicate: Union[Node, str],
+    columns: Optional[Sequence[str]] = None,
+    cache: Optional[PredicateCache] = default_cache,
+) -> "sqlite3.Cursor":
+    """
+    Select the rows of a SQLite table matching a predicate.
+
+    Examples:
+        >>> rows = query_sqlite(connection, "products", '@.price < 20', columns=["id"]).fetchall()
+
+    Args:
+        connection: An open ``sqlite3`` connection
+        table: Name of the table to query
+        predicate: The root node of the Boolean syntax tree, or a predicate string
+        columns: Columns to select, or None for all
+        cache: Cache used to memoize the conversion of predicate strings
+
+    Returns:
+        The cursor of the executed ``SELECT``, ready to fetch from
+
+    Raises:
+        ValueError: If the predicate is invalid or contains unsupported operations
+    """
+    if isinstance(predicate, str):
+        clause, params = compile_sql(predicate, "sqlite", cache=cache)
+    else:
+        clause, params = to_sql(predicate, "sqlite")
+    selected = ", ".join(quote_identifier(column) for column in columns) if columns is not None else "*"
+    return connection.execute(f"SELECT {selected} FROM {quote_identifier(table)} WHERE {clause}", params)
@@ -0,0 +1,248 @@
+"""
+Streaming filters over newline-delimited JSON files.
+
+The input file is memory-mapped, so only the line currently being evaluated
+is copied out of the page cache; memory use stays bounded regardless of file
+size. Every line that reaches evaluation is decoded in full with
+``json.loads``: the standard library has no way to decode only some keys, and
+walking the line in Python to pick them out costs more than the C decoder
+spends on the whole record. The decoded record is then tested with a predicate
+compiled by ``compile_predicate``. The optional prefilter is the only
+field-targeted step: it skips lines that mention none of the referenced keys
+without decoding them. Matching lines are passed through byte-for-byte, never
+re-serialized.
+
+``filter_ndjson`` can shard a file by byte range across worker processes:
+every worker writes its matches to a temporary shard file next to the output,
+and the shards are concatenated in order, so the output is identical to a
+single-process run.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .cache import default_cache
+from .evaluator import Predicate, compile_predicate
+from .parser import Node, build_boolean_syntax_tree, referenced_fields
+
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _prepare(predicate: Union[str, Node], prefilter: bool) -> Tuple[Predicate, Optional[List[bytes]]]:
+    """Compile ``predicate`` and, if requested and sound, the key needles for the prefilter."""
+    tree = build_boolean_syntax_tree(predicate, cache=default_cache) if isinstance(predicate, str) else predicate
+    is_match = compile_predicate(tree)
+    needles = None
+    # Skipping lines that mention none of the fields is only sound if a record without them cannot match.
+    if prefilter and not is_match({}):
+        # A record can only match through its top-level keys, nested paths included
+        keys = sorted({path[0] for path in referenced_fields(tree)})
+        needles = [json.dumps(key, ensure_ascii=False).encode() for key in keys]
+    return is_match, needles
+
+
+def _scan(
+    data: "mmap.mmap",
+    start: int,
+    end: int,
+    is_match: Predicate,
+    needles: Optional[List[bytes]],
+    skip_invalid: bool,
+) -> Iterator[Tuple[bytes, Dict[str, Any]]]:
+    """Yield ``(line, record)`` for matching lines that start within ``[start, end)``."""
+    position = start
+    if position > 0 and data[position - 1] != 0x0A:
+        # The line straddling ``start`` belongs to the previous range.
+        newline = data.find(b"\n", position)
+        position = end if newline < 0 else newline + 1
+    size = len(data)
+    while position < end:
+        newline = data.find(b"\n", position)
+        if newline < 0:
+            newline = size
+        line = data[position:newline]
+        line_start = position
+        position = newline + 1
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if not line.strip():
+            continue
+        if needles is not None and not any(needle in line for needle in needles):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            if skip_invalid:
+                continue
+            raise ValueError(f"Invalid JSON object in line starting at byte {line_start}")
+        if is_match(record):
+            yield line, record
+
+
+def _open_map(path: PathLike) -> Tuple[IO[bytes], Optional["mmap.mmap"]]:
+    handle = open(path, "rb")
+    try:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return handle, None  # empty files cannot be mapped
+        return handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except BaseException:
+        handle.close()
+        raise
+
+
+def iter_ndjson(
+    path: PathLike,
+    predicate: Union[str, Node],
+    records: bool = False,
+    prefilter: bool = False,
+    skip_invalid: bool = False,
+) -> Iterator[Union[bytes, Dict[str, Any]]]:
+    """
+    Lazily yield the lines of an NDJSON file that satisfy a predicate.
+
+    Args:
+        path: Path of the newline-delimited JSON file
+        predicate: Predicate string or Boolean syntax tree
+        records: Yield decoded dicts instead of the raw line bytes
+        prefilter: Skip lines that do not contain any referenced field name as
+            a JSON key before decoding them. Only applied when a record lacking
+            all referenced fields cannot match; keys written with escape
+            sequences are not recognized, so leave this off unless keys are
+            written literally.
+        skip_invalid: Skip lines that are not JSON objects instead of raising
+
+    Yields:
+        Matching lines (without the line terminator), or their decoded records
+
+    Raises:
+        ValueError: If the predicate is invalid, or a line is not a JSON object
+            and ``skip_invalid`` is False
+    """
+    is_match, needles = _prepare(predicate, prefilter)
+    handle, data = _open_map(path)
+    try:
+        if data is None:
+            return
+        try:
+            for line, record in _scan(data, 0, len(data), is_match, needles, skip_invalid):
+                yield record if records else line
+        finally:
+            data.close()
+    finally:
+        handle.close()
+
+
+def _write_matches(
+    path: PathLike,
+    predicate: Union[str, Node],
+    output: IO[bytes],
+    start: int,
+    end: Optional[int],
+    prefilter: bool,
+    skip_invalid: bool,
+) -> int:
+    is_match, needles = _prepare(predicate, prefilter)
+    handle, data = _open_map(path)
+    count = 0
+    try:
+        if data is None:
+            return 0
+        try:
+            for line, _ in _scan(data, start, len(data) if end is None else end, is_match, needles, skip_invalid):
+                output.write(line)
+                output.write(b"\n")
+                count += 1
+        finally:
+            data.close()
+    finally:
+        handle.close()
+    return count
+
+
+def _write_shard(
+    path: PathLike,
+    predicate: Union[str, Node],
+    shard_path: str,
+    start: int,
+    end: int,
+    prefilter: bool,
+    skip_invalid: bool,
+) -> int:
+    with open(shard_path, "wb") as shard:
+        return _write_matches(path, predicate, shard, start, end, prefilter, skip_invalid)
+
+
+def filter_ndjson(
+    path: PathLike,
+    predicate: Union[str, Node],
+    output: Union[PathLike, IO[bytes]],
+    workers: int = 1,
+    prefilter: bool = False,
+    skip_invalid: bool = False,
+) -> int:
+    """
+    Write the lines of an NDJSON file that satisfy a predicate to ``output``.
+
+    Examples:
+        >>> filter_ndjson("events.ndjson", '@.level == "error" && @.code >= 500', "errors.ndjson")
+        1234
+
+    Args:
+        path: Path of the newline-delimited JSON file
+        predicate: Predicate string or Boolean syntax tree (passed to worker
+            processes, so prefer strings for very deep trees)
+        output: Output path, or a binary file object to write to
+        workers: Number of processes; above 1 the file is split into that many
+            byte ranges, filtered in parallel, and the results concatenated
+        prefilter: See ``iter_ndjson``
+        skip_invalid: Skip lines that are not JSON objects instead of raising
+
+    Returns:
+        The number of matching lines written
+
+    Raises:
+        ValueError: If the predicate is invalid, ``workers`` is below 1, or a
+            line is not a JSON object and ``skip_invalid`` is False
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if not hasattr(output, "write"):
+        with open(output, "wb") as handle:
+            return filter_ndjson(path, predicate, handle, workers, prefilter, skip_invalid)
+
+    size = os.path.getsize(path)
+    if workers == 1 or size == 0:
+        return _write_matches(path, predicate, output, 0, None, prefilter, skip_invalid)
+
+    from concurrent.futures import ProcessPoolExecutor  # slow to import; only needed here
+
+    bounds = [size * i // workers for i in range(workers + 1)]
+    name = getattr(output, "name", None)
+    directory = os.path.dirname(os.path.abspath(name if isinstance(name, str) else path))
+    shard_paths = []
+    try:
+        for _ in range(workers):
+            descriptor, shard_path = tempfile.mkstemp(prefix=".predicate-shard-", dir=directory)
+            os.close(descriptor)
+            shard_paths.append(shard_path)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_write_shard, path, predicate, shard_path, bounds[i], bounds[i + 1],
+                                prefilter, skip_invalid)
+                for i, shard_path in enumerate(shard_paths)
+            ]
+            count = sum(future.result() for future in futures)
+        for shard_path in shard_paths:
+            with open(shard_path, "rb") as shard:
+                shutil.copyfileobj(shard, output)
+        return count
+    finally:
+        for shard_path in shard_paths:
+            os.unlink(shard_path)
@@ -0,0 +1,393 @@
+"""
+Literal-parameterized predicate templates.
+
+Traffic often repeats one predicate *shape* with different literals --
+``@.user_id == "u1" && @.ts > 100``, ``@.user_id == "u2" && @.ts > 250``, and so
+on. Every variant is a different string, so each misses the caches and is
+parsed and compiled from scratch. ``extract_template`` splits a predicate into
+a ``PredicateTemplate`` (the shape, with a slot per literal) and the literal
+vector. Templates are cached by shape, and each compiles its backends once;
+literals are bound at call time:
+
+* ``evaluate(record, literals)`` / ``bind(literals)`` for Python records
+* ``to_polars(literals)``, which plugs ``pl.lit`` values into a prepared plan
+* ``to_sql(literals)``, whose clause text is the same for every binding
+
+For predicate strings the shape is found by a single regex pass over the text
+that replaces each literal with ``?``, so a cached shape costs no parsing at
+all. ``null`` literals are part of the shape, since ``== null`` compiles to a
+null check rather than a comparison, and literals bound to a template must
+not be None. The member lists of ``in`` and ``not in`` conditions are part of
+the shape as well.
+"""
+
+from itertools import count
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .cache import PredicateCache, default_cache
+from .evaluator import _OPERATORS, Predicate, _compile_condition, _compile_tree, _path_getter
+from .parser import (
+    _COMPARISON_OPS,
+    _CONDITION_RE,
+    _POLARS_METHODS,
+    _TOKEN_RE,
+    MEMBERSHIP_OPS,
+    RANGE_OPS,
+    ComparisonOp,
+    Condition,
+    Node,
+    NodeType,
+    _parse_literal,
+    build_boolean_syntax_tree,
+    parse_condition,
+    tokenize,
+)
+from .polars_backend import _MAX_EXACT_INTEGER, TARGETS, _field_expr, _import_polars, to_polars
+from .sql import SQLDialect, _dialect, to_sql
+
+if TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+
+
+class _Slot:
+    """Placeholder for the literal of a template condition; renders as ``?``."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __repr__(self) -> str:
+        return "?"
+
+
+def _slot_predicate(condition: Condition) -> Predicate:
+    """Compile a slot condition; the compiled tree is called with ``(record, literals)``."""
+    compare, index = _OPERATORS[condition.op], condition.value.index
+    if len(condition.path) > 1:
+        lookup = _path_getter(condition.path)
+
+        def nested_slot_predicate(bound: Tuple[Mapping[str, Any], Sequence[Any]]) -> bool:
+            actual = lookup(bound[0])
+            if actual is None:
+                return False
+            try:
+                return compare(actual, bound[1][index])
+            except TypeError:
+                return False
+
+        return nested_slot_predicate
+    field = condition.field
+
+    def slot_predicate(bound: Tuple[Mapping[str, Any], Sequence[Any]]) -> bool:
+        actual = bound[0].get(field)
+        if actual is None:
+            return False
+        try:
+            return compare(actual, bound[1][index])
+        except TypeError:
+            return False
+
+    return slot_predicate
+
+
+def _template_leaf(condition: Condition) -> Predicate:
+    if isinstance(condition.value, _Slot):
+        return _slot_predicate(condition)
+    fixed = _compile_condition(condition)
+    return lambda bound: fixed(bound[0])
+
+
+class PredicateTemplate:
+    """
+    A predicate shape with a slot for every non-null literal.
+
+    Templates come from ``extract_template`` and are shared through the cache;
+    compiled forms are built on first use and kept on the template.
+
+    Attributes:
+        shape: The predicate text with every slot written as ``?``
+        tree: The shape as a tree; slot conditions have placeholder values
+        slots: ``(field, operator)`` of each slot, in literal order
+    """
+
+    def __init__(self, shape: str, tree: Node, slots: List[Condition]):
+        self.shape = shape
+        self.tree = tree
+        self.slots = [(condition.field, condition.op) for condition in slots]
+        self._python: Optional[Predicate] = None
+        self._polars: Dict[str, List[Tuple[Any, ...]]] = {}
+        self._sql: Dict[Tuple[SQLDialect, bool], Tuple[str, List[Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __repr__(self) -> str:
+        return f"PredicateTemplate({self.shape!r})"
+
+    def _check(self, literals: Sequence[Any]) -> None:
+        if len(literals) != len(self.slots):
+            raise ValueError(f"Template {self.shape!r} takes {len(self.slots)} literals, got {len(literals)}")
+        if any(literal is None for literal in literals):
+            raise ValueError("Template literals must not be None; null comparisons are part of the shape")
+
+    def evaluate(self, record: Mapping[str, Any], literals: Sequence[Any]) -> bool:
+        """
+        Evaluate the template with the given literals against one record.
+
+        The literals are not validated, for speed; ``bind`` checks them once.
+        """
+        program = self._python
+        if program is None:
+            program = self._python = _compile_tree(self.tree, _template_leaf)
+        return program((record, literals))
+
+    def bind(self, literals: Sequence[Any]) -> Predicate:
+        """
+        Return a predicate evaluating the template with fixed literals.
+
+        Raises:
+            ValueError: If the number of literals does not match or one is None
+        """
+        self._check(literals)
+        literals = tuple(literals)
+        program = self._python
+        if program is None:
+            program = self._python = _compile_tree(self.tree, _template_leaf)
+        return lambda record: program((record, literals))
+
+    def _polars_plan(self, target: str) -> List[Tuple[Any, ...]]:
+        """Postfix plan: ``("slot", column, method, index)``, ``("fixed", expr)`` or ``(node type, arity)``."""
+        plan = self._polars.get(target)
+        if plan is not None:
+            return plan
+        pl = _import_polars()
+        plan = []
+        pending: List[Tuple[Node, bool]] = [(self.tree, False)]
+        while pending:
+            node, expanded = pending.pop()
+            if node.type == NodeType.CONDITION:
+                condition = node.condition
+                if isinstance(condition.value, _Slot):
+                    plan.append(("slot", _field_expr(pl, condition.path, target),
+                                 _POLARS_METHODS[condition.op], condition.value.index))
+                else:
+                    plan.append(("fixed", to_polars(node, target)))
+            elif expanded:
+                plan.append((node.type, len(node.children)))
+            else:
+                pending.append((node, True))
+                pending.extend((child, False) for child in reversed(node.children))
+        self._polars[target] = plan
+        return plan
+
+    def to_polars(self, literals: Sequence[Any], target: str = "column") -> "pl.Expr":
+        """
+        Build the Polars expression for the given literals, each bound with ``pl.lit``.
+
+        Args:
+            literals: One value per slot
+            target: ``"column"`` or ``"struct"``, see ``predicate_bst.to_polars``
+
+        Raises:
+            ValueError: If the target is unknown, or the literals do not match the slots
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unsupported target: {target!r} (expected one of {', '.join(TARGETS)})")
+        self._check(literals)
+        pl = _import_polars()
+        stack: List["pl.Expr"] = []
+        for step in self._polars_plan(target):
+            kind = step[0]
+            if kind == "slot":
+                _, column, method, index = step
+                value = literals[index]
+                if isinstance(value, float) and value.is_integer() and abs(value) < _MAX_EXACT_INTEGER:
+                    value = int(value)
+                stack.append(getattr(column, method)(pl.lit(value)))
+            elif kind == "fixed":
+                stack.append(step[1])
+            else:
+                arity = step[1]
+                operands = stack[len(stack) - arity:]
+                del stack[len(stack) - arity:]
+                if arity == 1:
+                    stack.append(operands[0])
+                elif arity == 2:
+                    left, right = operands
+                    stack.append(left.and_(right) if kind == NodeType.AND else left.or_(right))
+                else:
+                    stack.append(pl.all_horizontal(operands) if kind == NodeType.AND else pl.any_horizontal(operands))
+        return stack[0]
+
+    def to_sql(
+        self,
+        literals: Sequence[Any],
+        dialect: Union[str, SQLDialect] = "sqlite",
+        quote_identifiers: bool = True,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Return the parameterized SQL condition and its parameters for the given literals.
+
+        The clause text is generated once per dialect; see ``predicate_bst.to_sql``.
+
+        Raises:
+            ValueError: If the dialect is unknown, or the literals do not match the slots
+        """
+        self._check(literals)
+        key = (_dialect(dialect), quote_identifiers)
+        sql = self._sql.get(key)
+        if sql is None:
+            # Slot objects stand in for the bound parameters; members of fixed
+            # ``in`` conditions are parameters of their own.
+            sql = self._sql[key] = to_sql(self.tree, key[0], quote_identifiers)
+        clause, params = sql
+        return clause, [literals[param.index] if isinstance(param, _Slot) else param for param in params]
+
+    def instantiate(self, literals: Sequence[Any]) -> Node:
+        """
+        Build a tree for the given literals, e.g. for backends without template support.
+
+        Raises:
+            ValueError: If the literals do not match the slots
+        """
+        self._check(literals)
+        return _copy_tree(self.tree, lambda condition: Condition(condition.path, condition.op,
+                                                                  literals[condition.value.index]))[0]
+
+
+def _copy_tree(tree: Node, replace: Any) -> Tuple[Node, List[Condition]]:
+    """
+    Copy a tree, passing each condition with a literal to replace.
+
+    Conditions with ``None`` literals and membership conditions are kept.
+
+    Returns:
+        The copy and the original conditions that were replaced, in reading order
+    """
+    replaced: List[Condition] = []
+    placeholder = Node(NodeType.AND)
+    pending = [(tree, placeholder.children)]
+    while pending:
+        node, siblings = pending.pop()
+        if node.type == NodeType.CONDITION:
+            condition = node.condition
+            if condition.value is not None and condition.op not in MEMBERSHIP_OPS:
+                replaced.append(condition)
+                condition = replace(condition)
+                siblings.append(Node(NodeType.CONDITION, str(condition), condition))
+            else:
+                siblings.append(node)
+            continue
+        if node.type not in (NodeType.AND, NodeType.OR):
+            raise ValueError(f"Unsupported node type: {node.type}")
+        if not node.children:
+            raise ValueError(f"{node.type.value} node has no children")
+        copy = Node(node.type)
+        siblings.append(copy)
+        pending.extend((child, copy.children) for child in reversed(node.children))
+    return placeholder.children[0], replaced
+
+
+def _shape_text(tree: Node) -> str:
+    """Render a template tree as predicate text, parenthesizing nested groups."""
+    parts: List[str] = []
+    pending: List[Union[Node, str]] = [tree]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif item.type == NodeType.CONDITION:
+            parts.append(item.value)
+        else:
+            joiner = " && " if item.type == NodeType.AND else " || "
+            nested = item is not tree
+            if nested:
+                pending.append(")")
+            for i in range(len(item.children) - 1, -1, -1):
+                pending.append(item.children[i])
+                if i:
+                    pending.append(joiner)
+            if nested:
+                pending.append("(")
+    return "".join(parts)
+
+
+def _from_tree(tree: Node) -> Tuple[PredicateTemplate, Tuple[Any, ...]]:
+    counter = count()
+    shape_tree, conditions = _copy_tree(
+        tree, lambda condition: Condition(condition.path, condition.op, _Slot(next(counter)))
+    )
+    literals = tuple(condition.value for condition in conditions)
+    return PredicateTemplate(_shape_text(shape_tree), shape_tree, conditions), literals
+
+
+def _scan(expression: str) -> Tuple[str, Tuple[Any, ...]]:
+    """Replace every non-null, non-list literal of a predicate string with ``?``, in one regex pass."""
+    parts: List[str] = []
+    literals: List[Any] = []
+    position = 0
+    length = len(expression)
+    for match in _TOKEN_RE.finditer(expression):
+        kind = match.lastgroup
+        if kind == "quote" or (kind == "condition" and match.end() < length and expression[match.end()] in "\"'"):
+            tokenize(expression)  # raises the tokenizer's error for unbalanced quotes
+        if kind != "condition":
+            continue
+        text = match.group(kind).rstrip()
+        condition = _CONDITION_RE.match(text)
+        if condition is None:
+            parse_condition(text)  # raises the parser's error for the condition
+        _, op_text, literal = condition.groups()
+        op = _COMPARISON_OPS[" ".join(op_text.split())]
+        if literal == "null" or op in MEMBERSHIP_OPS:
+            continue
+        literals.append(_parse_literal(literal, numeric=op in RANGE_OPS))
+        start = match.start(kind) + condition.start(3)
+        parts.append(expression[position:start])
+        parts.append("?")
+        position = start + len(literal)
+    parts.append(expression[position:])
+    return "".join(parts), tuple(literals)
+
+
+def extract_template(
+    predicate: Union[Node, str],
+    cache: Optional[PredicateCache] = default_cache,
+) -> Tuple[PredicateTemplate, Tuple[Any, ...]]:
+    """
+    Split a predicate into its template and its literals.
+
+    Examples:
+        >>> template, literals = extract_template('@.user_id == "u1" && @.ts > 100')
+        >>> template.shape, literals
+        ('@.user_id == ? && @.ts > ?', ('u1', 100.0))
+        >>> extract_template('@.user_id == "u2" && @.ts > 250')[0] is template
+        True
+        >>> template.bind(("u2", 250.0))({"user_id": "u2", "ts": 300})
+        True
+
+    Args:
+        predicate: The root node of the Boolean syntax tree, or a predicate string
+        cache: Cache holding templates by shape, or None to build a new template
+
+    Returns:
+        The template and one literal per slot, in reading order
+
+    Raises:
+        ValueError: If the predicate is invalid or contains an unsupported node
+    """
+    if isinstance(predicate, str):
+        shape, literals = _scan(predicate)
+        if cache is None:
+            return _from_tree(build_boolean_syntax_tree(predicate))[0], literals
+
+        def compute(_: str) -> PredicateTemplate:
+            return _from_tree(build_boolean_syntax_tree(predicate))[0]
+
+        return cache.get_or_compute("template", shape, compute), literals
+
+    template, literals = _from_tree(predicate)
+    if cache is not None:
+        template = cache.get_or_compute("template", template.shape, lambda _: template)
+    return template, literals
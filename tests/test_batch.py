@@ -0,0 +1,117 @@
+"""Tests for the vectorized NumPy batch evaluator."""
+
+import random
+
+import pytest
+from predicate_bst import (
+    Node,
+    NodeType,
+    build_boolean_syntax_tree,
+    compile_predicate,
+    evaluate_batch
+)
+from predicate_bst import batch
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def columns():
+    return {
+        "category": np.array(["books", "music", "books", "games", "books"]),
+        "price": np.array([12.5, 99.0, 30.0, 5.0, 8.0]),
+        "stock": np.array([0, 3, 1, 7, 2]),
+    }
+
+
+def test_evaluate_batch_simple_conditions(columns):
+    """Test single conditions over columns."""
+    mask = evaluate_batch(build_boolean_syntax_tree('@.category == "books"'), columns)
+    assert mask.dtype == bool
+    assert mask.tolist() == [True, False, True, False, True]
+    assert evaluate_batch(build_boolean_syntax_tree('@.price >= 30'), columns).tolist() == [False, True, True, False, False]
+
+
+def test_evaluate_batch_logical_operators(columns):
+    """Test AND/OR combinations including nesting."""
+    tree = build_boolean_syntax_tree('@.category == "books" && (@.price < 10 || @.stock == 0)')
+    assert evaluate_batch(tree, columns).tolist() == [True, False, False, False, True]
+
+    tree = build_boolean_syntax_tree('@.stock > 5 || (@.category == "music" && @.price > 50)')
+    assert evaluate_batch(tree, columns).tolist() == [False, True, False, True, False]
+
+
+def test_evaluate_batch_structured_array():
+    """Test evaluating a NumPy structured array."""
+    data = np.array([(1, 2.5), (2, 0.5), (3, 9.0)], dtype=[("id", "i8"), ("score", "f8")])
+    tree = build_boolean_syntax_tree('@.id != 2 && @.score > 1')
+    assert evaluate_batch(tree, data).tolist() == [True, False, True]
+
+
+def test_evaluate_batch_missing_and_null_values():
+    """Test missing columns, None values and incompatible types."""
+    data = {"a": [1, None, "x", 4]}
+    assert evaluate_batch(build_boolean_syntax_tree('@.a > 1'), data).tolist() == [False, False, False, True]
+    assert evaluate_batch(build_boolean_syntax_tree('@.a == null'), data).tolist() == [False, True, False, False]
+    assert evaluate_batch(build_boolean_syntax_tree('@.a != null'), data).tolist() == [True, False, True, True]
+    assert evaluate_batch(build_boolean_syntax_tree('@.b == 1'), data).tolist() == [False] * 4
+    assert evaluate_batch(build_boolean_syntax_tree('@.b == null'), data).tolist() == [True] * 4
+    assert evaluate_batch(build_boolean_syntax_tree('@.b == 1'), {}, length=2).tolist() == [False, False]
+
+
+def test_evaluate_batch_narrows_active_rows(monkeypatch, columns):
+    """Test that later children only see rows that are still undecided."""
+    seen = []
+    original = batch._compare
+
+    def recording_compare(np_module, values, op, literal):
+        seen.append(len(values))
+        return original(np_module, values, op, literal)
+
+    monkeypatch.setattr(batch, "_compare", recording_compare)
+    evaluate_batch(build_boolean_syntax_tree('@.category == "books" && @.price < 20 && @.stock > 1'), columns)
+    assert seen == [5, 3, 2]
+
+    seen.clear()
+    evaluate_batch(build_boolean_syntax_tree('@.category == "books" || @.price > 50 || @.stock > 5'), columns)
+    assert seen == [5, 2, 1]
+
+    seen.clear()
+    evaluate_batch(build_boolean_syntax_tree('@.category == "none" && @.price < 20'), columns)
+    assert seen == [5]
+
+
+def test_evaluate_batch_matches_compiled_predicate():
+    """Test agreement with the row-wise evaluator on random data."""
+    rng = random.Random(7)
+    rows = [{"a": rng.randint(0, 9), "b": rng.choice("xyz"), "c": rng.random()} for _ in range(500)]
+    columns = {name: np.array([row[name] for row in rows]) for name in "abc"}
+    expressions = [
+        '@.a > 3 && (@.b == "x" || @.c < 0.5)',
+        '(@.a == 1 || @.a == 2) && @.b != "z" || @.c >= 0.9',
+        '@.b == "y" && @.a <= 5 && (@.c > 0.2 || @.a == 0) || @.a == 9',
+    ]
+    for expression in expressions:
+        tree = build_boolean_syntax_tree(expression)
+        predicate = compile_predicate(tree)
+        assert evaluate_batch(tree, columns).tolist() == [predicate(row) for row in rows], expression
+
+
+def test_evaluate_batch_errors(columns):
+    """Test error handling for invalid input."""
+    with pytest.raises(ValueError):
+        evaluate_batch(Node(NodeType.AND), columns)
+    with pytest.raises(ValueError):
+        evaluate_batch(build_boolean_syntax_tree('@.a == 5 || @.b == 1'), {"a": [1, 2], "b": [1]})
+    with pytest.raises(ValueError):
+        evaluate_batch(build_boolean_syntax_tree('@.a == 1'), {})
+    with pytest.raises(ValueError):
+        evaluate_batch(build_boolean_syntax_tree('@.a == 1'), np.arange(3))
+
+
+def test_evaluate_batch_deep_tree():
+    """Test that 10k levels of nesting evaluate without recursion errors."""
+    prefix = [f'@.x != {i} && (' if i % 2 else f'@.x == {i} || (' for i in range(1, 10_001)]
+    expression = ''.join(prefix) + '@.x == -1' + ')' * 10_000
+    mask = evaluate_batch(build_boolean_syntax_tree(expression), {"x": np.array([-1, 2, 1, 0])})
+    assert mask.tolist() == [True, True, False, False]
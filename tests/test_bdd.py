@@ -0,0 +1,93 @@
+"""Tests for the BDD compilation of Boolean syntax trees."""
+
+import random
+
+from predicate_bst import (
+    BDD,
+    compile_predicate,
+    equivalent,
+    implies
+)
+
+
+def test_equivalent_trees_share_a_node_and_predicate():
+    """Test that equivalent rewrites compile to one node and one callable."""
+    bdd = BDD()
+    left = bdd.from_tree("@.a == 1 && (@.b == 2 || @.c == 3)")
+    right = bdd.from_tree("(@.a == 1 && @.c == 3) || (@.b == 2 && @.a == 1)")
+    assert left == right
+    assert bdd.compile("@.a == 1 && (@.b == 2 || @.c == 3)") is bdd.predicate(right)
+    assert bdd.from_tree("@.a == 1 && @.b == 2") != left
+    assert bdd.size(left) == 3
+    assert [str(atom) for atom in bdd.atoms] == ["@.a == 1", "@.b == 2", "@.c == 3"]
+
+
+def test_constants():
+    """Test that tautologies and contradictions reduce to terminals."""
+    bdd = BDD()
+    a = bdd.from_tree("@.a == 1")
+    b = bdd.from_tree("@.b == 2")
+    assert bdd.conjoin(a, BDD.FALSE) == BDD.FALSE
+    assert bdd.disjoin(a, BDD.TRUE) == BDD.TRUE
+    assert bdd.conjoin(a, a) == a
+    assert bdd.disjoin(bdd.conjoin(a, b), a) == a
+
+
+def test_implication():
+    """Test implication between trees."""
+    assert implies('@.category == "books" && @.price < 20', '@.category == "books"')
+    assert not implies('@.category == "books"', '@.category == "books" && @.price < 20')
+    assert implies("@.a == 1", "@.a == 1 || @.b == 2")
+    assert implies("(@.a == 1 || @.b == 2) && @.c == 3", "@.a == 1 && @.c == 3 || @.b == 2")
+    # Conditions are opaque atoms
+    assert not implies("@.x > 5", "@.x > 1")
+    assert equivalent("@.a == 1 || (@.a == 1 && @.b == 2)", "@.a == 1")
+    assert not equivalent("@.a == 1", "@.a != 1")
+
+
+def test_evaluation_matches_compiled_predicate():
+    """Test BDD evaluation against the compiled predicate on random rules."""
+    rng = random.Random(20)
+    records = [
+        {field: rng.choice([0, 1, 2, None]) for field in "abcd" if rng.random() < 0.9}
+        for _ in range(200)
+    ]
+    bdd = BDD()
+    for _ in range(50):
+        expression = "@.a == 0"
+        for _ in range(rng.randint(1, 8)):
+            condition = f"@.{rng.choice('abcd')} {rng.choice(['==', '!=', '>', '<='])} {rng.randint(0, 2)}"
+            expression = f"({expression}) {rng.choice(['&&', '||'])} {condition}"
+        expected = compile_predicate(expression)
+        node = bdd.from_tree(expression)
+        predicate = bdd.compile(expression)
+        for record in records:
+            assert predicate(record) == bdd.evaluate(node, record) == expected(record), expression
+
+
+def test_conditions_are_tested_at_most_once():
+    """Test that a condition repeated in the tree is evaluated once per record."""
+    calls = []
+
+    class Record(dict):
+        def get(self, key, default=None):
+            calls.append(key)
+            return super().get(key, default)
+
+    predicate = BDD().compile("(@.a == 1 && @.b == 2) || (@.a == 1 && @.c == 3) || (@.a == 1 && @.d == 4)")
+    assert predicate(Record(a=1, d=4))
+    assert calls.count("a") == 1
+
+
+def test_wide_and_deep_trees():
+    """Test that wide chains and deep nesting compile without recursion."""
+    bdd = BDD()
+    wide = bdd.from_tree(" && ".join(f"@.x{i} == {i}" for i in range(3000)))
+    assert bdd.size(wide) == 3000
+    expression = "@.a == 0"
+    for i in range(1, 2000):
+        expression = f"@.a == {i} {'&&' if i % 2 else '||'} ({expression})"
+    node = bdd.from_tree(expression)
+    expected = compile_predicate(expression)
+    for value in (0, 1, 1998, 1999):
+        assert bdd.evaluate(node, {"a": value}) == expected({"a": value})
@@ -0,0 +1,49 @@
+"""Smoke tests for the benchmark suite (the timings themselves are not checked)."""
+
+import json
+
+import pytest
+from predicate_bst import build_boolean_syntax_tree
+
+generators = pytest.importorskip("benchmarks.generators")
+suite = pytest.importorskip("benchmarks.suite")
+
+
+def test_generators_produce_valid_predicates():
+    """Test that every generated shape parses and is deterministic."""
+    for shape, generate in generators.SHAPES.items():
+        expression = generate(50)
+        assert generate(50) == expression, shape
+        build_boolean_syntax_tree(expression)
+    tree = build_boolean_syntax_tree(generators.deep_nesting(30))
+    depth = 0
+    while tree.children:
+        tree, depth = tree.children[-1], depth + 1
+    assert depth == 30
+
+
+def test_build_cases_cover_all_operations():
+    """Test that cases exist for each operation and run."""
+    cases = suite.build_cases([10], rows=20)
+    operations = {name.split("/")[0] for name in cases}
+    assert {"tokenize", "parse_expression", "build_tree", "to_polars_expr", "evaluate"} <= operations
+    for function, _ in cases.values():
+        function()
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    """Test the comparison command and its exit status."""
+    def write(name, timings):
+        path = tmp_path / name
+        path.write_text(json.dumps({"meta": {}, "results": {
+            case: {"seconds": seconds, "median": seconds, "items": 1} for case, seconds in timings.items()
+        }}))
+        return str(path)
+
+    baseline = write("baseline.json", {"a": 1.0, "b": 1.0, "gone": 1.0})
+    current = write("current.json", {"a": 1.05, "b": 1.5, "new": 1.0})
+    assert suite.main(["compare", baseline, current, "--threshold", "0.1"]) == 1
+    output = capsys.readouterr().out
+    assert "REGRESSION" in output.splitlines()[1]
+    assert "REGRESSION" not in output.splitlines()[0]
+    assert suite.main(["compare", baseline, current, "--threshold", "0.6"]) == 0
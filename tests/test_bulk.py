@@ -0,0 +1,67 @@
+"""Tests for parallel bulk parsing."""
+
+import pickle
+
+import pytest
+from predicate_bst import (
+    ConditionTable,
+    build_boolean_syntax_tree,
+    parse_many
+)
+
+
+EXPRESSIONS = [
+    '@.a == 1 && @.b > 2',
+    '@.a == 1',
+    '@.a==1 && @.b>2',
+    '(@.a == 1',
+    '@.c != "x" || (@.a == 1 && @.b > 2)',
+    '@.a == 1 &&',
+    '@.a == 1',
+]
+
+
+@pytest.mark.parametrize("mode,workers", [("thread", 1), ("thread", 3), ("process", 2)])
+def test_parse_many_matches_single_parse(mode, workers):
+    """Test that every mode yields the same trees as build_boolean_syntax_tree."""
+    result = parse_many(EXPRESSIONS, workers=workers, chunksize=1, mode=mode)
+    assert len(result.trees) == len(EXPRESSIONS)
+    # Position 2 differs from position 0 only in whitespace and shares its tree
+    sources = EXPRESSIONS[:2] + EXPRESSIONS[:1] + EXPRESSIONS[3:]
+    for position, expression in enumerate(sources):
+        if position in result.errors:
+            assert result.trees[position] is None
+        else:
+            assert result.trees[position].root.to_dict() == build_boolean_syntax_tree(expression).to_dict()
+    assert result.errors == {3: "Expected closing parenthesis", 5: "Unexpected end of expression"}
+
+
+def test_parse_many_deduplicates():
+    """Test that equivalent inputs share one tree and one condition table."""
+    result = parse_many(EXPRESSIONS, workers=2, chunksize=2, mode="thread")
+    assert result.trees[1] is result.trees[6]
+    assert result.trees[0] is result.trees[2]
+    assert all(tree.table is result.table for tree in result.trees if tree is not None)
+    assert len(result.table) == 3
+
+
+def test_parse_many_shared_table_and_pickling():
+    """Test interning into a caller's table and pickling the results."""
+    table = ConditionTable()
+    table.intern('@.z == 0')
+    result = parse_many(['@.z == 0 || @.a == 1'], table=table)
+    assert result.table is table
+    assert len(table) == 2
+    restored = pickle.loads(pickle.dumps(result.trees))
+    assert restored[0] == result.trees[0]
+
+
+def test_parse_many_arguments():
+    """Test empty input and argument validation."""
+    assert parse_many([]).trees == []
+    with pytest.raises(ValueError):
+        parse_many(['@.a == 1'], mode="fiber")
+    with pytest.raises(ValueError):
+        parse_many(['@.a == 1'], chunksize=0)
+    with pytest.raises(ValueError):
+        parse_many(['@.a == 1'], workers=0)
@@ -0,0 +1,146 @@
+"""Tests for the compiled-predicate cache."""
+
+import threading
+
+import pytest
+from predicate_bst import (
+    NodeType,
+    PredicateCache,
+    build_boolean_syntax_tree,
+    convert_to_polars,
+    normalize_expression
+)
+
+
+def test_normalize_expression_ignores_whitespace():
+    """Test that whitespace-only differences normalize to the same key."""
+    a = normalize_expression('@.a == "x y" && (@.b > 1 || @.c < 2)')
+    b = normalize_expression('  @.a=="x y"&&( @.b>1||@.c <2 ) ')
+    assert a == b
+    assert a == '@.a=="x y"&&(@.b>1||@.c<2)'
+
+
+def test_normalize_expression_preserves_meaningful_whitespace():
+    """Test that whitespace inside quotes and between joinable characters is kept."""
+    assert normalize_expression('@.a == "x  y"') != normalize_expression('@.a == "x y"')
+    assert normalize_expression('@.a == foo   bar') == '@.a==foo bar'
+    assert normalize_expression('@.a == 1 & & @.b == 2') == '@.a==1& &@.b==2'
+    assert normalize_expression('@.a == - 1') == '@.a==- 1'
+    assert normalize_expression('@.a [0] == 1') == '@.a [0]==1'
+
+
+@pytest.mark.parametrize("valid, invalid", [
+    ('@.a == -1', '@.a == - 1'),
+    ('@.a[0] == 1', '@.a [0] == 1'),
+    ('@.a == 1', '@ .a == 1'),
+])
+def test_invalid_variants_do_not_hit_cached_trees(valid, invalid):
+    """Test that whitespace making an expression invalid is part of the key."""
+    cache = PredicateCache()
+    build_boolean_syntax_tree(valid, cache=cache)
+    tree = build_boolean_syntax_tree(invalid, cache=cache)
+    assert tree.value == invalid
+    with pytest.raises(ValueError):
+        tree.condition
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    """Test that repeated lookups are served from the cache."""
+    cache = PredicateCache(maxsize=8)
+    calls = []
+
+    def compute(expression):
+        calls.append(expression)
+        return len(calls)
+
+    assert cache.get_or_compute("kind", '@.a == 1', compute) == 1
+    assert cache.get_or_compute("kind", '@.a==1', compute) == 1
+    assert cache.get_or_compute("other", '@.a == 1', compute) == 2
+    info = cache.info()
+    assert info.hits == 1
+    assert info.misses == 2
+    assert info.currsize == 2
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = PredicateCache(maxsize=2)
+    cache.get_or_compute("k", "a", str)
+    cache.get_or_compute("k", "b", str)
+    cache.get_or_compute("k", "a", str)
+    cache.get_or_compute("k", "c", str)
+    assert cache.info().evictions == 1
+    assert cache.info().currsize == 2
+
+    cache.get_or_compute("k", "a", str)
+    assert cache.info().hits == 2
+
+    cache.get_or_compute("k", "b", str)
+    assert cache.info().misses == 4
+
+
+def test_clear_and_resize():
+    """Test explicit clearing and shrinking of the cache."""
+    cache = PredicateCache(maxsize=4)
+    for name in "abcd":
+        cache.get_or_compute("k", name, str)
+    cache.resize(1)
+    assert len(cache) == 1
+    assert cache.info().evictions == 3
+
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 1, 0)
+
+    with pytest.raises(ValueError):
+        PredicateCache(maxsize=-1)
+
+
+def test_errors_are_not_cached():
+    """Test that failed compilations are retried rather than cached."""
+    cache = PredicateCache()
+    with pytest.raises(ValueError):
+        build_boolean_syntax_tree('(@.a == 1', cache=cache)
+    assert len(cache) == 0
+
+
+def test_build_tree_with_cache_shares_tree():
+    """Test that cached trees are returned for equivalent expressions."""
+    cache = PredicateCache()
+    first = build_boolean_syntax_tree('@.a == 1 && @.b == 2', cache=cache)
+    second = build_boolean_syntax_tree('@.a == 1&&@.b == 2', cache=cache)
+    assert first is second
+    assert first.type == NodeType.AND
+
+
+def test_convert_to_polars_uses_cache():
+    """Test that convert_to_polars memoizes its output."""
+    cache = PredicateCache()
+    expected = 'pl.element().struct.field("key").eq("value")'
+    assert convert_to_polars('@.key == "value"', cache=cache) == expected
+    assert convert_to_polars('@.key  ==  "value"', cache=cache) == expected
+    assert cache.info().hits == 1
+    assert convert_to_polars('@.key == "value"', cache=None) == expected
+
+
+def test_cache_is_thread_safe():
+    """Test concurrent access from several threads."""
+    cache = PredicateCache(maxsize=16)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(200):
+                cache.get_or_compute("k", str((i + offset) % 32), str)
+        except Exception as exc:  # pragma: no cover - only reached on failure
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    info = cache.info()
+    assert not errors
+    assert info.hits + info.misses == 1600
+    assert info.currsize <= 16
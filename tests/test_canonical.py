@@ -0,0 +1,92 @@
+"""Tests for canonical forms of Boolean syntax trees."""
+
+import pytest
+from predicate_bst import (
+    build_boolean_syntax_tree,
+    canonical_key,
+    canonicalize,
+    compile_predicate,
+    to_normal_form
+)
+
+
+RECORDS = [
+    {"a": a, "b": b, "c": c, "d": d}
+    for a in (1, 2) for b in (1, 2) for c in (1, 3) for d in (1, 4)
+] + [{}]
+
+
+def _matches(tree):
+    predicate = compile_predicate(tree, cache=None)
+    return [predicate(record) for record in RECORDS]
+
+
+def test_rewrites_of_a_rule_have_one_canonical_form():
+    """Test reordering, regrouping, duplicates and whitespace."""
+    variants = [
+        "@.a == 1 && (@.b == 2 || @.c == 3)",
+        "(@.c==3 || @.b == 2) && @.a == 1",
+        "((@.a == 1)) && (@.b == 2 || (@.c == 3 || @.b == 2)) && @.a == 1",
+    ]
+    trees = [canonicalize(variant) for variant in variants]
+    assert len({str(tree) for tree in trees}) == 1
+    assert str(trees[0]) == "AND(Condition(@.a == 1), OR(Condition(@.b == 2), Condition(@.c == 3)))"
+    assert len({canonical_key(variant) for variant in variants}) == 1
+    assert canonical_key("@.a == 1") != canonical_key("@.a == true")
+
+
+def test_flattening_and_absorption():
+    """Test merging nested nodes and removing absorbed children."""
+    assert str(canonicalize("@.a == 1 && (@.b == 2 && @.c == 3)")) == (
+        "AND(Condition(@.a == 1), Condition(@.b == 2), Condition(@.c == 3))"
+    )
+    assert str(canonicalize("@.a == 1 || (@.a == 1 && @.b == 2)")) == "Condition(@.a == 1)"
+    assert str(canonicalize("(@.a == 1 || @.b == 2) && (@.b == 2 || @.c == 3 || @.a == 1)")) == (
+        "OR(Condition(@.a == 1), Condition(@.b == 2))"
+    )
+    assert str(canonicalize("@.a == 1 && @.a == 1")) == "Condition(@.a == 1)"
+
+
+def test_canonical_form_preserves_matches():
+    """Test that canonical and normal forms match the same records as the original."""
+    expression = "(@.a == 1 || @.b == 2) && (@.c == 3 || (@.d == 4 && @.a == 1)) || @.b != 2"
+    expected = _matches(build_boolean_syntax_tree(expression))
+    assert _matches(canonicalize(expression)) == expected
+    for form in ("dnf", "cnf"):
+        assert _matches(canonicalize(expression, form=form)) == expected
+
+
+def test_normal_forms():
+    """Test DNF and CNF expansion and the clause bound."""
+    dnf = to_normal_form("(@.a == 1 || @.b == 2) && @.c == 3", "dnf")
+    assert str(dnf) == (
+        "OR(AND(Condition(@.a == 1), Condition(@.c == 3)), AND(Condition(@.b == 2), Condition(@.c == 3)))"
+    )
+    cnf = to_normal_form("(@.a == 1 && @.b == 2) || @.a == 1", "cnf")
+    assert str(cnf) == "Condition(@.a == 1)"
+    # Equivalent rules written in different normal forms get the same key once normalized
+    assert canonical_key("(@.a == 1 && @.c == 3) || (@.c == 3 && @.b == 2)", form="cnf") == (
+        canonical_key("@.c == 3 && (@.b == 2 || @.a == 1)", form="cnf")
+    )
+
+    wide = " && ".join(f"(@.x == {i} || @.y == {i})" for i in range(12))
+    assert to_normal_form(wide, "dnf", max_clauses=256) is None
+    assert str(canonicalize(wide, form="dnf", max_clauses=256)) == str(canonicalize(wide))
+    with pytest.raises(ValueError):
+        to_normal_form("@.a == 1", "nnf")
+
+
+def test_canonicalize_does_not_modify_input():
+    """Test that the input tree is left unchanged."""
+    tree = build_boolean_syntax_tree("@.b == 2 && @.a == 1 && @.b == 2", cache=None)
+    before = tree.to_dict()
+    canonicalize(tree)
+    assert tree.to_dict() == before
+
+
+def test_deep_trees_do_not_recurse():
+    """Test canonicalizing a tree deeper than the recursion limit."""
+    expression = "@.a == 0"
+    for i in range(1, 3000):
+        expression = f"@.a == {i} {'&&' if i % 2 else '||'} ({expression})"
+    assert canonical_key(expression) == canonical_key(expression.replace(" == ", "=="))
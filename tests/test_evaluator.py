@@ -0,0 +1,136 @@
+"""Tests for the compiled Python evaluator."""
+
+import pytest
+from predicate_bst import (
+    Node,
+    NodeType,
+    PredicateCache,
+    build_boolean_syntax_tree,
+    compile_predicate
+)
+
+
+def test_compile_simple_conditions():
+    """Test each comparison operator against a record."""
+    record = {"num": 10, "name": "widget", "flag": True, "missing_value": None}
+    cases = {
+        '@.num == 10': True,
+        '@.num != 10': False,
+        '@.num > 9.5': True,
+        '@.num >= 10': True,
+        '@.num < 10': False,
+        '@.num <= "10"': True,
+        '@.name == "widget"': True,
+        "@.name == 'gadget'": False,
+        '@.flag == true': True,
+        '@.flag != false': True,
+    }
+    for expression, expected in cases.items():
+        assert compile_predicate(build_boolean_syntax_tree(expression))(record) is expected, expression
+
+
+def test_compile_logical_operators():
+    """Test AND/OR combinations including nesting."""
+    predicate = compile_predicate(build_boolean_syntax_tree(
+        '@.k1 == "v1" || (@.k2 == "v2" && (@.k3 >= 1.1 || @.k4 < 0))'
+    ))
+    assert predicate({"k1": "v1"})
+    assert predicate({"k2": "v2", "k3": 2.0})
+    assert predicate({"k2": "v2", "k4": -1})
+    assert not predicate({"k2": "v2", "k3": 1.0, "k4": 0})
+    assert not predicate({})
+
+
+def test_compile_short_circuits():
+    """Test that later operands are skipped once the result is known."""
+    class Record(dict):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.reads = []
+
+        def get(self, key, default=None):
+            self.reads.append(key)
+            return super().get(key, default)
+
+    record = Record(a=1, b=2)
+    compile_predicate(build_boolean_syntax_tree('@.a == 0 && @.b == 2'))(record)
+    assert record.reads == ["a"]
+
+    record = Record(a=1, b=2)
+    compile_predicate(build_boolean_syntax_tree('@.a == 1 || @.b == 2'))(record)
+    assert record.reads == ["a"]
+
+
+def test_compile_missing_and_null_fields():
+    """Test semantics for absent fields, null literals and incompatible types."""
+    assert not compile_predicate(build_boolean_syntax_tree('@.a > 1'))({})
+    assert not compile_predicate(build_boolean_syntax_tree('@.a != 1'))({"a": None})
+    assert compile_predicate(build_boolean_syntax_tree('@.a == null'))({})
+    assert compile_predicate(build_boolean_syntax_tree('@.a != null'))({"a": 0})
+    assert not compile_predicate(build_boolean_syntax_tree('@.a > 1'))({"a": "text"})
+
+
+def test_compile_nested_paths():
+    """Test nested fields and list indexes, where broken paths count as missing fields."""
+    record = {"user": {"name": "ann", "tags": ["a", "b"]}, "items": [{"id": 1}, {"id": 7}]}
+    assert compile_predicate('@.user.name == "ann" && @.items[1].id > 5')(record)
+    assert compile_predicate('@.user.tags[-1] == "b"')(record)
+    for text in ('@.user.name.first == null', '@.items[2].id == null', '@.user.tags[0].x == null',
+                 '@.items.id == null', '@.user.tags[5] == null', '@.missing.x == null'):
+        assert compile_predicate(text)(record), text
+    assert not compile_predicate('@.items[2].id != 1')(record)
+    assert not compile_predicate('@.user.name[0] == "a"')(record)
+
+
+def test_nested_paths_match_flat_fields():
+    """Test that nested conditions follow the same semantics as top-level fields."""
+    values = [None, 1, 2.5, "1", True, [1], {"x": 1}]
+    for condition in ('== 1', '!= 1', '> 1', '<= "1"', '== null', '!= null', 'in [1, 2.5]', 'not in ["1"]'):
+        flat, nested = compile_predicate(f'@.v {condition}'), compile_predicate(f'@.a.v {condition}')
+        for value in values:
+            assert nested({"a": {"v": value}}) == flat({"v": value}), (condition, value)
+
+
+def test_compile_deep_tree():
+    """Test trees nested deeper than the code generation limit."""
+    expression = '@.x == 0'
+    for i in range(1, 120):
+        if i % 2:
+            expression = f'@.x != {i} && ({expression})'
+        else:
+            expression = f'@.x == -{i} || ({expression})'
+    predicate = compile_predicate(build_boolean_syntax_tree(expression))
+    assert predicate({"x": 0}) is True
+    assert predicate({"x": -2}) is True
+    assert predicate({"x": 1}) is False
+    assert predicate({"x": 3}) is False
+
+
+def test_compile_predicate_from_string_uses_cache():
+    """Test compiling a predicate string through the cache."""
+    cache = PredicateCache()
+    first = compile_predicate('@.a == 1', cache=cache)
+    assert compile_predicate(' @.a==1 ', cache=cache) is first
+    assert first({"a": 1})
+    assert cache.info().hits == 1
+
+
+def test_compile_errors():
+    """Test error handling for unsupported conditions and nodes."""
+    with pytest.raises(ValueError):
+        compile_predicate(Node(NodeType.CONDITION, 'a == 1'))
+    with pytest.raises(ValueError):
+        compile_predicate(Node(NodeType.CONDITION, '@.a >= null'))
+    with pytest.raises(ValueError):
+        compile_predicate(Node(NodeType.OR))
+
+
+def test_compile_very_deep_tree():
+    """Test that 10k levels of nesting compile and evaluate without recursion errors."""
+    prefix = [f'@.x != {i} && (' if i % 2 else f'@.x == {i} || (' for i in range(1, 10_001)]
+    expression = ''.join(prefix) + '@.x == -1' + ')' * 10_000
+    predicate = compile_predicate(build_boolean_syntax_tree(expression), cache=None)
+    assert predicate({"x": -1}) is True
+    assert predicate({"x": 2}) is True
+    assert predicate({"x": 1}) is False
+    assert predicate({"x": 0}) is False
@@ -0,0 +1,186 @@
+"""Tests for the multi-predicate matching index."""
+
+import random
+
+import pytest
+from predicate_bst import (
+    Interval,
+    IntervalIndex,
+    PredicateIndex,
+    access_keys,
+    build_boolean_syntax_tree,
+    compile_predicate
+)
+
+
+def test_access_keys():
+    """Test deriving equality and range access keys from trees."""
+    def keys(expression):
+        return access_keys(build_boolean_syntax_tree(expression))
+
+    inf = float("inf")
+    assert keys('@.a == 1') == {("==", "a", 1)}
+    assert keys('@.a > 1') == {("range", "a", Interval(1.0, inf, False, False))}
+    assert keys('@.a == null') is None
+    assert keys('@.a != 1') is None
+    assert keys('@.a > "m"') is None
+    assert keys('@.a == 1 && @.b > 2') == {("==", "a", 1)}
+    assert keys('(@.a == 1 || @.a == 2) && @.b == "x"') == {("==", "b", "x")}
+    assert keys('@.a == 1 || @.b == "x"') == {("==", "a", 1), ("==", "b", "x")}
+    assert keys('@.a == 1 || @.b != 2') is None
+    assert keys('@.a == 1 || @.b <= 2') == {("==", "a", 1), ("range", "b", Interval(-inf, 2.0, False, True))}
+    assert keys('(@.a == 1 || @.c != 3) && (@.b == 2 || @.b == 3)') == {("==", "b", 2), ("==", "b", 3)}
+    assert keys('@.a >= 1 && @.a < 5 && @.b != 0') == {("range", "a", Interval(1.0, 5.0, True, False))}
+    assert keys('@.a > 5 && @.a < 3') == frozenset()
+
+
+def test_interval_index_stab():
+    """Test stabbing queries against a brute-force scan."""
+    rng = random.Random(5)
+    index = IntervalIndex()
+    intervals = {}
+    for i in range(500):
+        low = rng.choice([float("-inf"), rng.randint(0, 100)])
+        high = rng.choice([float("inf"), rng.randint(0, 100)])
+        interval = Interval(low, high, rng.random() < 0.5, rng.random() < 0.5)
+        index.add(i, interval)
+        intervals[i] = interval
+    for i in range(0, 500, 7):
+        index.remove(i)
+        del intervals[i]
+
+    assert len(index) == len(intervals)
+    for value in [-1, 0, 0.5, 17, 50, 99.9, 100, 101]:
+        assert index.stab(value) == {i for i, interval in intervals.items() if value in interval}
+    assert IntervalIndex().stab(3) == set()
+
+
+def test_interval_index_interleaved_updates(monkeypatch):
+    """Test that updates between queries are applied in place, with occasional rebuilds."""
+    rng = random.Random(8)
+    index = IntervalIndex()
+    builds = []
+    build = IntervalIndex._build
+    monkeypatch.setattr(IntervalIndex, "_build", lambda self: builds.append(len(self)) or build(self))
+    intervals = {}
+    for step in range(2_000):
+        key = rng.randrange(300)
+        if key in intervals and rng.random() < 0.4:
+            index.remove(key)
+            del intervals[key]
+        else:
+            low = rng.choice([float("-inf"), rng.randint(0, 100)])
+            high = rng.choice([float("inf"), max(low, 0) + rng.randint(-2, 30)])
+            intervals[key] = Interval(low, high, rng.random() < 0.5, rng.random() < 0.5)
+            index.add(key, intervals[key])
+        value = rng.choice([rng.randint(-1, 101), rng.uniform(-1, 101)])
+        assert index.stab(value) == {k for k, interval in intervals.items() if value in interval}
+    assert len(builds) < 50
+
+
+def test_match_returns_matching_ids_in_registration_order():
+    """Test matching a record against registered predicates."""
+    index = PredicateIndex()
+    index.add("cheap-books", '@.category == "books" && @.price < 20')
+    index.add("music", '@.category == "music"')
+    index.add("expensive", '@.price > 100')
+    index.add("books", build_boolean_syntax_tree('@.category == "books"'))
+
+    assert index.match({"category": "books", "price": 12.5}) == ["cheap-books", "books"]
+    assert index.match({"category": "music", "price": 150}) == ["music", "expensive"]
+    assert index.match({"price": 5}) == []
+    assert len(index) == 4
+    assert "music" in index
+
+
+def test_match_reports_pruned_candidates():
+    """Test that only predicates with satisfied access keys are evaluated."""
+    index = PredicateIndex()
+    for i in range(100):
+        index.add(i, f'@.user == "u{i}" && @.amount > 10')
+    index.add("range", '@.amount > 1000')
+
+    matches, stats = index.match_with_stats({"user": "u7", "amount": 50})
+    assert matches == [7]
+    assert stats.registered == 101
+    assert stats.candidates == 1
+    assert stats.pruned == 100
+    assert stats.matched == 1
+
+
+def test_match_range_predicates():
+    """Test that range conditions are looked up through interval indexes."""
+    index = PredicateIndex()
+    for low in range(0, 1000, 10):
+        index.add(low, f'@.price >= {low} && @.price < {low + 10} && @.qty > 0')
+    index.add("open", '@.price > 995 || @.discount <= 0.5')
+
+    matches, stats = index.match_with_stats({"price": 995, "qty": 1})
+    assert matches == [990]
+    assert stats.candidates == 1
+    assert index.match({"price": 996.5, "qty": 1}) == [990, "open"]
+    assert index.match({"price": 5, "qty": 1, "discount": 0.25}) == [0, "open"]
+    assert index.match({"price": "5", "qty": 1}) == []
+    # Booleans compare as 0 and 1, as in the evaluator
+    assert index.match({"price": True, "qty": 1}) == [0]
+    assert compile_predicate('@.price >= 0 && @.price < 10 && @.qty > 0')({"price": True, "qty": 1})
+    assert index.match({"price": float("nan"), "qty": 1}) == []
+
+    index.remove("open")
+    for low in range(0, 1000, 10):
+        index.remove(low)
+    assert index.candidates({"price": 5, "discount": 0}) == set()
+
+
+def test_remove_and_replace():
+    """Test incremental removal and re-registration."""
+    index = PredicateIndex()
+    index.add("a", '@.x == 1')
+    index.add("b", '@.x == 1 || @.y == 2')
+    index.add("c", '@.z < 0')
+
+    index.remove("b")
+    assert index.match({"x": 1, "y": 2}) == ["a"]
+    index.remove("c")
+    assert index.candidates({"z": -1}) == set()
+
+    index.add("a", '@.y == 2')
+    assert index.match({"x": 1, "y": 2}) == ["a"]
+    assert index.match_with_stats({"x": 1})[1].candidates == 0
+
+    with pytest.raises(KeyError):
+        index.remove("missing")
+
+
+def test_unhashable_and_missing_values():
+    """Test records with unhashable or missing values."""
+    index = PredicateIndex()
+    index.add("a", '@.x == 1')
+    assert index.match({"x": [1]}) == []
+    assert index.match({"x": None}) == []
+    assert index.match({}) == []
+
+
+def test_index_agrees_with_full_scan():
+    """Test that pruning never drops a matching predicate."""
+    rng = random.Random(11)
+    fields = "abc"
+
+    def random_expression(depth):
+        if depth == 0 or rng.random() < 0.4:
+            op = rng.choice(["==", "==", "!=", ">", "<=", ">=", "<"])
+            return f'@.{rng.choice(fields)} {op} {rng.randint(0, 3)}'
+        operator = rng.choice([" && ", " || "])
+        return "(" + operator.join(random_expression(depth - 1) for _ in range(rng.randint(2, 3))) + ")"
+
+    index = PredicateIndex()
+    predicates = {}
+    for i in range(300):
+        expression = random_expression(3)
+        index.add(i, expression)
+        predicates[i] = compile_predicate(expression)
+
+    for _ in range(200):
+        record = {field: rng.choice([0, 1, 1.5, 2, 3, True, False]) for field in fields if rng.random() < 0.9}
+        expected = [i for i, predicate in predicates.items() if predicate(record)]
+        assert index.match(record) == expected
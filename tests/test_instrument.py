@@ -0,0 +1,99 @@
+"""Tests for pipeline instrumentation."""
+
+import pytest
+from predicate_bst import (
+    Histogram,
+    InMemoryCollector,
+    PredicateCache,
+    build_boolean_syntax_tree,
+    collecting,
+    convert_to_polars,
+    get_collector,
+    set_collector
+)
+
+
+def test_disabled_by_default():
+    """Test that no collector is installed unless requested."""
+    assert get_collector() is None
+    build_boolean_syntax_tree('@.a == 1')
+
+
+def test_build_measurement():
+    """Test the measurement reported for building a tree."""
+    measurements = []
+    with collecting(measurements.append):
+        build_boolean_syntax_tree('@.a == 1 && (@.b > 2 || @.c == "x")')
+    assert get_collector() is None
+
+    (measurement,) = measurements
+    assert measurement.operation == "build_boolean_syntax_tree"
+    assert set(measurement.phases) == {"tokenize", "parse"}
+    assert measurement.seconds >= sum(measurement.phases.values())
+    assert measurement.tokens == 7
+    assert (measurement.nodes, measurement.depth) == (5, 3)
+    assert measurement.cache_hit is None
+    assert measurement.error is None
+
+
+def test_cache_hits_and_errors():
+    """Test cache hit reporting and error counting."""
+    measurements = []
+    cache = PredicateCache()
+    with collecting(measurements.append):
+        convert_to_polars('@.a == 1', cache=cache)
+        convert_to_polars('@.a==1', cache=cache)
+        build_boolean_syntax_tree('@.a == 1', cache=cache)
+        build_boolean_syntax_tree('@.a == 1', cache=cache)
+        with pytest.raises(ValueError):
+            build_boolean_syntax_tree('(@.a == 1')
+
+    miss, hit, tree_miss, tree_hit, failure = measurements
+    assert set(miss.phases) == {"tokenize", "parse", "codegen"}
+    assert (miss.cache_hit, hit.cache_hit) == (False, True)
+    assert hit.phases == {} and hit.nodes is None
+    assert (tree_miss.cache_hit, tree_hit.cache_hit) == (False, True)
+    assert (tree_miss.nodes, tree_hit.nodes) == (1, None)
+    assert failure.error == "ValueError"
+    assert failure.nodes is None
+
+
+def test_in_memory_collector():
+    """Test aggregation into counters and histograms."""
+    collector = InMemoryCollector()
+    previous = set_collector(collector)
+    try:
+        for width in (1, 2, 4, 8):
+            build_boolean_syntax_tree(' && '.join(['@.a == 1'] * width))
+        with pytest.raises(ValueError):
+            build_boolean_syntax_tree('@.a == 1 &&')
+    finally:
+        set_collector(previous)
+
+    stats = collector.snapshot()["build_boolean_syntax_tree"]
+    assert stats["calls"] == 5
+    assert stats["errors"] == {"ValueError": 1}
+    assert stats["nodes"]["count"] == 4
+    nodes = collector.histogram("build_boolean_syntax_tree", "nodes")
+    assert (nodes.min, nodes.max) == (1, 9)
+    assert collector.histogram("build_boolean_syntax_tree", "phases", "parse").count == 5
+    assert collector.histogram("convert_to_polars", "seconds") is None
+    # Returned histograms are copies that later measurements leave alone
+    with collecting(collector):
+        build_boolean_syntax_tree(' && '.join(['@.a == 1'] * 16), cache=None)
+    assert (nodes.count, nodes.max) == (4, 9)
+    assert collector.histogram("build_boolean_syntax_tree", "nodes").count == 5
+    collector.reset()
+    assert collector.snapshot() == {}
+
+
+def test_histogram_quantiles():
+    """Test bucket counts and quantile bounds."""
+    histogram = Histogram([1, 2, 4, 8])
+    for value in [0.5, 1, 3, 3, 3, 7, 100]:
+        histogram.observe(value)
+    assert histogram.buckets == [2, 0, 3, 1, 1]
+    assert histogram.quantile(0.5) == 4
+    assert histogram.quantile(1.0) == 100
+    assert histogram.mean == pytest.approx(117.5 / 7)
+    assert Histogram([1]).quantile(0.5) is None
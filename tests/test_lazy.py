@@ -0,0 +1,89 @@
+"""Tests for LazyFrame filtering with pushdown."""
+
+import pytest
+from predicate_bst import (
+    build_boolean_syntax_tree,
+    explain_filtered,
+    filter_lazy,
+    scan_filtered
+)
+
+pl = pytest.importorskip("polars")
+
+
+@pytest.fixture
+def frame():
+    return pl.DataFrame({
+        "id": [1, 2, 3, 4],
+        "status": ["ok", "error", "error", "ok"],
+        "latency": [120, 900, 300, 50],
+        "meta": [{"region": "eu", "retries": 0}, {"region": "us", "retries": 2},
+                 {"region": "eu", "retries": 1}, {"region": "us", "retries": 0}],
+    })
+
+
+def test_filter_lazy_selects_referenced_columns(frame):
+    """Test filtering with projection of the referenced columns only."""
+    result = filter_lazy(frame.lazy(), '@.status == "error" && @.latency > 500').collect()
+    assert result.columns == ["status", "latency"]
+    assert result.rows() == [("error", 900)]
+
+    result = filter_lazy(frame, '@.status == "ok"', select=["id"]).collect()
+    assert result.to_dict(as_series=False) == {"id": [1, 4]}
+    assert filter_lazy(frame, '@.id > 2', select=False).collect().columns == frame.columns
+
+
+def test_filter_lazy_struct_fallback(frame):
+    """Test that fields found only inside a struct column use struct access."""
+    tree = build_boolean_syntax_tree('@.region == "eu" && @.retries > 0')
+    result = filter_lazy(frame, tree).collect()
+    assert result.rows() == [("eu", 1)]
+
+    ambiguous = frame.with_columns(other=pl.col("meta"))
+    with pytest.raises(ValueError, match="ambiguous"):
+        filter_lazy(ambiguous, '@.region == "eu"')
+    with pytest.raises(ValueError, match="not a column"):
+        filter_lazy(frame, '@.missing == 1')
+
+
+def test_filter_lazy_nested_paths(frame, tmp_path):
+    """Test nested paths, selected as sub-fields named by their path."""
+    result = filter_lazy(frame, '@.meta.region == "eu" && @.meta.retries > 0 && @.id < 4').collect()
+    assert result.columns == ["meta.region", "meta.retries", "id"]
+    assert result.rows() == [("eu", 1, 3)]
+
+    path = tmp_path / "events.parquet"
+    frame.write_parquet(path)
+    result = scan_filtered(path, '@.meta.region == "us"', select=["id"]).collect()
+    assert result["id"].to_list() == [2, 4]
+
+
+@pytest.mark.parametrize("suffix,write", [
+    (".parquet", "write_parquet"),
+    (".ndjson", "write_ndjson"),
+    (".csv", "write_csv"),
+])
+def test_scan_filtered_formats(frame, tmp_path, suffix, write):
+    """Test scanning each supported format with the format inferred from the extension."""
+    path = tmp_path / f"events{suffix}"
+    getattr(frame.drop("meta"), write)(path)
+    result = scan_filtered(path, '@.status == "error" || @.id == 1', select=["id"]).collect()
+    assert result["id"].to_list() == [1, 2, 3]
+
+
+def test_explain_shows_pushdown(frame, tmp_path):
+    """Test that the filter and projection are pushed into the Parquet scan."""
+    path = tmp_path / "events.parquet"
+    frame.write_parquet(path)
+    plan = explain_filtered(path, '@.latency >= 300')
+    assert "SELECTION" in plan
+    assert "PROJECT 1/4 COLUMNS" in plan
+    assert "cast" not in plan
+
+
+def test_scan_filtered_format_errors(tmp_path):
+    """Test unknown and uninferable formats."""
+    with pytest.raises(ValueError, match="infer"):
+        scan_filtered(tmp_path / "events.bin", '@.a == 1')
+    with pytest.raises(ValueError, match="Unsupported format"):
+        scan_filtered(tmp_path / "events.bin", '@.a == 1', format="avro")
@@ -0,0 +1,103 @@
+"""Tests for cost- and selectivity-based reordering."""
+
+import random
+
+from predicate_bst import (
+    AdaptivePredicate,
+    PredicateCache,
+    SelectivityStats,
+    build_boolean_syntax_tree,
+    compile_adaptive,
+    compile_predicate,
+    optimize,
+    parse_condition
+)
+
+
+def leaves(tree):
+    return [child.value for child in tree.children]
+
+
+def test_static_ordering():
+    """Test the static heuristics for AND and OR nodes."""
+    tree = build_boolean_syntax_tree('@.name > "m" && @.price > 100 && @.id != 3 && @.category == "books" && @.x == null')
+    assert leaves(optimize(tree)) == ['@.x == null', '@.category == "books"', '@.price > 100', '@.name > "m"', '@.id != 3']
+
+    tree = build_boolean_syntax_tree('@.price > 100 || @.id == 3 || @.id != 4')
+    assert leaves(optimize(tree)) == ['@.id != 4', '@.price > 100', '@.id == 3']
+
+
+def test_optimize_does_not_modify_input():
+    """Test that the input tree (which may be cached) is left untouched."""
+    tree = build_boolean_syntax_tree('@.price > 100 && (@.b > 1 || @.a != 2)')
+    before = tree.to_dict()
+    optimized = optimize(tree)
+    assert tree.to_dict() == before
+    assert str(optimized) == 'AND(Condition(@.price > 100), OR(Condition(@.a != 2), Condition(@.b > 1)))'
+
+
+def test_observed_pass_rates_override_heuristics():
+    """Test that observed statistics replace the static estimates."""
+    tree = build_boolean_syntax_tree('@.status == "active" && @.price > 100')
+    stats = SelectivityStats()
+    predicate = compile_predicate(tree, stats=stats)
+    for i in range(200):
+        predicate({"status": "active", "price": 150 if i % 10 == 0 else 50})
+
+    status = parse_condition('@.status == "active"')
+    assert stats.evaluations(status) == 200
+    assert stats.pass_rate(status) == 1.0
+    assert stats.pass_rate(parse_condition('@.price > 100')) == 0.1
+    assert stats.pass_rate(parse_condition('@.other > 1')) is None
+
+    assert leaves(optimize(tree, stats)) == ['@.price > 100', '@.status == "active"']
+    assert leaves(optimize(tree, stats, min_samples=1000)) == ['@.status == "active"', '@.price > 100']
+
+    stats.clear()
+    assert stats.evaluations(status) == 0
+
+
+def test_adaptive_predicate_reoptimizes():
+    """Test re-optimizing a predicate once enough records have been seen."""
+    predicate = AdaptivePredicate(build_boolean_syntax_tree('@.a == 1 && @.b < 5'), min_samples=50)
+    assert leaves(predicate.tree) == ['@.a == 1', '@.b < 5']
+    assert predicate.reoptimize() is False
+
+    for i in range(100):
+        assert predicate({"a": 1, "b": i}) == (i < 5)
+    assert predicate.ready
+    assert predicate.reoptimize() is True
+    assert leaves(predicate.tree) == ['@.b < 5', '@.a == 1']
+    assert predicate({"a": 1, "b": 2}) is True
+    assert predicate.reoptimize(force=True) is False
+
+
+def test_compile_adaptive_shares_cached_instance():
+    """Test that compile_adaptive returns one shared object per expression."""
+    cache = PredicateCache()
+    first = compile_adaptive('@.a == 1', cache=cache)
+    assert compile_adaptive('@.a==1', cache=cache) is first
+    assert compile_adaptive('@.a == 1', cache=None) is not first
+
+
+def test_optimize_preserves_results():
+    """Test that reordering never changes what a predicate matches."""
+    rng = random.Random(12)
+
+    def random_expression(depth):
+        if depth == 0 or rng.random() < 0.3:
+            op = rng.choice(["==", "!=", ">", "<=", ">=", "<"])
+            value = rng.choice(["0", "1", "2", "null", '"x"']) if op in ("==", "!=") else rng.choice(["0", "1", "2"])
+            return f'@.{rng.choice("ab")} {op} {value}'
+        operator = rng.choice([" && ", " || "])
+        return "(" + operator.join(random_expression(depth - 1) for _ in range(rng.randint(2, 4))) + ")"
+
+    records = [{field: rng.choice([0, 1, 2, None, "x"]) for field in "ab" if rng.random() < 0.8} for _ in range(50)]
+    for _ in range(100):
+        tree = build_boolean_syntax_tree(random_expression(4))
+        stats = SelectivityStats()
+        original = compile_predicate(tree, stats=stats)
+        expected = [original(record) for record in records]
+        for optimized in (optimize(tree), optimize(tree, stats, min_samples=1)):
+            predicate = compile_predicate(optimized)
+            assert [predicate(record) for record in records] == expected
@@ -0,0 +1,129 @@
+"""Tests for the compact array-backed tree representation."""
+
+import pickle
+import sys
+
+import pytest
+from predicate_bst import (
+    ConditionTable,
+    Node,
+    NodeType,
+    PackedTree,
+    Token,
+    TokenType,
+    build_boolean_syntax_tree,
+    compile_predicate,
+    filter_lazy,
+    iter_ndjson,
+    referenced_fields,
+    to_polars_expr
+)
+
+EXPRESSION = '@.k1 == "v1" || (@.k2 == "v2" && (@.k3 >= 1.1 || @.k4 < 0)) || @.k5 != null'
+
+
+def test_nodes_and_tokens_use_slots():
+    """Test that nodes and tokens carry no per-instance __dict__."""
+    assert not hasattr(Node(NodeType.AND), "__dict__")
+    assert not hasattr(Token(TokenType.AND), "__dict__")
+    with pytest.raises(AttributeError):
+        Node(NodeType.AND).extra = 1
+
+
+def test_round_trip():
+    """Test packing and unpacking preserves the tree."""
+    tree = build_boolean_syntax_tree(EXPRESSION)
+    packed = PackedTree.from_node(tree)
+    assert len(packed) == 8
+    unpacked = packed.to_node()
+    assert unpacked.to_dict() == tree.to_dict()
+    assert unpacked.children[1].children[0].condition == tree.children[1].children[0].condition
+
+
+def test_view_matches_node_api():
+    """Test that the packed view behaves like the original nodes."""
+    tree = build_boolean_syntax_tree(EXPRESSION)
+    root = PackedTree.from_node(tree).root
+    assert root.type == NodeType.OR
+    assert root.value is None
+    assert [child.type for child in root.children] == [NodeType.CONDITION, NodeType.AND, NodeType.CONDITION]
+    assert root.children[0].value == '@.k1 == "v1"'
+    assert root.children[0].children == []
+    assert root.children[0].condition.value == "v1"
+    assert str(root) == str(tree)
+    assert root.to_dict() == tree.to_dict()
+    assert root.to_ascii() == tree.to_ascii()
+    with pytest.raises(ValueError):
+        root.condition
+
+
+def test_backends_accept_packed_views():
+    """Test that converters and evaluators work directly on packed trees."""
+    tree = build_boolean_syntax_tree(EXPRESSION)
+    root = PackedTree.from_node(tree).root
+    assert to_polars_expr(root) == to_polars_expr(tree)
+    predicate = compile_predicate(root)
+    assert predicate({"k2": "v2", "k4": -3})
+    assert not predicate({"k2": "v2", "k4": 3, "k5": None})
+
+
+def test_field_readers_accept_packed_views(tmp_path):
+    """Test that field discovery and prefiltering work on packed trees."""
+    tree = build_boolean_syntax_tree('@.a.b == 1 && @.c > 2')
+    root = PackedTree.from_node(tree).root
+    assert referenced_fields(root) == referenced_fields(tree) == (("a", "b"), ("c",))
+
+    path = tmp_path / "records.ndjson"
+    path.write_text('{"a": {"b": 1}, "c": 3}\n{"a": {"b": 2}, "c": 3}\n{"d": 0}\n')
+    assert list(iter_ndjson(path, root, prefilter=True)) == [b'{"a": {"b": 1}, "c": 3}']
+
+    pl = pytest.importorskip("polars")
+    frame = pl.LazyFrame({"a": [{"b": 1}, {"b": 2}], "c": [3, 3]})
+    assert filter_lazy(frame, root).collect().height == 1
+
+
+def test_shared_condition_table_interns_conditions():
+    """Test that trees sharing a table store each distinct condition once."""
+    table = ConditionTable()
+    first = PackedTree.from_node(build_boolean_syntax_tree('@.a == 1 && @.b == 2'), table)
+    second = PackedTree.from_node(build_boolean_syntax_tree('@.b == 2 || @.a == 1 || @.c == 3'), table)
+    assert len(table) == 3
+    assert first.root.children[0].condition is second.root.children[1].condition
+
+
+def test_invalid_conditions_are_kept_as_text():
+    """Test that free-form conditions survive packing and fail only when parsed."""
+    tree = build_boolean_syntax_tree('anything goes && @.a == 1')
+    packed = PackedTree.from_node(tree)
+    assert packed.to_node().children[0].value == 'anything goes'
+    with pytest.raises(ValueError):
+        packed.root.children[0].condition
+
+
+def test_pickle_round_trip():
+    """Test that packed trees pickle compactly."""
+    packed = PackedTree.from_node(build_boolean_syntax_tree(EXPRESSION))
+    restored = pickle.loads(pickle.dumps(packed))
+    assert restored == packed
+    assert restored.root.children[1].children[1].children[0].condition.value == 1.1
+
+
+def test_packed_tree_is_smaller_than_nodes():
+    """Test that the packed buffer is a fraction of the node objects' size."""
+    tree = build_boolean_syntax_tree(' || '.join(f'(@.a == {i} && @.b != "x{i}")' for i in range(200)))
+    node_bytes = 0
+    pending = [tree]
+    while pending:
+        node = pending.pop()
+        node_bytes += sys.getsizeof(node) + sys.getsizeof(node.children)
+        pending.extend(node.children)
+    assert PackedTree.from_node(tree).nbytes * 4 < node_bytes
+
+
+def test_invalid_buffer():
+    """Test that malformed buffers are rejected."""
+    from array import array
+    with pytest.raises(ValueError):
+        PackedTree(array("I", [0, 1]), ConditionTable())
+    with pytest.raises(ValueError):
+        PackedTree(array("i", [2, 0, 0]), ConditionTable())
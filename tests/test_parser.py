@@ -1,11 +1,20 @@
 """Tests for the predicate_bst package."""
 
+import sys
+
 import pytest
 from predicate_bst import (
     NodeType,
     Node,
+    ComparisonOp,
+    Condition,
+    parse_condition,
+    parse_field_path,
+    format_field_path,
+    referenced_fields,
     TokenType,
     Token,
+    iter_tokens,
     tokenize,
     parse_expression,
     build_boolean_syntax_tree,
@@ -66,6 +75,37 @@ def test_tokenize_with_quoted_strings():
     assert tokens[0].value == '@.key == "value with && and || inside"'
 
 
+def test_tokenize_operator_characters_inside_conditions():
+    """Test that single & and | characters and inner whitespace belong to conditions."""
+    tokens = tokenize('  @.a == "x"&@.b\t||@.c | d  ')
+    assert [(t.type, t.value) for t in tokens] == [
+        (TokenType.CONDITION, '@.a == "x"&@.b'),
+        (TokenType.OR, None),
+        (TokenType.CONDITION, '@.c | d'),
+    ]
+    assert tokenize('   ') == []
+
+
+def test_tokenize_unbalanced_quotes_report_positions():
+    """Test that unbalanced quote errors report the condition and quote positions."""
+    with pytest.raises(ValueError, match="starting at position 4: unclosed \" at position 13"):
+        tokenize('(   @.key == "unbalanced')
+    with pytest.raises(ValueError, match="starting at position 14: unclosed ' at position 14"):
+        tokenize('@.a == "x" && \'oops')
+    # A quote of the other kind inside a quoted string is not a delimiter
+    assert tokenize('@.a == "it\'s"')[0].value == '@.a == "it\'s"'
+
+
+def test_iter_tokens_is_lazy():
+    """Test that iter_tokens yields tokens before scanning the whole expression."""
+    tokens = iter_tokens('@.a == 1 && (@.b == "unbalanced')
+    assert next(tokens).value == '@.a == 1'
+    assert next(tokens).type == TokenType.AND
+    assert next(tokens).type == TokenType.LEFT_PAREN
+    with pytest.raises(ValueError):
+        next(tokens)
+
+
 def test_build_tree_simple_condition():
     """Test building a tree from a simple condition."""
     expression = '@.price > 150.35'
@@ -106,6 +146,21 @@ def test_build_tree_complex_expression():
     assert tree.children[1].children[1].children[1].value == '@.k4 < 0'
 
 
+def test_build_tree_flattens_chains():
+    """Test that chains of the same operator produce a single n-ary node."""
+    tree = build_boolean_syntax_tree('@.a == 1 && @.b == 2 && (@.c == 3 && @.d == 4) || @.e == 5 || @.f == 6')
+    assert tree.type == NodeType.OR
+    assert len(tree.children) == 3
+    assert tree.children[0].type == NodeType.AND
+    assert [child.value for child in tree.children[0].children] == [
+        '@.a == 1', '@.b == 2', '@.c == 3', '@.d == 4'
+    ]
+    assert [child.value for child in tree.children[1:]] == ['@.e == 5', '@.f == 6']
+
+    tree = build_boolean_syntax_tree('@.a == 1 || (@.b == 2 || @.c == 3)')
+    assert [child.value for child in tree.children] == ['@.a == 1', '@.b == 2', '@.c == 3']
+
+
 def test_build_tree_error_handling():
     """Test error handling for invalid expressions."""
     # Test empty expression
@@ -155,6 +210,72 @@ def test_node_str_representation():
     assert str(and_node) == 'AND(Condition(@.key1 == "value1"), Condition(@.key2 == "value2"))'
 
 
+def test_parse_condition_typed_literals():
+    """Test parsing conditions into field path, operator and typed literal."""
+    cases = {
+        '@.name == "widget"': (ComparisonOp.EQ, "widget"),
+        "@.name != 'it\"s'": (ComparisonOp.NE, 'it"s'),
+        '@.count == 3': (ComparisonOp.EQ, 3),
+        '@.ratio == -0.5': (ComparisonOp.EQ, -0.5),
+        '@.flag == true': (ComparisonOp.EQ, True),
+        '@.flag != false': (ComparisonOp.NE, False),
+        '@.gone == null': (ComparisonOp.EQ, None),
+        '@.count > 3': (ComparisonOp.GT, 3.0),
+        '@.count <= "7"': (ComparisonOp.LE, 7.0),
+        '@.name >= "m"': (ComparisonOp.GE, "m"),
+    }
+    for text, (op, value) in cases.items():
+        condition = parse_condition(text)
+        assert condition.path == (text.split()[0][2:],)
+        assert condition.op == op
+        assert condition.value == value and type(condition.value) is type(value), text
+
+
+def test_parse_condition_operators_inside_literals():
+    """Test that operator characters inside quoted literals are not mistaken for the operator."""
+    condition = parse_condition('@.s == "a>=b"')
+    assert (condition.field, condition.op, condition.value) == ("s", ComparisonOp.EQ, "a>=b")
+    condition = parse_condition("@.s < 'x==y'")
+    assert (condition.op, condition.value) == (ComparisonOp.LT, "x==y")
+    assert to_polars_expr(build_boolean_syntax_tree('@.s == "a>=b"')) == 'pl.element().struct.field("s").eq("a>=b")'
+
+
+def test_parse_condition_errors():
+    """Test error handling for malformed conditions."""
+    for text in ['price > 1', '@.a ~ 1', '@.a == foo', '@.a == "x" "y"', '@.a ==']:
+        with pytest.raises(ValueError):
+            parse_condition(text)
+
+
+def test_condition_equality_and_text():
+    """Test condition identity and canonical text."""
+    assert parse_condition('@.a==1') == parse_condition('@.a  ==  1')
+    assert parse_condition('@.a == 1') != parse_condition('@.a == true')
+    assert len({parse_condition('@.a > 1'), parse_condition('@.a > 1.0')}) == 1
+    for text in ['@.a == "x y"', "@.a != 'say \"hi\"'", '@.a > 2.5', '@.a == null', '@.a == false']:
+        assert str(parse_condition(text)) == text
+        assert parse_condition(str(parse_condition(text))) == parse_condition(text)
+
+
+def test_condition_parsed_once_and_cached_on_node():
+    """Test that conditions are parsed at build time and cached on the node."""
+    tree = build_boolean_syntax_tree('@.a == 1 && @.b > 2')
+    condition = tree.children[0].condition
+    assert isinstance(condition, Condition)
+    assert tree.children[0].condition is condition
+
+    node = Node(NodeType.CONDITION, '@.c != "z"')
+    assert node.condition is node.condition
+    assert node.condition.value == "z"
+
+    # Free-form conditions still parse into trees; backends reject them when converting
+    tree = build_boolean_syntax_tree('anything goes && @.a == 1')
+    with pytest.raises(ValueError):
+        tree.children[0].condition
+    with pytest.raises(ValueError):
+        tree.condition
+
+
 def test_to_polars_expr_equality_operations():
     """Test converting equality operations to Polars expressions."""
     # Test == operation
@@ -166,6 +287,16 @@ def test_to_polars_expr_equality_operations():
     assert to_polars_expr(ne_node) == 'pl.element().struct.field("key").ne("value")'
 
 
+def test_to_polars_expr_literal_types():
+    """Test converting typed literals and null checks to Polars expressions."""
+    assert to_polars_expr(Node(NodeType.CONDITION, '@.f == true')) == 'pl.element().struct.field("f").eq(True)'
+    assert to_polars_expr(Node(NodeType.CONDITION, "@.s == 'it\"s'")) == 'pl.element().struct.field("s").eq("it\\"s")'
+    assert to_polars_expr(Node(NodeType.CONDITION, '@.n == null')) == 'pl.element().struct.field("n").is_null()'
+    assert to_polars_expr(Node(NodeType.CONDITION, '@.n != null')) == 'pl.element().struct.field("n").is_not_null()'
+    with pytest.raises(ValueError):
+        to_polars_expr(Node(NodeType.CONDITION, '@.n < null'))
+
+
 def test_to_polars_expr_numeric_comparisons():
     """Test converting numeric comparison operations to Polars expressions."""
     # Test > operation
@@ -225,6 +356,21 @@ def test_to_polars_expr_complex_tree():
     assert to_polars_expr(complex_node) == expected
 
 
+def test_to_polars_expr_variadic_chains():
+    """Test that n-ary nodes convert to all_horizontal/any_horizontal calls."""
+    tree = build_boolean_syntax_tree('@.a == 1 && @.b == 2 && (@.c > 3 || @.d > 4 || @.e > 5)')
+    expected = (
+        'pl.all_horizontal(pl.element().struct.field("a").eq(1), pl.element().struct.field("b").eq(2), '
+        'pl.any_horizontal(pl.element().struct.field("c").gt(3.0), pl.element().struct.field("d").gt(4.0), '
+        'pl.element().struct.field("e").gt(5.0)))'
+    )
+    assert to_polars_expr(tree) == expected
+
+    single = Node(NodeType.AND)
+    single.children = [Node(NodeType.CONDITION, '@.a == 1')]
+    assert to_polars_expr(single) == 'pl.element().struct.field("a").eq(1)'
+
+
 def test_convert_to_polars():
     """Test the convenience function to convert expressions directly to Polars."""
     # Test simple expression
@@ -234,4 +380,115 @@ def test_convert_to_polars():
     # Test complex expression
     complex_expr = '@.key1 == "value1" && (@.key2 != "value2" || @.num > 10)'
     expected = '(pl.element().struct.field("key1").eq("value1")).and_((pl.element().struct.field("key2").ne("value2")).or_(pl.element().struct.field("num").gt(10.0)))'
-    assert convert_to_polars(complex_expr) == expected
\ No newline at end of file
+    assert convert_to_polars(complex_expr) == expected
+
+
+def _long_chain(terms, operator='||'):
+    return f' {operator} '.join(f'@.k{i} == {i}' for i in range(terms))
+
+
+def _deep_nesting(depth):
+    prefix = []
+    for i in range(depth):
+        operator = '&&' if i % 2 else '||'
+        prefix.append(f'@.x == {i} {operator} (')
+    return ''.join(prefix) + '@.x == -1' + ')' * depth
+
+
+def _tree_depth(tree):
+    depth = 0
+    pending = [(tree, 1)]
+    while pending:
+        node, level = pending.pop()
+        depth = max(depth, level)
+        pending.extend((child, level + 1) for child in node.children)
+    return depth
+
+
+def test_parse_and_convert_long_chain():
+    """Test that a 100k-term chain parses and converts without recursion errors."""
+    tree = build_boolean_syntax_tree(_long_chain(100_000))
+    assert tree.type == NodeType.OR
+
+    assert len(tree.children) == 100_000
+
+    polars_expr = to_polars_expr(tree)
+    assert polars_expr.startswith('pl.any_horizontal(pl.element().struct.field("k0").eq(0), ')
+    assert polars_expr.endswith(', pl.element().struct.field("k99999").eq(99999))')
+
+    assert tree.to_dict()["type"] == "OR"
+    assert str(tree).endswith('Condition(@.k99999 == 99999))')
+
+
+def test_parse_and_convert_deep_nesting():
+    """Test that 10k levels of nested parentheses parse and convert without recursion errors."""
+    tree = build_boolean_syntax_tree(_deep_nesting(10_000))
+    assert _tree_depth(tree) == 10_001
+
+    polars_expr = to_polars_expr(tree)
+    assert polars_expr.count('.or_(') == 5_000
+    assert polars_expr.count('.and_(') == 5_000
+
+    tree_dict = tree.to_dict()
+    assert tree_dict["children"][1]["type"] == "AND"
+    assert str(tree).count('Condition(') == 10_001
+    assert len(build_boolean_syntax_tree(_deep_nesting(1_500)).to_ascii().splitlines()) == 3_001
+
+
+def test_parse_and_convert_scale_linearly():
+    """Test that parsing and conversion make a number of calls linear in the input size."""
+    def calls(expression):
+        count = 0
+
+        def profile(frame, event, arg):
+            nonlocal count
+            if event in ("call", "c_call"):
+                count += 1
+
+        sys.setprofile(profile)
+        try:
+            to_polars_expr(build_boolean_syntax_tree(expression, cache=None))
+        finally:
+            sys.setprofile(None)
+        return count
+
+    # Function calls are deterministic, unlike wall-clock time; wall-clock scaling is
+    # tracked by benchmarks/suite.py.
+    for make_expression in (_long_chain, _deep_nesting):
+        small, large = calls(make_expression(1_000)), calls(make_expression(10_000))
+        assert large <= small * 11
+
+
+def test_parse_nested_field_paths():
+    """Test conditions on nested fields and list elements."""
+    condition = parse_condition('@.items[0].id >= 2')
+    assert condition.path == ("items", 0, "id")
+    assert condition.field == "items[0].id"
+    assert str(condition) == "@.items[0].id >= 2.0"
+    assert parse_condition("@.a.b.c == 1").path == ("a", "b", "c")
+    assert parse_condition("@.tags[-1] == 'x'").path == ("tags", -1)
+
+    assert parse_field_path("a.b[2][0].c") == ("a", "b", 2, 0, "c")
+    assert format_field_path(("a", "b", 2, 0, "c")) == "a.b[2][0].c"
+    for text in ("", "[0]", ".a", "a..b", "a[0]b", "a[x]"):
+        with pytest.raises(ValueError):
+            parse_field_path(text)
+    for text in ("@.a. == 1", "@.a[] == 1", "@.a[0 == 1"):
+        with pytest.raises(ValueError):
+            parse_condition(text)
+
+
+def test_nested_paths_in_polars_expression_strings():
+    """Test that nested paths become chained struct and list accessors."""
+    assert to_polars_expr(build_boolean_syntax_tree('@.items[0].id == 3')) == (
+        'pl.element().struct.field("items").list.get(0, null_on_oob=True).struct.field("id").eq(3)'
+    )
+
+
+def test_referenced_fields():
+    """Test the referenced field paths, in order of first appearance and cached on the tree."""
+    tree = build_boolean_syntax_tree('@.b == 1 || (@.a.x > 2 && @.b != 3) || @.items[1].id in [1, 2]')
+    fields = referenced_fields(tree)
+    assert fields == (("b",), ("a", "x"), ("items", 1, "id"))
+    assert referenced_fields(tree) is fields
+    assert referenced_fields(tree.children[1]) == (("a", "x"), ("b",))
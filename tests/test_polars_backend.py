@@ -0,0 +1,137 @@
+"""Tests for the Polars expression-object backend."""
+
+import subprocess
+import sys
+
+import pytest
+from predicate_bst import (
+    Node,
+    NodeType,
+    PredicateCache,
+    build_boolean_syntax_tree,
+    compile_polars,
+    to_polars
+)
+
+pl = pytest.importorskip("polars")
+
+
+@pytest.fixture
+def df():
+    return pl.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "category": ["electronics", "books", "electronics", "clothing", "books"],
+        "price": [120.50, 15.99, 89.99, 45.00, 9.99],
+        "in_stock": [True, True, False, True, None],
+    })
+
+
+def test_to_polars_returns_expr():
+    """Test that to_polars builds a polars.Expr."""
+    tree = build_boolean_syntax_tree('@.price > 100')
+    assert isinstance(to_polars(tree), pl.Expr)
+
+
+def test_to_polars_filters_columns(df):
+    """Test filtering top-level columns with a compiled expression."""
+    tree = build_boolean_syntax_tree('@.price > 100 || (@.category == "books" && @.price <= 10)')
+    assert df.filter(to_polars(tree))["id"].to_list() == [1, 5]
+
+
+def test_to_polars_comparison_operators(df):
+    """Test each comparison operator."""
+    cases = {
+        '@.id == 2': [2],
+        '@.id != 2': [1, 3, 4, 5],
+        '@.id > 3': [4, 5],
+        '@.id >= 3': [3, 4, 5],
+        '@.id < 2': [1],
+        '@.id <= 2': [1, 2],
+        '@.in_stock == true': [1, 2, 4],
+        '@.in_stock == null': [5],
+        '@.in_stock != null': [1, 2, 3, 4],
+        "@.category == 'clothing'": [4],
+    }
+    for expression, expected in cases.items():
+        result = df.filter(to_polars(build_boolean_syntax_tree(expression)))
+        assert result["id"].to_list() == expected, expression
+
+
+def test_to_polars_literals_with_unusual_quoting(df):
+    """Test literals that would break generated code strings."""
+    frame = pl.DataFrame({"s": ['say "hi"', "it's", "a>=b"]})
+    assert frame.filter(to_polars(Node(NodeType.CONDITION, "@.s == 'say \"hi\"'")))["s"].to_list() == ['say "hi"']
+    assert frame.filter(to_polars(Node(NodeType.CONDITION, '@.s == "it\'s"')))["s"].to_list() == ["it's"]
+
+
+def test_to_polars_variadic_chains(df):
+    """Test that long chains become horizontal reductions with Kleene semantics."""
+    tree = build_boolean_syntax_tree('@.id > 1 && @.id < 5 && @.category != "books" || @.id == 5 || @.price < 0')
+    assert len(tree.children) == 3
+    assert df.filter(to_polars(tree))["id"].to_list() == [3, 4, 5]
+
+    tree = build_boolean_syntax_tree('@.in_stock == true && @.id > 0 && @.price > 0')
+    assert df.filter(to_polars(tree))["id"].to_list() == [1, 2, 4]
+
+
+def test_to_polars_lazy_frame(df):
+    """Test that the expression can be used with LazyFrame.filter."""
+    result = df.lazy().filter(compile_polars('@.category == "electronics"')).collect()
+    assert result["id"].to_list() == [1, 3]
+
+
+def test_to_polars_struct_target():
+    """Test targeting struct fields of list elements."""
+    frame = pl.DataFrame({"items": [[{"a": 1, "b": "x"}, {"a": 5, "b": "y"}], [{"a": 7, "b": "z"}]]})
+    expr = compile_polars('@.a > 2 && @.b != "z"', target="struct")
+    result = frame.select(pl.col("items").list.eval(pl.element().filter(expr)).list.len())
+    assert result["items"].to_list() == [1, 0]
+
+
+def test_to_polars_nested_paths():
+    """Test nested struct fields and list elements, with short lists giving null."""
+    frame = pl.DataFrame({
+        "user": [{"name": "ann", "age": 30}, {"name": "bob", "age": 20}, {"name": "cy", "age": 40}],
+        "items": [[{"id": 1}], [], [{"id": 2}, {"id": 3}]],
+    })
+    expr = compile_polars('@.user.age >= 30 && (@.items[0].id == 1 || @.items[-1].id == 3)')
+    assert frame.filter(expr)["user"].struct.field("name").to_list() == ["ann", "cy"]
+    assert frame.filter(compile_polars('@.items[0].id == null')).height == 1
+
+
+def test_to_polars_errors():
+    """Test error handling for unsupported input."""
+    with pytest.raises(ValueError):
+        to_polars(build_boolean_syntax_tree('@.a == 1'), target="sql")
+    with pytest.raises(ValueError):
+        to_polars(Node(NodeType.CONDITION, 'price > 1'))
+    with pytest.raises(ValueError):
+        to_polars(Node(NodeType.CONDITION, '@.a ~ 1'))
+    with pytest.raises(ValueError):
+        to_polars(Node(NodeType.CONDITION, '@.a > null'))
+    with pytest.raises(ValueError):
+        to_polars(Node(NodeType.AND))
+
+
+def test_compile_polars_uses_cache():
+    """Test that compile_polars memoizes per target."""
+    cache = PredicateCache()
+    first = compile_polars('@.a == 1', cache=cache)
+    assert compile_polars('@.a==1', cache=cache) is first
+    assert compile_polars('@.a == 1', target="struct", cache=cache) is not first
+    assert cache.info().hits == 1
+
+
+def test_import_does_not_load_polars():
+    """Test that importing the package does not import polars."""
+    code = "import sys, predicate_bst; print('polars' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_to_polars_deep_tree():
+    """Test that nesting beyond the recursion limit converts without recursion errors."""
+    prefix = [f'@.x != {i} && (' if i % 2 else f'@.x == {i} || (' for i in range(1, 1_201)]
+    expression = ''.join(prefix) + '@.x == -1' + ')' * 1_200
+    frame = pl.DataFrame({"x": [-1, 2, 1, 0]})
+    assert frame.filter(to_polars(build_boolean_syntax_tree(expression)))["x"].to_list() == [-1, 2]
@@ -0,0 +1,98 @@
+"""Tests for the filter-result cache."""
+
+import random
+
+import pytest
+from predicate_bst import (
+    FilterResultCache,
+    compile_polars
+)
+
+pl = pytest.importorskip("polars")
+
+
+@pytest.fixture
+def frame():
+    rng = random.Random(21)
+    return pl.DataFrame({
+        "category": [rng.choice(["books", "music", "games"]) for _ in range(1000)],
+        "price": [rng.choice([None, *range(50)]) for _ in range(1000)],
+        "rating": [rng.randint(1, 5) for _ in range(1000)],
+    })
+
+
+def _expected(frame, expression):
+    return frame.filter(compile_polars(expression))
+
+
+def test_stricter_predicates_filter_cached_results(frame):
+    """Test that a drill-down is answered from the result it narrows."""
+    results = FilterResultCache()
+    books = results.filter(frame, '@.category == "books"')
+    assert books.equals(_expected(frame, '@.category == "books"'))
+    assert results.info().misses == 1
+
+    expression = '@.category == "books" && @.price < 20'
+    cheap = results.filter(frame, expression)
+    assert cheap.equals(_expected(frame, expression))
+    assert results.info().subsumed == 1
+
+    # The smallest implied result is used as the base
+    expression = '@.price < 20 && @.category == "books" && @.rating >= 4'
+    assert results.filter(frame, expression).equals(_expected(frame, expression))
+    info = results.info()
+    assert (info.hits, info.subsumed, info.misses, info.entries) == (0, 2, 1, 3)
+
+
+def test_equivalent_predicates_are_hits(frame):
+    """Test that rewrites of a cached predicate return the cached frame."""
+    results = FilterResultCache()
+    first = results.filter(frame, '@.category == "books" && (@.rating > 3 || @.price == 5)')
+    assert results.filter(frame, '(@.price == 5 || @.rating > 3) && @.category=="books"') is first
+    assert results.filter(frame, '(@.category == "books" && @.rating > 3) || (@.price == 5 && @.category == "books")') is first
+    assert results.info().hits == 2
+
+
+def test_unrelated_predicates_miss(frame):
+    """Test that a predicate not implying any cached one filters the full frame."""
+    results = FilterResultCache()
+    results.filter(frame, '@.category == "books" && @.price < 20')
+    expression = '@.category == "books"'
+    assert results.filter(frame, expression).equals(_expected(frame, expression))
+    assert results.info().misses == 2
+
+
+def test_source_changes_invalidate(frame):
+    """Test invalidation on a new frame object or a new version."""
+    results = FilterResultCache()
+    results.filter(frame, '@.rating == 5')
+    assert len(results) == 1
+
+    changed = frame.with_columns(pl.lit(5).alias("rating"))
+    assert results.filter(changed, '@.rating == 5').height == 1000
+    assert results.info().hits == 0
+
+    results.filter(changed, '@.rating == 5', version=1)
+    copy = changed.clone()
+    results.filter(copy, '@.rating == 5', version=1)
+    assert results.info().hits == 1
+    results.filter(frame, '@.rating == 5', version=2)
+    assert results.info().hits == 1 and len(results) == 1
+
+    results.invalidate()
+    assert len(results) == 0
+
+
+def test_memory_bound_evicts_least_recently_used(frame):
+    """Test eviction by estimated size."""
+    size = frame.filter(compile_polars('@.rating == 1')).estimated_size()
+    results = FilterResultCache(max_bytes=int(size * 2.5))
+    for rating in (1, 2, 3):
+        results.filter(frame, f'@.rating == {rating}')
+    info = results.info()
+    assert info.evictions >= 1 and info.nbytes <= info.max_bytes
+
+    results.clear()
+    assert FilterResultCache(max_bytes=0).filter(frame, '@.rating == 1').height > 0
+    with pytest.raises(ValueError):
+        FilterResultCache(max_bytes=-1)
@@ -0,0 +1,184 @@
+"""Tests for membership conditions and the membership rewrite pass."""
+
+import random
+import sqlite3
+
+import pytest
+from predicate_bst import (
+    ComparisonOp,
+    build_boolean_syntax_tree,
+    compile_predicate,
+    convert_to_polars,
+    parse_condition,
+    rewrite_membership,
+    to_sql
+)
+
+
+def test_parse_membership_conditions():
+    """Test ``in``/``not in`` parsing and canonical text."""
+    condition = parse_condition('@.sku in ["b", "a,c"]')
+    assert (condition.op, condition.value) == (ComparisonOp.IN, frozenset({"b", "a,c"}))
+    assert str(condition) == '@.sku in ["a,c", "b"]'
+    assert parse_condition(str(condition)) == condition
+
+    condition = parse_condition("@.id not  in[3, 1.5]")
+    assert (condition.op, condition.value) == (ComparisonOp.NOT_IN, frozenset({3, 1.5}))
+    assert str(condition) == "@.id not in [1.5, 3]"
+    assert parse_condition("@.flag in [true]") != parse_condition("@.flag in [1]")
+
+
+@pytest.mark.parametrize("text", [
+    "@.xin [1]",
+    "@.x in []",
+    "@.x in [1,]",
+    "@.x in [null]",
+    '@.x in [1, "a"]',
+    '@.x in ["a" "b"]',
+    "@.x in 1",
+])
+def test_parse_invalid_membership_conditions(text):
+    """Test that malformed member lists are rejected."""
+    with pytest.raises(ValueError):
+        parse_condition(text)
+
+
+def test_evaluate_membership_conditions():
+    """Test membership semantics for missing, null and unhashable values."""
+    is_in = compile_predicate('@.x in [1, 2]')
+    not_in = compile_predicate('@.x not in [1, 2]')
+    assert [is_in(record) for record in ({"x": 2}, {"x": 2.0}, {"x": 3}, {}, {"x": None}, {"x": [1]})] == [
+        True, True, False, False, False, False,
+    ]
+    assert [not_in(record) for record in ({"x": 2}, {"x": 3}, {"x": "1"}, {}, {"x": None}, {"x": [1]})] == [
+        False, True, True, False, False, True,
+    ]
+
+
+def test_rewrite_or_of_equalities():
+    """Test merging equalities under OR at the position of the first one."""
+    tree = build_boolean_syntax_tree('@.a > 1 || @.sku == "x" || @.b == 2 || @.sku == "y" || @.sku in ["z"]')
+    rewritten = rewrite_membership(tree)
+    assert str(rewritten) == 'OR(Condition(@.a > 1), Condition(@.sku in ["x", "y", "z"]), Condition(@.b == 2))'
+    assert rewritten.children[0] is tree.children[0]
+    assert len(tree.children) == 5
+
+
+def test_rewrite_and_of_inequalities():
+    """Test merging inequalities under AND, collapsing single-child nodes."""
+    assert str(rewrite_membership('@.id != 3 && @.id != 1')) == "Condition(@.id not in [1, 3])"
+    assert str(rewrite_membership('@.a == 1 && (@.id != 1 && @.id != 2)')) == (
+        "AND(Condition(@.a == 1), Condition(@.id not in [1, 2]))"
+    )
+    # Equalities under AND and inequalities under OR are left alone
+    assert str(rewrite_membership('@.a == 1 && @.a == 2')) == "AND(Condition(@.a == 1), Condition(@.a == 2))"
+    assert str(rewrite_membership('@.a != 1 || @.a != 2')) == "OR(Condition(@.a != 1), Condition(@.a != 2))"
+
+
+def test_rewrite_keeps_kinds_and_nulls_apart():
+    """Test that only non-null literals of one kind are merged."""
+    rewritten = rewrite_membership('@.a == 1 || @.a == true || @.a == "1" || @.a == null || @.a == 2.5')
+    assert str(rewritten) == (
+        'OR(Condition(@.a in [1, 2.5]), Condition(@.a == true), Condition(@.a == "1"), Condition(@.a == null))'
+    )
+    assert str(rewrite_membership('@.a == 1 || @.a == 1')) == "OR(Condition(@.a == 1), Condition(@.a == 1))"
+    assert str(rewrite_membership('@.a == 1 || @.a == 2', min_values=3)) == (
+        "OR(Condition(@.a == 1), Condition(@.a == 2))"
+    )
+
+
+def _random_tree_text(rng, depth=0):
+    if depth > 2 or rng.random() < 0.3:
+        field = rng.choice("ab")
+        op = rng.choice(["==", "==", "!=", "!=", ">"])
+        literal = rng.choice(["1", "2", "3", '"1"', "null", "true"]) if op != ">" else "1"
+        return f"@.{field} {op} {literal}"
+    joiner = rng.choice([" && ", " || "])
+    return "(" + joiner.join(_random_tree_text(rng, depth + 1) for _ in range(rng.randint(2, 5))) + ")"
+
+
+def test_rewrite_preserves_results():
+    """Test that rewritten trees match the same records in the evaluator and SQLite."""
+    rng = random.Random(7)
+    values = [1, 2, 3, "1", True, None, [1]]
+    records = [{"a": rng.choice(values), "b": rng.choice(values)} for _ in range(200)]
+    connection = sqlite3.connect(":memory:")
+    connection.execute('CREATE TABLE t (id INTEGER, a, b)')
+    # SQLite has no list values; those records stay out of the table
+    rows = [(i, record["a"], record["b"]) for i, record in enumerate(records) if [1] not in record.values()]
+    connection.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+
+    def matching_ids(node):
+        clause, params = to_sql(node)
+        return [row[0] for row in connection.execute(f"SELECT id FROM t WHERE {clause} ORDER BY id", params)]
+
+    for _ in range(200):
+        tree = build_boolean_syntax_tree(_random_tree_text(rng))
+        rewritten = rewrite_membership(tree)
+        original, merged = compile_predicate(tree), compile_predicate(rewritten)
+        assert [original(record) for record in records] == [merged(record) for record in records]
+        assert matching_ids(rewritten) == matching_ids(tree)
+
+
+def test_rewrite_polars_and_batch_backends():
+    """Test membership conditions in the Polars and NumPy backends."""
+    pl = pytest.importorskip("polars")
+    np = pytest.importorskip("numpy")
+    from predicate_bst import evaluate_batch, to_polars
+
+    frame = pl.DataFrame({"i": [1, 2, None, 4], "f": [1.0, 2.5, 3.0, None], "s": ["x", None, "y", "z"]})
+    records = frame.to_dicts()
+    columns = {name: np.array(frame[name].to_list(), dtype=object) for name in frame.columns}
+    for text in ['@.i == 1 || @.i == 4', '@.i != 1 && @.i != 2', '@.f == 2.5 || @.f == 3', '@.f != 1.0 && @.f != 3',
+                 '@.s == "x" || @.s == "y"', '@.s != "x" && @.s != "z"']:
+        tree = rewrite_membership(text)
+        assert tree.condition.op in (ComparisonOp.IN, ComparisonOp.NOT_IN)
+        expected = [compile_predicate(text)(record) for record in records]
+        assert frame.select(to_polars(tree).fill_null(False)).to_series().to_list() == expected
+        assert evaluate_batch(tree, columns).tolist() == expected
+        assert evaluate_batch(tree, {"i": np.array([1, 2, 3, 4])}, length=4).tolist() == [
+            compile_predicate(tree)({"i": value}) for value in (1, 2, 3, 4)
+        ]
+
+
+def test_membership_large_integers_in_polars():
+    """Test that integer members are compared exactly, without casting the column."""
+    pl = pytest.importorskip("polars")
+    from predicate_bst import compile_polars
+
+    big = 2 ** 53 + 1
+    frame = pl.DataFrame({"x": [big, big - 1, 1]})
+    expression = f'@.x in [{big}, 1]'
+    expected = [compile_predicate(expression)(record) for record in frame.to_dicts()]
+    assert expected == [True, False, True]
+    assert frame.select(compile_polars(expression)).to_series().to_list() == expected
+    assert "cast" not in str(compile_polars(expression))
+    assert convert_to_polars(f'@.x not in [{big}, 1]', cache=None) == (
+        f'pl.all_horizontal(pl.element().struct.field("x").ne(1), pl.element().struct.field("x").ne({big}))'
+    )
+
+
+@pytest.mark.parametrize("text", [
+    '@.c == 1 || @.c == 3',
+    '@.c == 1 || @.c == 3.0',
+    '@.c == 2.5 || @.c == 3',
+    '@.c in [1.0, 3]',
+    '@.c not in [1, 3.0]',
+    '@.c != 1 && @.c != 2.5',
+])
+def test_numeric_membership_on_integer_and_float_columns(text):
+    """Test that numeric member lists work whatever the column's numeric dtype."""
+    pl = pytest.importorskip("polars")
+    from predicate_bst import filter_lazy, to_polars
+
+    tree = rewrite_membership(text)
+    assert tree.condition.op in (ComparisonOp.IN, ComparisonOp.NOT_IN)
+    for dtype in (pl.Int64, pl.Float64):
+        frame = pl.DataFrame({"c": pl.Series([1, 2, 3, None], dtype=dtype)})
+        expected = [row["c"] for row in frame.to_dicts() if compile_predicate(text)(row)]
+        assert frame.filter(to_polars(tree))["c"].to_list() == expected
+        assert filter_lazy(frame.lazy(), tree).collect()["c"].to_list() == expected
+        # The string backend, evaluated on list elements
+        items = frame.select(pl.concat_list(pl.struct("c")).alias("items"))
+        matches = items.select(pl.col("items").list.eval(pl.element().filter(eval(convert_to_polars(str(tree.condition))))))
+        assert [row[0]["c"] for row in matches["items"].to_list() if row] == expected
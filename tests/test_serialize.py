@@ -0,0 +1,139 @@
+"""Tests for dictionary and binary round-trips of trees."""
+
+import mmap
+import random
+
+import pytest
+from predicate_bst import (
+    ConditionTable,
+    Node,
+    NodeType,
+    PackedTree,
+    RulePack,
+    build_boolean_syntax_tree,
+    dump_trees,
+    load_trees
+)
+
+
+EXPRESSIONS = [
+    '@.a == 1 && (@.b > 2.5 || @.c != "x")',
+    '@.name == "café" || @.flag == true || @.flag == false || @.gone == null',
+    '@.big == 123456789012345678901234567890 && @.small >= -9007199254740993',
+    'free text condition',
+    '@.a == 1',
+    '@.items[0].id > 3 && @.user.address.city == "Oslo"',
+]
+
+
+def test_from_dict_round_trip():
+    """Test that from_dict inverts to_dict and re-parses conditions."""
+    for expression in EXPRESSIONS:
+        tree = build_boolean_syntax_tree(expression)
+        rebuilt = Node.from_dict(tree.to_dict())
+        assert rebuilt.to_dict() == tree.to_dict()
+    assert Node.from_dict({"type": "CONDITION", "value": "@.a > 1"}).condition.value == 1.0
+
+
+def test_from_dict_errors():
+    """Test malformed dictionary representations."""
+    for data in [{}, {"type": "XOR"}, {"type": "CONDITION"}, {"type": "AND", "children": []},
+                 {"type": "OR", "children": [{"type": "CONDITION", "value": 3}]}, "AND"]:
+        with pytest.raises(ValueError):
+            Node.from_dict(data)
+
+
+def test_from_dict_deep_tree():
+    """Test that from_dict handles nesting beyond the recursion limit."""
+    expression = "(" * 5_000 + "@.a == 1" + ")" * 5_000 + " && @.b == 2"
+    tree = build_boolean_syntax_tree(expression)
+    data = {"type": "CONDITION", "value": "@.x == 0"}
+    for _ in range(5_000):
+        data = {"type": "OR", "children": [{"type": "CONDITION", "value": "@.y == 1"}, data]}
+    assert Node.from_dict(tree.to_dict()).to_dict() == tree.to_dict()
+    rebuilt = Node.from_dict(data)
+    depth = 0
+    while rebuilt.type == NodeType.OR:
+        assert rebuilt.children[0].value == "@.y == 1"
+        rebuilt, depth = rebuilt.children[1], depth + 1
+    assert (depth, rebuilt.value) == (5_000, "@.x == 0")
+
+
+def test_binary_round_trip():
+    """Test dumping and loading trees, including conditions and literal types."""
+    trees = [build_boolean_syntax_tree(expression) for expression in EXPRESSIONS]
+    payload = dump_trees(trees)
+    assert payload[:4] == b"PBST"
+    loaded = load_trees(payload)
+    assert [tree.to_dict() for tree in loaded] == [tree.to_dict() for tree in trees]
+
+    original = trees[1].children[0].condition
+    condition = loaded[1].children[0].condition
+    assert condition == original
+    assert loaded[2].children[0].condition.value == 123456789012345678901234567890
+    with pytest.raises(ValueError):
+        loaded[3].condition
+    assert loaded[0].children[1].children[0].condition.value == 2.5
+
+
+def test_rule_pack_is_lazy_and_shares_conditions():
+    """Test random access, caching and the shared condition table."""
+    trees = [build_boolean_syntax_tree(f'@.a == {i % 3} && @.b == "x"') for i in range(30)]
+    pack = RulePack(memoryview(dump_trees(trees)))
+    assert len(pack) == 30
+    assert pack[-1].to_dict() == trees[29].to_dict()
+    assert pack[4] is pack[4]
+    assert pack[0].children[1].condition is pack[1].children[1].condition
+    with pytest.raises(IndexError):
+        pack[30]
+
+
+def test_rule_pack_from_packed_trees_and_mmap(tmp_path):
+    """Test dumping PackedTree views and loading a memory-mapped file."""
+    table = ConditionTable()
+    packed = [PackedTree.from_node(build_boolean_syntax_tree(expression), table) for expression in EXPRESSIONS]
+    path = tmp_path / "rules.pbst"
+    path.write_bytes(dump_trees(tree.root for tree in packed))
+
+    with RulePack.open(str(path)) as pack:
+        assert [tree.to_dict() for tree in pack] == [tree.root.to_dict() for tree in packed]
+
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        pack = RulePack(mapped)
+        assert pack[0].to_dict() == packed[0].root.to_dict()
+        pack.close()
+        mapped.close()
+
+
+def test_rule_pack_errors():
+    """Test rejecting foreign, truncated and future-version buffers."""
+    payload = dump_trees([build_boolean_syntax_tree('@.a == 1')])
+    with pytest.raises(ValueError, match="magic"):
+        RulePack(b"JUNK" + payload[4:])
+    with pytest.raises(ValueError, match="version"):
+        RulePack(payload[:4] + b"\x63\x00" + payload[6:])
+    with pytest.raises(ValueError, match="truncated"):
+        RulePack(payload[:-1])
+    with pytest.raises(ValueError):
+        RulePack(b"PB")
+    with pytest.raises(ValueError):
+        dump_trees([Node(NodeType.AND)])
+    assert load_trees(dump_trees([])) == []
+
+
+def test_binary_round_trip_random_trees():
+    """Test round-trips of random trees against their dictionary form."""
+    rng = random.Random(16)
+
+    literals = ["1", "2.5", "null", "true", '"s"']
+
+    def random_expression(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return f'@.f{rng.randint(0, 5)} {rng.choice(["==", "!=", ">", "<="])} {rng.choice(literals)}'
+        operator = rng.choice([" && ", " || "])
+        return "(" + operator.join(random_expression(depth - 1) for _ in range(rng.randint(2, 4))) + ")"
+
+    trees = [build_boolean_syntax_tree(random_expression(4)) for _ in range(200)]
+    loaded = load_trees(dump_trees(trees))
+    assert [tree.to_dict() for tree in loaded] == [tree.to_dict() for tree in trees]
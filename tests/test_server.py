@@ -0,0 +1,222 @@
+"""Tests for the micro-batching predicate server and its client."""
+
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+from predicate_bst import (
+    PredicateCache,
+    PredicateClient,
+    PredicateServer,
+    compile_predicate
+)
+
+
+RECORDS = [
+    {"price": 150, "category": "books"},
+    {"price": 50, "category": "books"},
+    {"price": 200, "category": "games"},
+    {"category": "books"},
+]
+EXPRESSION = '@.price > 100 && @.category == "books"'
+
+
+def test_evaluate_over_tcp():
+    """Test a single request and reply over a TCP socket."""
+    async def scenario():
+        async with PredicateServer(cache=PredicateCache()) as server:
+            await server.start(port=0)
+            _, port = server.address
+            async with await PredicateClient.connect(port=port) as client:
+                return await client.evaluate(EXPRESSION, RECORDS), server.stats
+
+    mask, stats = asyncio.run(scenario())
+    assert mask == [True, False, False, False]
+    assert stats.requests == 1 and stats.records == 4 and stats.batches == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets are not available")
+def test_concurrent_requests_share_batches(tmp_path):
+    """Test that concurrent requests for one predicate are evaluated together."""
+    path = str(tmp_path / "predicates.sock")
+    expected = [compile_predicate(EXPRESSION)(record) for record in RECORDS]
+
+    async def scenario():
+        async with PredicateServer(max_latency=0.05, cache=PredicateCache()) as server:
+            await server.start(path=path)
+            clients = [await PredicateClient.connect(path=path) for _ in range(3)]
+            try:
+                masks = await asyncio.gather(*(
+                    client.evaluate(EXPRESSION.replace(" ", "  ") if i % 2 else EXPRESSION, RECORDS[i % 4:])
+                    for client in clients for i in range(10)
+                ))
+            finally:
+                for client in clients:
+                    await client.close()
+            return masks, server.stats
+
+    masks, stats = asyncio.run(scenario())
+    assert masks == [expected[i % 4:] for _ in range(3) for i in range(10)]
+    assert stats.requests == 30
+    assert stats.batches < stats.requests
+
+
+def test_full_batch_is_evaluated_without_waiting():
+    """Test that reaching the batch size flushes before the latency deadline."""
+    async def scenario():
+        async with PredicateServer(max_batch_size=4, max_latency=60, cache=PredicateCache()) as server:
+            await server.start(port=0)
+            async with await PredicateClient.connect(port=server.address[1]) as client:
+                return await asyncio.wait_for(client.evaluate("@.price > 100", RECORDS), 5)
+
+    assert asyncio.run(scenario()) == [True, False, True, False]
+
+
+def test_invalid_requests_get_errors():
+    """Test error replies for bad predicates, bad records and malformed lines."""
+    async def scenario():
+        async with PredicateServer(cache=PredicateCache()) as server:
+            await server.start(port=0)
+            host, port = server.address
+            async with await PredicateClient.connect(port=port) as client:
+                with pytest.raises(ValueError):
+                    await client.evaluate("@.price >", RECORDS)
+                with pytest.raises(ValueError, match="records"):
+                    await client.evaluate("@.price > 1", [1, 2])
+                # The connection stays usable after an error
+                assert await client.evaluate("@.price > 1", RECORDS[:1]) == [True]
+
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(b"not json\n" + json.dumps({"id": 7, "predicate": 1}).encode() + b"\n")
+            await writer.drain()
+            replies = [json.loads(await reader.readline()) for _ in range(2)]
+            writer.close()
+            return replies, server.stats
+
+    replies, stats = asyncio.run(scenario())
+    assert sorted(reply["id"] or 0 for reply in replies) == [0, 7]
+    assert all("error" in reply for reply in replies)
+    assert stats.errors == 4
+
+
+def test_client_fails_pending_requests_when_server_closes():
+    """Test that outstanding requests raise ConnectionError once the connection drops."""
+    async def scenario():
+        async def never_reply(reader, writer):
+            await reader.readline()
+            writer.close()
+
+        server = await asyncio.start_server(never_reply, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = await PredicateClient.connect(port=port)
+        try:
+            with pytest.raises(ConnectionError):
+                await client.evaluate("@.price > 1", RECORDS)
+            with pytest.raises(ConnectionError):
+                await client.evaluate("@.price > 1", RECORDS)
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_large_batches_are_offloaded():
+    """Test that batches above ``offload_size`` are evaluated off the event loop."""
+    async def scenario():
+        async with PredicateServer(offload_size=2, max_latency=0.05, cache=PredicateCache()) as server:
+            await server.start(port=0)
+            async with await PredicateClient.connect(port=server.address[1]) as client:
+                return await asyncio.gather(
+                    client.evaluate(EXPRESSION, RECORDS), client.evaluate(EXPRESSION, RECORDS[:1])
+                )
+
+    assert asyncio.run(scenario()) == [[True, False, False, False], [True]]
+
+
+@pytest.mark.parametrize("columnar", [True, False])
+def test_merged_batches_match_the_evaluator(monkeypatch, columnar):
+    """Test column-wise and per-record batch evaluation against the compiled predicate."""
+    if columnar:
+        pytest.importorskip("numpy")
+    else:
+        def no_numpy():
+            raise ImportError("numpy")
+
+        monkeypatch.setattr("predicate_bst.server._import_numpy", no_numpy)
+    records = [
+        {"price": 150, "category": "books", "tags": ["a", "b"], "owner": {"id": 3}},
+        {"price": "150", "category": None, "tags": [], "owner": [1, 2]},
+        {"price": True, "category": ["books"], "owner": {"id": 3.0}},
+        {"price": [1, 2], "tags": ["b"], "owner": None},
+        {},
+    ]
+    expressions = [
+        '@.price > 100 && @.category == "books"',
+        '@.price >= 1 || @.category in ["books", "games"]',
+        '@.tags[0] == "b" || @.owner.id == 3',
+        '@.owner.id not in [1, 2] && @.category != null',
+    ]
+
+    async def scenario():
+        async with PredicateServer(max_latency=0.05, cache=PredicateCache()) as server:
+            await server.start(port=0)
+            async with await PredicateClient.connect(port=server.address[1]) as client:
+                return await asyncio.gather(*(
+                    client.evaluate(expression, records[i:]) for expression in expressions for i in range(3)
+                )), server.stats
+
+    masks, stats = asyncio.run(scenario())
+    assert masks == [
+        [compile_predicate(expression)(record) for record in records[i:]] for expression in expressions for i in range(3)
+    ]
+    assert stats.batches == len(expressions)
+
+
+@pytest.mark.parametrize("offload_size", [1, 100])
+def test_evaluation_errors_fail_the_batch(monkeypatch, offload_size):
+    """Test that a predicate raising fails every request of its batch instead of hanging."""
+    def failing(record):
+        raise RuntimeError("broken")
+
+    def no_numpy():
+        raise ImportError("numpy")
+
+    # Without NumPy, batches go through the compiled predicate
+    monkeypatch.setattr("predicate_bst.server._import_numpy", no_numpy)
+    monkeypatch.setattr("predicate_bst.server.compile_predicate", lambda expression, cache: failing)
+
+    async def scenario():
+        async with PredicateServer(offload_size=offload_size, cache=PredicateCache()) as server:
+            await server.start(port=0)
+            async with await PredicateClient.connect(port=server.address[1]) as client:
+                requests = [client.evaluate("@.price > 100", RECORDS) for _ in range(2)]
+                results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 5)
+            return results, server.stats
+
+    results, stats = asyncio.run(scenario())
+    assert all(isinstance(result, Exception) and "broken" in str(result) for result in results)
+    assert stats.errors == 2
+
+
+def test_server_is_imported_on_first_use():
+    """Test that importing the package does not load the server or asyncio."""
+    code = (
+        "import sys, predicate_bst; print('asyncio' in sys.modules); "
+        "print(predicate_bst.PredicateServer.__module__); print('PredicateServer' in dir(predicate_bst))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["False", "predicate_bst.server", "True"]
+
+
+def test_invalid_limits():
+    """Test that non-positive knobs are rejected."""
+    with pytest.raises(ValueError):
+        PredicateServer(max_batch_size=0)
+    with pytest.raises(ValueError):
+        PredicateServer(max_latency=-1)
+    with pytest.raises(ValueError):
+        PredicateServer(offload_size=0)
@@ -0,0 +1,80 @@
+"""Tests for the parameterized SQL backend."""
+
+import random
+import sqlite3
+
+import pytest
+from predicate_bst import (
+    SQLDialect,
+    build_boolean_syntax_tree,
+    compile_predicate,
+    compile_sql,
+    query_sqlite,
+    quote_identifier,
+    to_sql
+)
+
+
+def test_where_clause_and_parameters():
+    """Test placeholders, grouping and null checks."""
+    tree = build_boolean_syntax_tree('@.a == 1 || (@.b > 2 && (@.c == null || @.d != "x"))')
+    assert to_sql(tree) == ('"a" = ? OR ("b" > ? AND ("c" IS NULL OR "d" <> ?))', [1, 2.0, "x"])
+    assert to_sql(tree, quote_identifiers=False)[0] == 'a = ? OR (b > ? AND (c IS NULL OR d <> ?))'
+
+
+def test_literals_do_not_change_sql_text():
+    """Test that predicates differing only in literals share one statement."""
+    first, first_params = compile_sql('@.user == "u1" && @.ts > 10')
+    second, second_params = compile_sql('@.user == "u2" && @.ts > 99')
+    assert first == second
+    assert (first_params, second_params) == (("u1", 10.0), ("u2", 99.0))
+
+
+def test_dialects():
+    """Test built-in and custom dialects."""
+    tree = build_boolean_syntax_tree("@.a == 1 && @.b == 2")
+    assert to_sql(tree, "postgres")[0] == '"a" = $1 AND "b" = $2'
+    assert to_sql(tree, "mysql")[0] == "`a` = %s AND `b` = %s"
+    assert to_sql(tree, "mssql")[0] == "[a] = ? AND [b] = ?"
+    custom = SQLDialect("oracle", ":{index}", '"', '"')
+    assert to_sql(tree, custom)[0] == '"a" = :1 AND "b" = :2'
+    assert quote_identifier('we"ird') == '"we""ird"'
+    assert quote_identifier("a]b", "mssql") == "[a]]b]"
+    with pytest.raises(ValueError):
+        to_sql(tree, "oracle")
+    with pytest.raises(ValueError):
+        to_sql(build_boolean_syntax_tree("@.a > null"))
+
+
+def test_sqlite_matches_compiled_predicate():
+    """Test that SQLite selects the records the compiled predicate matches."""
+    rng = random.Random(22)
+    rows = [
+        {"id": i, "category": rng.choice(["books", "music", None]), "price": rng.choice([None, *range(30)])}
+        for i in range(300)
+    ]
+    connection = sqlite3.connect(":memory:")
+    connection.execute('CREATE TABLE "my items" (id INTEGER, category TEXT, price INTEGER)')
+    connection.executemany('INSERT INTO "my items" VALUES (:id, :category, :price)', rows)
+
+    for expression in [
+        '@.category == "books" && @.price < 20',
+        '@.category != "books" || @.price >= 25',
+        '@.category == null && (@.price == 3 || @.price > 27)',
+        '@.price != null && @.category != "music"',
+    ]:
+        is_match = compile_predicate(expression)
+        expected = [row["id"] for row in rows if is_match(row)]
+        selected = query_sqlite(connection, "my items", expression, columns=["id"]).fetchall()
+        assert [row[0] for row in selected] == expected, expression
+        tree = build_boolean_syntax_tree(expression)
+        assert len(query_sqlite(connection, "my items", tree).fetchall()) == len(expected)
+
+
+def test_deep_trees_do_not_recurse():
+    """Test converting a tree deeper than the recursion limit."""
+    expression = "@.a == 0"
+    for i in range(1, 3000):
+        expression = f"@.a == {i} {'&&' if i % 2 else '||'} ({expression})"
+    clause, params = to_sql(build_boolean_syntax_tree(expression))
+    assert len(params) == 3000 and clause.count("(") == 2998
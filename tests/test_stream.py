@@ -0,0 +1,105 @@
+"""Tests for the streaming NDJSON filter."""
+
+import io
+import json
+import random
+import subprocess
+import sys
+
+import pytest
+from predicate_bst import (
+    build_boolean_syntax_tree,
+    compile_predicate,
+    filter_ndjson,
+    iter_ndjson
+)
+
+
+@pytest.fixture
+def ndjson(tmp_path):
+    rng = random.Random(14)
+    records = [
+        {"id": i, "level": rng.choice(["info", "warn", "error"]), "code": rng.choice([200, 404, 500, 503])}
+        for i in range(500)
+    ]
+    records[3].pop("code")
+    path = tmp_path / "events.ndjson"
+    path.write_bytes(b"".join(json.dumps(record).encode() + b"\n" for record in records))
+    return path, records
+
+
+def test_iter_ndjson_yields_matching_lines(ndjson):
+    """Test filtering lines and decoded records."""
+    path, records = ndjson
+    expression = '@.level == "error" && @.code >= 500'
+    is_match = compile_predicate(expression)
+    expected = [record for record in records if is_match(record)]
+
+    lines = list(iter_ndjson(path, expression))
+    assert lines == [json.dumps(record).encode() for record in expected]
+    assert list(iter_ndjson(path, build_boolean_syntax_tree(expression), records=True)) == expected
+
+
+def test_iter_ndjson_line_handling(tmp_path):
+    """Test CRLF endings, blank lines, a missing final newline and invalid lines."""
+    path = tmp_path / "mixed.ndjson"
+    path.write_bytes(b'{"a": 1}\r\n\n   \n[1, 2]\n{"a": 2}')
+    assert list(iter_ndjson(path, '@.a > 0', skip_invalid=True)) == [b'{"a": 1}', b'{"a": 2}']
+    with pytest.raises(ValueError, match="byte 15"):
+        list(iter_ndjson(path, '@.a > 0'))
+
+    empty = tmp_path / "empty.ndjson"
+    empty.write_bytes(b"")
+    assert list(iter_ndjson(empty, '@.a > 0')) == []
+
+
+def test_prefilter(tmp_path):
+    """Test that the key prefilter skips lines without the fields but stays sound."""
+    path = tmp_path / "prefilter.ndjson"
+    path.write_bytes(b'{"a": 1}\nnot json\n{"b": 1}\n')
+    assert list(iter_ndjson(path, '@.a == 1', prefilter=True)) == [b'{"a": 1}']
+    # A predicate true for records lacking the field must not be prefiltered
+    with pytest.raises(ValueError):
+        list(iter_ndjson(path, '@.a == null', prefilter=True))
+
+    # Nested paths are prefiltered by their top-level key
+    path.write_bytes(b'{"a": {"b": 1}}\n{"b": 1}\n{"a": 2}\n')
+    assert list(iter_ndjson(path, '@.a.b == 1', prefilter=True)) == [b'{"a": {"b": 1}}']
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_filter_ndjson_writes_output(ndjson, tmp_path, workers):
+    """Test writing matches to a file, optionally sharded across processes."""
+    path, records = ndjson
+    expression = '@.code == 404 || @.code == null'
+    is_match = compile_predicate(expression)
+    expected = b"".join(json.dumps(record).encode() + b"\n" for record in records if is_match(record))
+
+    output = tmp_path / f"out-{workers}.ndjson"
+    assert filter_ndjson(path, expression, output, workers=workers) == expected.count(b"\n")
+    assert output.read_bytes() == expected
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith(".predicate-shard")) == []
+
+    buffer = io.BytesIO()
+    filter_ndjson(path, expression, buffer, workers=workers)
+    assert buffer.getvalue() == expected
+
+
+def test_filter_ndjson_shard_boundaries(tmp_path):
+    """Test that every line is handled exactly once for any byte-range split."""
+    path = tmp_path / "small.ndjson"
+    lines = [json.dumps({"i": i, "pad": "x" * (i % 7)}).encode() for i in range(40)]
+    path.write_bytes(b"\n".join(lines) + b"\n")
+    for workers in (2, 5, 16):
+        buffer = io.BytesIO()
+        assert filter_ndjson(path, '@.i >= 0', buffer, workers=workers) == 40
+        assert buffer.getvalue().splitlines() == lines
+    with pytest.raises(ValueError):
+        filter_ndjson(path, '@.i >= 0', io.BytesIO(), workers=0)
+
+
+def test_import_does_not_load_process_pools():
+    """Test that importing the package leaves concurrent.futures unloaded until a pool is needed."""
+    code = "import sys, predicate_bst; print('concurrent.futures' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
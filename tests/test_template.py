@@ -0,0 +1,87 @@
+"""Tests for literal-parameterized predicate templates."""
+
+import random
+
+import pytest
+from predicate_bst import (
+    ComparisonOp,
+    PredicateCache,
+    build_boolean_syntax_tree,
+    compile_predicate,
+    compile_polars,
+    compile_sql,
+    extract_template
+)
+
+
+def test_variants_share_one_template():
+    """Test that predicates differing only in literals map to one cached template."""
+    cache = PredicateCache()
+    template, literals = extract_template('@.user_id == "u1" && @.ts > 100', cache=cache)
+    assert template.shape == "@.user_id == ? && @.ts > ?"
+    assert literals == ("u1", 100.0)
+    other, other_literals = extract_template('@.user_id=="u2"  &&  @.ts > 250', cache=cache)
+    assert other is template and other_literals == ("u2", 250.0)
+    assert extract_template(build_boolean_syntax_tree('@.user_id == "u3" && @.ts > 5'), cache=cache)[0] is template
+    assert template.slots == [("user_id", ComparisonOp.EQ), ("ts", ComparisonOp.GT)]
+    assert extract_template('@.user_id == "u1" || @.ts > 100', cache=cache)[0] is not template
+
+
+def test_null_literals_are_part_of_the_shape():
+    """Test that null comparisons are not parameterized."""
+    template, literals = extract_template('@.a == null || (@.b != "null" && @.c != null)', cache=None)
+    assert template.shape == "@.a == null || (@.b != ? && @.c != null)"
+    assert literals == ("null",)
+    with pytest.raises(ValueError):
+        template.bind((None,))
+    with pytest.raises(ValueError):
+        template.bind(())
+
+
+def test_python_binding_matches_compiled_predicate():
+    """Test ``evaluate`` and ``bind`` against predicates compiled per variant."""
+    rng = random.Random(23)
+    records = [
+        {"user": rng.choice(["u1", "u2", "u3"]), "ts": rng.choice([None, *range(20)]), "flag": rng.random() < 0.5}
+        for _ in range(200)
+    ]
+    for _ in range(20):
+        user, ts = rng.choice(["u1", "u2", "u3"]), rng.randint(0, 20)
+        expression = f'(@.user == "{user}" && @.ts >= {ts}) || @.flag == true || @.ts == null'
+        template, literals = extract_template(expression)
+        expected = compile_predicate(expression, cache=None)
+        bound = template.bind(literals)
+        for record in records:
+            assert template.evaluate(record, literals) == bound(record) == expected(record)
+
+
+def test_nested_path_slots():
+    """Test slots on nested paths, including paths that break off."""
+    template, literals = extract_template('@.user.id == "u1" || @.items[0].n > 2')
+    bound = template.bind(literals)
+    records = [{"user": {"id": "u1"}}, {"items": [{"n": 3}]}, {"items": [{"n": "3"}]}, {"items": []}, {"user": 1}]
+    assert [bound(record) for record in records] == [True, True, False, False, False]
+
+
+def test_polars_and_sql_binding():
+    """Test the Polars and SQL outputs for bound literals."""
+    pl = pytest.importorskip("polars")
+    frame = pl.DataFrame({"user": ["u1", "u2", None, "u1"], "ts": [5, 50, 7, None]})
+    template, _ = extract_template('@.user == "u9" && @.ts > 0 || @.user == null')
+    for literals in [("u1", 1.0), ("u2", 10.0), ("u1", 100.0)]:
+        expression = f'@.user == "{literals[0]}" && @.ts > {literals[1]} || @.user == null'
+        assert frame.filter(template.to_polars(literals)).equals(frame.filter(compile_polars(expression)))
+        assert template.to_sql(literals) == (compile_sql(expression)[0], list(literals))
+    assert str(template.instantiate(("u1", 1.0))) == str(
+        build_boolean_syntax_tree('@.user == "u1" && @.ts > 1.0 || @.user == null')
+    )
+
+
+def test_invalid_predicates_raise():
+    """Test errors from the string scan."""
+    with pytest.raises(ValueError):
+        extract_template('@.a == "unclosed && @.b == 1', cache=None)
+    with pytest.raises(ValueError):
+        extract_template("@.a ~ 1", cache=None)
+    with pytest.raises(ValueError):
+        extract_template("@.a == 1 &&", cache=None)